@@ -2,10 +2,15 @@
 configuration.py adds the parent directory of the LUCI repo in sys.path so that modules can be imported using "from LUCI_SEEA..."
 '''
 
-import arcpy
 import sys
 import os
 
+# Without arcpy (batch runs) the error is written to stderr
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+
 try:
     toolbox = "LUCI_SEEA"
 
@@ -42,5 +47,8 @@ try:
     clippingTolerance = 0.00000000001
 
 except Exception:
-    arcpy.AddError("Configuration file not read successfully")
+    if arcpy is not None:
+        arcpy.AddError("Configuration file not read successfully")
+    else:
+        sys.stderr.write("Configuration file not read successfully\n")
     raise
@@ -1,19 +1,41 @@
 '''
 LUCI PTFs Database
+
+Every PTF is registered once, when this module is imported, with its metadata
+(type, pressures, unit, output fields), the input columns it reads and the function
+that calculates it. Lookups are a single dictionary access and the records are
+immutable, so they can be shared by all of the tools.
 '''
 
 import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
+import importlib
+from collections import namedtuple
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
+import LUCI_PTFs.lib.data_access as data_access
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, data_access])
+
+# Immutable record held in the registry.
+# inputFields: columns read by the PTF ("carbon" is replaced by OC or OM).
+# module, function: where the PTF is calculated (resolved on first use).
+# args: names of the arguments taken by that function, in order.
+# carbonType: carbon content used by the PTF equations (OC or OM), the other is converted.
+PTFRecord = namedtuple('PTFRecord', ['PTFType', 'PTFPressures', 'PTFUnit', 'PTFFields',
+                                     'inputFields', 'module', 'function', 'args', 'carbonType'])
+
+class PTF:
+    def __init__(self, PTFType, PTFPressures, PTFUnit, PTFFields=None):
+        self.PTFType = PTFType
+        self.PTFPressures = PTFPressures
+        self.PTFUnit = PTFUnit
+        self.PTFFields = PTFFields
 
 def setOutputFields(pressureArray, unit):
     # Returns an array of field names
@@ -26,268 +48,187 @@ def setOutputFields(pressureArray, unit):
 
     return fields
 
+_registry = {}
+_order = []
+
+# Options which are matched on their prefix (e.g. Lal_1978 from the soil parameterisation tool)
+_prefixOptions = [("Lal_1978", "Lal_1978_Group1"),
+                  ("Wosten_1999", "Wosten_1999_top")]
+
+# Argument lists of the PTF functions
+_pointArgs = ("outputFolder", "outputShp")
+_pointCarbArgs = ("outputFolder", "outputShp", "carbonConFactor", "carbContent")
+_vgArgs = ("outputShp", "PTFOption", "carbonConFactor", "carbContent")
+_mvgArgs = ("outputShp", "PTFOption", "carbonConFactor", "carbContent", "MVGChoice")
+_ksatArgs = ("outputFolder", "outputShp")
+_ksatCarbArgs = ("outputFolder", "outputShp", "carbonConFactor", "carbContent")
+_bcArgs = ("outputShp", "PTFOption")
+_bcCarbArgs = ("outputShp", "PTFOption", "carbonConFactor", "carbContent")
+
+def _pointPTF(PTFOption, PTFPressures, inputFields, args, function=None, carbonType=None):
+
+    PTFUnit = "kPa"
+
+    _order.append(PTFOption)
+    _registry[PTFOption] = PTFRecord("pointPTF", tuple(PTFPressures), PTFUnit,
+                                     tuple(setOutputFields(PTFPressures, PTFUnit)),
+                                     tuple(inputFields), "point_PTFs", function or PTFOption, args, carbonType)
+
+def _vgPTF(PTFOption, PTFUnit, inputFields, args, function=None, carbonType=None):
+
+    _order.append(PTFOption)
+    _registry[PTFOption] = PTFRecord("vgPTF", "SMRC", PTFUnit, ("warning",),
+                                     tuple(inputFields), "vg_PTFs", function or PTFOption, args, carbonType)
+
+def _ksatPTF(PTFOption, inputFields, args, carbonType=None):
+
+    _order.append(PTFOption)
+    _registry[PTFOption] = PTFRecord("ksatPTF", "Ksat", "mmhr", ("warning", "K_sat"),
+                                     tuple(inputFields), "ksat_PTFs", PTFOption, args, carbonType)
+
+def _bcPTF(PTFOption, PTFUnit, inputFields, args, carbonType=None):
+
+    _order.append(PTFOption)
+    _registry[PTFOption] = PTFRecord("bcPTF", "bc", PTFUnit, ("warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"),
+                                     tuple(inputFields), "bc_PTFs", PTFOption, args, carbonType)
+
+# Point-PTFs
+_pointPTF("Nguyen_2014", [1, 3, 6, 10, 20, 33, 100, 1500], ["Sand", "Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OC")
+_pointPTF("Adhikary_2008", [10, 33, 100, 300, 500, 1000, 1500], ["Sand", "Silt", "Clay"], _pointArgs)
+_pointPTF("Rawls_1982", [10, 20, 33, 50, 100, 200, 400, 700, 1000, 1500], ["Sand", "Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OM")
+_pointPTF("Hall_1977_top", [5, 10, 33, 200, 1500], ["Clay", "Silt", "carbon", "BD"], _pointCarbArgs, carbonType="OC")
+_pointPTF("Hall_1977_sub", [5, 10, 33, 200, 1500], ["Clay", "Silt", "carbon", "BD"], _pointCarbArgs, carbonType="OC")
+_pointPTF("GuptaLarson_1979", [4, 7, 10, 20, 33, 60, 100, 200, 400, 700, 1000, 1500], ["Sand", "Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OM")
+_pointPTF("Batjes_1996", [0, 1, 3, 5, 10, 20, 33, 50, 250, 1500], ["Silt", "Clay", "carbon"], _pointCarbArgs, carbonType="OC")
+_pointPTF("SaxtonRawls_2006", [0, 33, 1500], ["Sand", "Clay", "carbon"], _pointCarbArgs, carbonType="OM")
+_pointPTF("Pidgeon_1972", [10, 33, 1500], ["Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OM")
+_pointPTF("Lal_1978_Group1", [0, 10, 33, 1500], ["Clay", "BD"], ("outputFolder", "outputShp", "PTFOption"), "Lal_1978")
+_pointPTF("Lal_1978_Group2", [0, 10, 33, 1500], ["Clay", "BD"], ("outputFolder", "outputShp", "PTFOption"), "Lal_1978")
+_pointPTF("AinaPeriaswamy_1985", [33, 1500], ["Sand", "Clay", "BD"], _pointArgs)
+_pointPTF("ManriqueJones_1991", [33, 1500], ["Sand", "Clay", "BD"], _pointArgs)
+_pointPTF("vanDenBerg_1997", [10, 1500], ["Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OC")
+_pointPTF("TomasellaHodnett_1998", [0, 1, 3, 6, 10, 33, 100, 500, 1500], ["Silt", "Clay", "carbon"], _pointCarbArgs, carbonType="OC")
+_pointPTF("Reichert_2009_OM", [6, 10, 33, 100, 500, 1500], ["Sand", "Silt", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OM")
+_pointPTF("Reichert_2009", [10, 33, 1500], ["Sand", "Silt", "Clay", "BD"], _pointArgs)
+_pointPTF("Botula_2013", [1, 3, 6, 10, 20, 33, 100, 1500], ["Sand", "Clay", "BD"], _pointArgs)
+_pointPTF("ShwethaVarija_2013", [33, 100, 300, 500, 1000, 1500], ["Sand", "Silt", "Clay", "BD"], _pointArgs)
+_pointPTF("Dashtaki_2010_point", [10, 30, 100, 300, 500, 1500], ["Sand", "Silt", "Clay", "BD"], _pointArgs, "Dashtaki_2010")
+_pointPTF("Santra_2018_OC", [33, 1500], ["Sand", "Clay", "carbon", "BD"], _pointCarbArgs, carbonType="OC")
+_pointPTF("Santra_2018", [33, 1500], ["Sand", "Clay", "BD"], _pointArgs)
+
+# VG-PTFs (units are the original units of each PTF)
+_vgPTF("Wosten_1999_top", "cm", ["Sand", "Silt", "Clay", "carbon", "BD", "LUCIname", "texture"], _mvgArgs, "Wosten_1999", carbonType="OM")
+_vgPTF("Wosten_1999_sub", "cm", ["Sand", "Silt", "Clay", "carbon", "BD", "LUCIname", "texture"], _mvgArgs, "Wosten_1999", carbonType="OM")
+_vgPTF("Vereecken_1989", "cm", ["Sand", "Clay", "carbon", "BD", "LUCIname", "texture"], _vgArgs, carbonType="OC")
+_vgPTF("ZachariasWessolek_2007", "kPa", ["Sand", "Clay", "BD", "LUCIname", "texture"], _vgArgs)
+_vgPTF("Weynants_2009", "cm", ["Sand", "Clay", "carbon", "BD", "LUCIname", "texture"], _mvgArgs, carbonType="OC")
+_vgPTF("Dashtaki_2010_vg", "cm", ["Sand", "Clay", "BD", "LUCIname", "texture"], _vgArgs, "Dashtaki_2010")
+_vgPTF("HodnettTomasella_2002", "kPa", ["Sand", "Silt", "Clay", "OC", "BD", "CEC", "pH", "LUCIname", "texture"], _vgArgs, carbonType="OC")
+
+# Ksat-PTFs
+_ksatPTF("Cosby_1984", ["Sand", "Clay"], _ksatArgs)
+_ksatPTF("Puckett_1985", ["Clay"], _ksatArgs)
+_ksatPTF("Jabro_1992", ["Silt", "Clay", "BD"], _ksatArgs)
+_ksatPTF("CampbellShiozawa_1994", ["Silt", "Clay"], _ksatArgs)
+_ksatPTF("FerrerJulia_2004_1", ["Sand"], _ksatArgs)
+_ksatPTF("FerrerJulia_2004_2", ["Sand", "Clay", "carbon", "BD"], _ksatCarbArgs, carbonType="OM")
+_ksatPTF("Ahuja_1989", ["wc_satCalc", "wc_fcCalc"], _ksatArgs)
+_ksatPTF("MinasnyMcBratney_2000", ["wc_satCalc", "wc_fcCalc"], _ksatArgs)
+_ksatPTF("Brakensiek_1984", ["Sand", "Clay", "wc_satCalc"], _ksatArgs)
+
+# Brooks-Corey PTFs
+_bcPTF("Cosby_1984_SandC_BC", "cm", ["Sand", "Clay"], _bcArgs)
+_bcPTF("Cosby_1984_SSC_BC", "cm", ["Sand", "Silt", "Clay"], _bcArgs)
+_bcPTF("RawlsBrakensiek_1985_BC", "cm", ["Sand", "Clay", "WC_sat"], _bcArgs)
+_bcPTF("CampbellShiozawa_1992_BC", "cm", ["Silt", "Clay", "BD", "WC_sat"], _bcArgs)
+_bcPTF("Saxton_1986_BC", "kPa", ["Sand", "Clay"], _bcArgs)
+_bcPTF("SaxtonRawls_2006_BC", "kPa", ["Sand", "Clay", "carbon", "LUCIname"], _bcCarbArgs, carbonType="OM")
+
+def getPTF(PTFOption):
+
+    # Returns the (shared, immutable) registry record of the PTF
+    record = _registry.get(PTFOption)
+
+    if record is None:
+        for prefix, option in _prefixOptions:
+            if str(PTFOption).startswith(prefix):
+                record = _registry[option]
+                break
+
+    if record is None:
+        log.error("PTF option not recognised: " + str(PTFOption))
+        sys.exit()
+
+    return record
+
+def getOptions(PTFType):
+
+    # Returns the PTF options of one type, in the order they are registered above
+    return [PTFOption for PTFOption in _order if _registry[PTFOption].PTFType == PTFType]
+
 def checkPTF(PTFOption):
 
-    class PTF:
-        def __init__(self, PTFType, PTFPressures, PTFUnit, PTFFields=None):
-            self.PTFType = PTFType
-            self.PTFPressures = PTFPressures
-            self.PTFUnit = PTFUnit
-            self.PTFFields = PTFFields
-
-    if PTFOption == "Nguyen_2014":
-        PTFType = "pointPTF"
-        PTFPressures = [1, 3, 6, 10, 20, 33, 100, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Adhikary_2008":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 100, 300, 500, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Rawls_1982":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 20, 33, 50, 100, 200, 400, 700, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Hall_1977_top":
-        PTFType = "pointPTF"
-        PTFPressures = [5, 10, 33, 200, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Hall_1977_sub":
-        PTFType = "pointPTF"
-        PTFPressures = [5, 10, 33, 200, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "GuptaLarson_1979":
-        PTFType = "pointPTF"
-        PTFPressures = [4, 7, 10, 20, 33, 60, 100, 200, 400, 700, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Batjes_1996":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 1, 3, 5, 10, 20, 33, 50, 250, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "SaxtonRawls_2006":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Pidgeon_1972":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif str(PTFOption[0:8]) == "Lal_1978":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "AinaPeriaswamy_1985":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "ManriqueJones_1991":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "vanDenBerg_1997":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "TomasellaHodnett_1998":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 1, 3, 6, 10, 33, 100, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Reichert_2009_OM":
-        PTFType = "pointPTF"
-        PTFPressures = [6, 10, 33, 100, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Reichert_2009":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Botula_2013":
-        PTFType = "pointPTF"
-        PTFPressures = [1, 3, 6, 10, 20, 33, 100, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "ShwethaVarija_2013":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 100, 300, 500, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Dashtaki_2010_point":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 30, 100, 300, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Santra_2018_OC":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Santra_2018":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif str(PTFOption[0:11]) == "Wosten_1999":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Wosten et al. (1999)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Vereecken_1989":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Vereecken et al. (1989)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "ZachariasWessolek_2007":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "kPa" # original units of Zacharias and Wessolek (2007)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Weynants_2009":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Weynants et al. (2009)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Dashtaki_2010_vg":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Dashtaki et al. (2010)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "HodnettTomasella_2002":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "kPa" # original units of Hodnett and Tomasella (2002)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Cosby_1984":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Puckett_1985":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Jabro_1992":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "CampbellShiozawa_1994":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "FerrerJulia_2004_1":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "FerrerJulia_2004_2":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Ahuja_1989":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "MinasnyMcBratney_2000":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Brakensiek_1984":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Cosby_1984_SandC_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "Cosby_1984_SSC_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "RawlsBrakensiek_1985_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "CampbellShiozawa_1992_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "Saxton_1986_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "kPa"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "SaxtonRawls_2006_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "kPa"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
+    # Returns the metadata of the PTF as lists, which callers are free to modify
+    record = getPTF(PTFOption)
 
+    if isinstance(record.PTFPressures, tuple):
+        PTFPressures = list(record.PTFPressures)
     else:
-        log.error("PTF option not recognised: " + str(PTFOption))
+        PTFPressures = record.PTFPressures
+
+    return PTF(record.PTFType, PTFPressures, record.PTFUnit, list(record.PTFFields))
+
+def getRequiredFields(PTFOption, carbContent=None):
+
+    '''
+    Returns the input columns read by the PTF, so that only these are read from the shapefile.
+    carbContent is 'OC' or 'OM' and replaces the carbon placeholder.
+    '''
+
+    fields = []
+
+    for field in getPTF(PTFOption).inputFields:
+        if field == "carbon":
+            if carbContent is None:
+                continue
+            field = carbContent
+
+        fields.append(field)
+
+    return fields
+
+def getCarbonFactor(PTFOption, carbContent, carbonConFactor):
+
+    # Factor applied to the carbon content read, 1.0 if it is already the type used by the PTF
+    if carbContent == getPTF(PTFOption).carbonType:
+        return 1.0
+
+    return float(carbonConFactor)
+
+def getFunction(PTFOption):
+
+    # The PTF modules import this module, so their functions are resolved when first needed
+    record = getPTF(PTFOption)
+    module = importlib.import_module("LUCI_PTFs.lib." + record.module)
+
+    return getattr(module, record.function)
+
+def runPTF(PTFOption, **kwargs):
+
+    '''
+    Calls the function of the PTF, passing the keyword arguments it takes (in order).
+    PTFOption itself is passed to the functions that need it.
+    '''
+
+    record = getPTF(PTFOption)
+    kwargs["PTFOption"] = PTFOption
+
+    args = []
+    for arg in record.args:
+        if arg not in kwargs:
+            log.error("Argument " + str(arg) + " missing for PTF option " + str(PTFOption))
+            sys.exit()
+
+        args.append(kwargs[arg])
 
-    return PTF(PTFType, PTFPressures, PTFUnit, PTFFields)
+    return getFunction(PTFOption)(*args)
@@ -5,442 +5,303 @@ bc_PTFs: contains all the PTF functions for calculating BC parameters
 import sys
 import os
 import configuration
-import arcpy
+import numpy as np
 import math
+from collections import namedtuple
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.data_access as data_access
+import LUCI_PTFs.lib.dedup as dedup
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs])
+refresh_modules([log, common, checks_PTFs, PTFdatabase, data_access, dedup])
 
-def Cosby_1984_SandC_BC(outputShp, PTFOption):
-    
-    log.info("Calculating Brooks-Corey using Cosby et al. (1984) - Sand and Clay")
+# BC parameters of all records
+# validMask is False where the parameters could not be calculated, lambda_BC and hb_BC are -9999 there
+# K_sat (mm/hr) is only calculated by Saxton and Rawls (2006), None otherwise
+BCParams = namedtuple('BCParams', ['WC_res', 'WC_sat', 'lambda_BC', 'hb_BC', 'validMask', 'K_sat'])
 
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    WC_satArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
+###################################
+### BC PTFs on the input arrays ###
+###################################
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+# Each function takes the input columns as arrays and returns WC_res, WC_sat, lambda_BC,
+# hb_BC (kPa), a mask of the records the PTF is valid for and K_sat (or None)
+# Inputs: sand, silt, clay (%), carbon (OM, %), BD (g/cm3), WC_sat (m3/m3)
 
-    reqFields = [OIDField, "Sand", "Clay"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+def _Cosby_1984_SandC_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-    record = []
-    sandPerc = []
-    clayPerc = []
+    WC_res = np.zeros(len(sand))
+    WC_sat = 0.489 - (0.00126 * sand)
+    lambda_BC = 1.0 / (2.91 + (0.159 * clay))
 
-    # Required: sand and clay
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate values
-        WC_res = 0
-        WC_sat = 0.489 - (0.00126 * sandPerc[x])
-        lambda_BC = 1.0 / (2.91 + (0.159 * clayPerc[x]))
-
-        # Originally in cm
-        hb_cm = 10.0 ** (1.88 - (0.013 * sandPerc[x]))
-        hb_BC = hb_cm / 10.0 # Convert to kPa
-
-        outValues = [WC_res, WC_sat]
-        checks_PTFs.checkNegOutput(outValues, x)
-
-        # Append to arrays
-        WC_resArray.append(WC_res)
-        WC_satArray.append(WC_sat)
-        lambda_BCArray.append(lambda_BC)
-        hb_BCArray.append(hb_BC)
-
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+    # Originally in cm
+    hb_cm = 10.0 ** (1.88 - (0.013 * sand))
+    hb_BC = hb_cm / 10.0 # Convert to kPa
 
-def Cosby_1984_SSC_BC(outputShp, PTFOption):
+    return WC_res, WC_sat, lambda_BC, hb_BC, None, None
 
-    log.info("Calculating Brooks-Corey using Cosby et al. (1984) - Sand, Silt and Clay")
-
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    WC_satArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Sand", "Silt", "Clay"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkSSC(sandPerc[x], siltPerc[x], clayPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate values
-        WC_res = 0
-        WC_sat = (50.5 - (0.037 * clayPerc[x]) - (0.142 * sandPerc[x])) / 100.0
-        lambda_BC = 1.0 / (3.10 + (0.157 * clayPerc[x]) - (0.003 * sandPerc[x]))
-        
-        # Originally in cm
-        hb_cm = 10.0 ** (1.54 - (0.0095 * sandPerc[x]) + (0.0063 * siltPerc[x]))
-        hb_BC = hb_cm / 10.0 # Convert to kPa
-
-        outValues = [WC_res, WC_sat]
-        checks_PTFs.checkNegOutput(outValues, x)
-
-        # Append to arrays
-        WC_resArray.append(WC_res)
-        WC_satArray.append(WC_sat)
-        lambda_BCArray.append(lambda_BC)
-        hb_BCArray.append(hb_BC)
-
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+def _Cosby_1984_SSC_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-def RawlsBrakensiek_1985_BC(outputShp, PTFOption):
+    WC_res = np.zeros(len(sand))
+    WC_sat = (50.5 - (0.037 * clay) - (0.142 * sand)) / 100.0
+    lambda_BC = 1.0 / (3.10 + (0.157 * clay) - (0.003 * sand))
 
-    log.info("Calculating Brooks-Corey using Rawls and Brakensiek (1985)")
+    # Originally in cm
+    hb_cm = 10.0 ** (1.54 - (0.0095 * sand) + (0.0063 * silt))
+    hb_BC = hb_cm / 10.0 # Convert to kPa
 
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
+    return WC_res, WC_sat, lambda_BC, hb_BC, None, None
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def _RawlsBrakensiek_1985_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-    reqFields = [OIDField, "Sand", "Clay", "WC_sat"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    sandSq = sand ** 2
+    claySq = clay ** 2
+    WC_satSq = WC_sat ** 2
 
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    WC_satArray = []
+    WC_res = -0.0182482 + (0.00087269 * sand) + (0.00513488 * clay) + (0.02939286 * WC_sat) - (0.00015395 * claySq) - (0.0010827 * sand * WC_sat) - (0.00018233 * claySq * WC_satSq) + (0.00030703 * claySq * WC_sat) - (0.0023584 * WC_satSq * clay)
 
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]                    
-            clay = row[2]
-            WCsat = row[3]
+    # Originally in cm
+    hb_cm = np.exp(5.3396738 + (0.1845038 * clay) - (2.48394546 * WC_sat) - (0.00213853 * claySq) - (0.04356349 * sand * WC_sat) - (0.61745089 * clay * WC_sat) + (0.00143598 * sandSq * WC_satSq) - (0.00855375 * claySq * WC_satSq) - (0.00001282 * sandSq * clay) + (0.00895359 * claySq * WC_sat) - (0.00072472 * sandSq * WC_sat) + (0.0000054 * claySq * sand) + (0.50028060 * WC_satSq * clay))
+    hb_BC = hb_cm / 10.0 # Convert to kPa
 
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            WC_satArray.append(WCsat)
+    lambda_BC = np.exp(-0.7842831 + (0.0177544 * sand) - (1.062498 * WC_sat) - (0.00005304 * sandSq) - (0.00273493 * claySq) + (1.11134946 * WC_satSq) - (0.03088295 * sand * WC_sat) + (0.00026587 * sandSq * WC_satSq) - (0.00610522 * claySq * WC_satSq) - (0.00000235 * sandSq * clay) + (0.00798746 * claySq * WC_sat) - (0.00674491 * WC_satSq * clay))
 
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Input saturation", WC_satArray[x], record[x])
-        warningArray.append(warningFlag)
+    return WC_res, WC_sat, lambda_BC, hb_BC, None, None
 
-        # Calculate values
-        WC_residual = -0.0182482 + (0.00087269 * sandPerc[x]) + (0.00513488 * clayPerc[x]) + (0.02939286 * WC_satArray[x]) - (0.00015395 * clayPerc[x]**2) - (0.0010827 * sandPerc[x] * WC_satArray[x]) - (0.00018233 * clayPerc[x]**2 * WC_satArray[x]**2) + (0.00030703 * clayPerc[x]**2 * WC_satArray[x]) - (0.0023584 * WC_satArray[x]**2 * clayPerc[x])
-        
-        # Originally in cm
-        hb_cm = math.exp(5.3396738 + (0.1845038 * clayPerc[x]) - (2.48394546 * WC_satArray[x]) - (0.00213853 * clayPerc[x]**2) - (0.04356349 * sandPerc[x] * WC_satArray[x]) - (0.61745089 * clayPerc[x] * WC_satArray[x]) + (0.00143598 * sandPerc[x]**2 * WC_satArray[x]**2) - (0.00855375 * clayPerc[x]**2 * WC_satArray[x]**2) - (0.00001282 * sandPerc[x]**2 * clayPerc[x]) + (0.00895359 * clayPerc[x]**2 * WC_satArray[x]) - (0.00072472 * sandPerc[x]**2 * WC_satArray[x]) + (0.0000054 * clayPerc[x]**2 * sandPerc[x]) + (0.50028060 * WC_satArray[x]**2 * clayPerc[x]))
-        hb_BC = hb_cm / 10.0 # Convert to kPa
+def _CampbellShiozawa_1992_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-        lambda_BC = math.exp(-0.7842831 + (0.0177544 * sandPerc[x]) - (1.062498 * WC_satArray[x]) - (0.00005304 * sandPerc[x]**2) - (0.00273493 * clayPerc[x]**2) + (1.11134946 * WC_satArray[x]**2) - (0.03088295 * sandPerc[x] * WC_satArray[x])  + (0.00026587 * sandPerc[x]**2 * WC_satArray[x]**2)  - (0.00610522 * clayPerc[x]**2 * WC_satArray[x]**2) - (0.00000235 * sandPerc[x]**2 * clayPerc[x]) + (0.00798746 * clayPerc[x]**2 * WC_satArray[x]) - (0.00674491 * WC_satArray[x]**2 * clayPerc[x]))
+    WC_res = np.zeros(len(silt))
 
-        checks_PTFs.checkNegOutput([WC_residual], x)
+    dg_CS = np.exp(-0.8 - (0.0317 * silt) - (0.0761 * clay))
+    Sg_CS = (np.exp((0.133 * silt) + (0.477 * clay) - ((np.log(dg_CS))**2)))**0.5
+    hes_CS = 0.05 / np.sqrt(dg_CS)
+    b_CS = (-20.0 * (-hes_CS)) + (0.2 * Sg_CS)
 
-        WC_resArray.append(WC_residual)
-        hb_BCArray.append(hb_BC)
-        lambda_BCArray.append(lambda_BC)
+    # Originally in cm
+    hb_cm = 100.0 * (hes_CS * ((BD / 1.3) ** (0.67 * b_CS)))
+    hb_BC = hb_cm / 10.0 # Convert to kPa
 
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+    lambda_BC = 1.0 / b_CS
 
-def CampbellShiozawa_1992_BC(outputShp, PTFOption):
+    return WC_res, WC_sat, lambda_BC, hb_BC, None, None
 
-    log.info("Calculating Brooks-Corey using Campbell and Shiozawa (1992)")
-
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Silt", "Clay", "BD", "WC_sat"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-    WC_satArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            BD = row[3]
-            WCsat = row[4]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-            WC_satArray.append(WCsat)
-
-    dg_CSArray = []
-    Sg_CSArray = []
-    hes_CSArray = []
-    b_CSArray = []
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Silt", siltPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Input saturation", WC_satArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate values
-        WC_residual = 0
-        dg_CS = math.exp(-0.8 - (0.0317 * siltPerc[x]) - (0.0761 * clayPerc[x]))
-        Sg_CS = (math.exp((0.133 * siltPerc[x]) + (0.477 * clayPerc[x]) - ((math.log(dg_CS))**2)))**0.5
-        hes_CS = 0.05/float((math.sqrt(dg_CS)))
-        b_CS = (-20.0 * (-hes_CS)) + (0.2 * Sg_CS)
-        
-        # Originally in cm
-        hb_cm = 100.0 * (hes_CS * ((BDg_cm3[x] / 1.3) ** (0.67* b_CS)))
-        hb_BC = hb_cm / 10.0 # Convert to kPa
-
-        lambda_BC = 1.0 /float(b_CS)
-
-        checks_PTFs.checkNegOutput([WC_residual], x)
-
-        WC_resArray.append(WC_residual)
-        dg_CSArray.append(dg_CS)
-        Sg_CSArray.append(Sg_CS)
-        hes_CSArray.append(hes_CS)
-        b_CSArray.append(b_CS)
-        hb_BCArray.append(hb_BC)
-        lambda_BCArray.append(lambda_BC)
-
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+def _Saxton_1986_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-def Saxton_1986_BC(outputShp, PTFOption):
+    sandSq = sand ** 2
 
-    log.info("Calculating Brooks-Corey using Saxton et al. (1986)")
-
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    WC_satArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Sand", "Clay"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-
-            record.append(objectID)
-            sandPerc.append(sand)                    
-            clayPerc.append(clay)
-
-    A_Array = []
-    B_Array = []
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate values
-        # WC_0kPa = WC_sat
-        WC_sat = 0.332 - (7.251 * 10**(-4) * sandPerc[x]) + (0.1276 * math.log(clayPerc[x], 10.0))
-        WC_residual = 0
-        A_Saxton = 100 * math.exp(-4.396 - (0.0715 * clayPerc[x])- (0.000488 * sandPerc[x]**2) - (0.00004285 * sandPerc[x]**2 * clayPerc[x])) 
-        B_Saxton = -3.140 - (0.00222 * clayPerc[x]**2) - (0.00003484 * sandPerc[x]**2 * clayPerc[x])
-        hb_BC = A_Saxton * (WC_sat** B_Saxton)  
-        lambda_BC = -1.0 / float(B_Saxton)
-
-        checks_PTFs.checkNegOutput([WC_sat, WC_residual], x)
-
-        WC_satArray.append(WC_sat)
-        WC_resArray.append(WC_residual)
-        A_Array.append(A_Saxton)
-        B_Array.append(B_Saxton)
-        hb_BCArray.append(hb_BC)
-        lambda_BCArray.append(lambda_BC)
-
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+    # WC_0kPa = WC_sat
+    WC_sat = 0.332 - (7.251 * 10**(-4) * sand) + (0.1276 * np.log10(clay))
+    WC_res = np.zeros(len(sand))
+    A_Saxton = 100 * np.exp(-4.396 - (0.0715 * clay) - (0.000488 * sandSq) - (0.00004285 * sandSq * clay))
+    B_Saxton = -3.140 - (0.00222 * clay**2) - (0.00003484 * sandSq * clay)
+    hb_BC = A_Saxton * (WC_sat ** B_Saxton)
+    lambda_BC = -1.0 / B_Saxton
 
-def SaxtonRawls_2006_BC(outputShp, PTFOption, carbonConFactor, carbContent):
+    return WC_res, WC_sat, lambda_BC, hb_BC, None, None
 
-    log.info("Calculating Brooks-Corey using Saxton and Rawls (2006)")
+def _SaxtonRawls_2006_BC(sand, silt, clay, carbon, BD, WC_sat):
 
-    # Arrays to output
-    warningArray = []
-    WC_resArray = []
-    WC_satArray = []
-    lambda_BCArray = []
-    hb_BCArray = []
-    K_satArray = []
+    sandCarb = sand * carbon
+    clayCarb = clay * carbon
+    sandClay = sand * clay
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    WC_res = np.zeros(len(sand))
 
-    # Requirements: sand, clay, and OM
-    if carbContent == 'OC':
-        reqFields = [OIDField, "Sand", "Clay", "OC", "LUCIname"]
-
-    elif carbContent == 'OM':
-        reqFields = [OIDField, "Sand", "Clay", "OM", "LUCIname"]
-        carbonConFactor = 1.0
-    
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    name = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            recName = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            name.append(recName)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Carbon", carbPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate values
-        WC_residual = 0
-
-        WC_33tkPa = (-0.00251 * sandPerc[x]) + (0.00195 * clayPerc[x]) + (0.00011 * carbPerc[x]*float(carbonConFactor)) + (0.0000006 * sandPerc[x] * carbPerc[x]*float(carbonConFactor)) - (0.0000027 * clayPerc[x] * carbPerc[x]*float(carbonConFactor)) + (0.0000452 * sandPerc[x] * clayPerc[x]) + 0.299
-        WC_33kPa = (1.283 * (WC_33tkPa)**(2)) + (0.626 * (WC_33tkPa)) - 0.015
-        WC_sat_33tkPa = (0.00278 * sandPerc[x]) + (0.00034 * clayPerc[x]) + (0.00022 * carbPerc[x]*float(carbonConFactor)) - (0.0000018 * sandPerc[x] * carbPerc[x]*float(carbonConFactor)) - (0.0000027 * clayPerc[x] * carbPerc[x]*float(carbonConFactor)) - (0.0000584 * sandPerc[x] * clayPerc[x]) + 0.078
-        WC_sat_33kPa = 1.636 * WC_sat_33tkPa - 0.107
-        
-        ## WC_0kPa is now WC_sat
-        WC_sat = WC_33kPa + WC_sat_33kPa - (0.00097 * sandPerc[x]) + 0.043                    
-        
-        WC_1500tkPa = (-0.00024 * sandPerc[x]) + (0.00487 * clayPerc[x]) + (0.00006 * carbPerc[x]*float(carbonConFactor)) + (0.0000005 * sandPerc[x] * carbPerc[x]*float(carbonConFactor)) - (0.0000013 * clayPerc[x] * carbPerc[x]*float(carbonConFactor)) + (0.0000068 * sandPerc[x] * clayPerc[x]) + 0.031
-        WC_1500kPa = 1.14 * WC_1500tkPa - 0.02
-
-        # Need checks on WC_33kPa and WC_1500kPa
-
-        wcError = False
-
-        if WC_33kPa < 0.0:
-            log.warning('WARNING: water content at 33kPa is negative for ' + str(name[x]))
-            log.warning('WARNING: Cannot calculate lambda, setting it to -9999 for error catching')
-            wcError = True
-
-        if WC_1500kPa < 0.0:
-            log.warning('WARNING: Water content at 1500kPa is negative for ' + str(name[x]))
-            log.warning('WARNING: Cannot calculate lambda, setting it to -9999 for error catching')
-            wcError = True
-
-        if wcError == True:
-            lambda_BC = -9999
-            hb_BC = -9999
+    WC_33tkPa = (-0.00251 * sand) + (0.00195 * clay) + (0.00011 * carbon) + (0.0000006 * sandCarb) - (0.0000027 * clayCarb) + (0.0000452 * sandClay) + 0.299
+    WC_33kPa = (1.283 * (WC_33tkPa)**(2)) + (0.626 * (WC_33tkPa)) - 0.015
+    WC_sat_33tkPa = (0.00278 * sand) + (0.00034 * clay) + (0.00022 * carbon) - (0.0000018 * sandCarb) - (0.0000027 * clayCarb) - (0.0000584 * sandClay) + 0.078
+    WC_sat_33kPa = 1.636 * WC_sat_33tkPa - 0.107
 
-        else:
+    ## WC_0kPa is now WC_sat
+    WC_sat = WC_33kPa + WC_sat_33kPa - (0.00097 * sand) + 0.043
+
+    WC_1500tkPa = (-0.00024 * sand) + (0.00487 * clay) + (0.00006 * carbon) + (0.0000005 * sandCarb) - (0.0000013 * clayCarb) + (0.0000068 * sandClay) + 0.031
+    WC_1500kPa = 1.14 * WC_1500tkPa - 0.02
+
+    # Lambda cannot be calculated if WC_33kPa or WC_1500kPa is negative
+    validMask = ~((WC_33kPa < 0.0) | (WC_1500kPa < 0.0))
+
+    B_SR = (math.log(1500.0) - math.log(33.0)) / (np.log(WC_33kPa) - np.log(WC_1500kPa))
+    lambda_BC = 1.0 / B_SR
+    hbt_BC = - (0.2167 * sand) - (0.2793 * clay) - (81.97 * WC_sat_33kPa) + (0.7112 * sand * WC_sat_33kPa) + (0.0829 * clay * WC_sat_33kPa) + (0.001405 * sandClay) + 27.16
+    hb_BC = hbt_BC + (0.02 * hbt_BC ** 2) - (0.113 * hbt_BC) - 0.7
+
+    K_sat = 1930.0 * ((WC_sat - WC_33kPa)**(3 - lambda_BC))
+
+    return WC_res, WC_sat, lambda_BC, hb_BC, validMask, K_sat
+
+# description: for the log, function: array function above,
+# checks: inputs checked by checks_PTFs.validateInputs,
+# negOutputs: outputs checked for negative water contents
+BCPTF = namedtuple('BCPTF', ['description', 'function', 'checks', 'negOutputs'])
+
+_bcPTFs = {
+    "Cosby_1984_SandC_BC": BCPTF("Cosby et al. (1984) - Sand and Clay", _Cosby_1984_SandC_BC,
+                                 ["clay", "sand"], ["WC_res", "WC_sat"]),
+    "Cosby_1984_SSC_BC": BCPTF("Cosby et al. (1984) - Sand, Silt and Clay", _Cosby_1984_SSC_BC,
+                               ["SSC"], ["WC_res", "WC_sat"]),
+    "RawlsBrakensiek_1985_BC": BCPTF("Rawls and Brakensiek (1985)", _RawlsBrakensiek_1985_BC,
+                                     ["clay", "sand", "WC_sat"], ["WC_res"]),
+    "CampbellShiozawa_1992_BC": BCPTF("Campbell and Shiozawa (1992)", _CampbellShiozawa_1992_BC,
+                                      ["clay", "silt", "BD", "WC_sat"], []),
+    "Saxton_1986_BC": BCPTF("Saxton et al. (1986)", _Saxton_1986_BC,
+                            ["clay", "sand"], ["WC_sat", "WC_res"]),
+    "SaxtonRawls_2006_BC": BCPTF("Saxton and Rawls (2006)", _SaxtonRawls_2006_BC,
+                                 ["clay", "sand", "carbon"], [])
+}
+
+# Shapefile field of each input (the carbon field is OC or OM)
+_inputNames = {"Sand": "sand", "Silt": "silt", "Clay": "clay", "BD": "BD", "WC_sat": "WC_sat"}
+
+def calcBCArray(PTFOption, sand=None, silt=None, clay=None, carbon=None, BD=None, WC_sat=None, carbonConFactor=1.0):
+
+    '''
+    Calculates the BC parameters of all records with the BC PTF, once per distinct soil (see dedup).
+    carbon is multiplied by carbonConFactor to give OM.
+
+    Returns BCParams. Records whose parameters cannot be calculated (e.g. negative
+    water contents for Saxton and Rawls, or non-finite lambda or hb) are False in
+    validMask and get -9999 for lambda_BC, hb_BC and K_sat.
+    '''
+
+    def asArray(values):
+        if values is None:
+            return None
+        return np.asarray(values, dtype=np.float64)
+
+    if carbon is not None:
+        carbon = asArray(carbon) * float(carbonConFactor)
+
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        WC_res, WC_sat, lambda_BC, hb_BC, validMask, K_sat = dedup.calcUnique(_bcPTFs[PTFOption].function,
+                                                                              [sand, silt, clay, carbon, BD, WC_sat])
+
+    finite = np.isfinite(lambda_BC) & np.isfinite(hb_BC)
+
+    if validMask is None:
+        validMask = finite
+    else:
+        validMask = validMask & finite
+
+    lambda_BC = np.where(validMask, lambda_BC, -9999.0)
+    hb_BC = np.where(validMask, hb_BC, -9999.0)
+
+    if K_sat is not None:
+        K_sat = np.where(validMask, K_sat, -9999.0)
+
+    return BCParams(WC_res, WC_sat, lambda_BC, hb_BC, validMask, K_sat)
+
+def getLayerFields(PTFOption, outputShp, carbContent=None):
+
+    # Fields read by calcBCLayer: the OID field, the inputs of the BC PTF and LUCIname
+    inputFields = [field for field in PTFdatabase.getRequiredFields(PTFOption, carbContent) if field != "LUCIname"]
+
+    return [common.getOIDField(outputShp)] + inputFields + ["LUCIname"]
+
+def calcBCLayer(PTFOption, outputShp, carbContent=None, carbonConFactor=1.0, inputTable=None):
+
+    '''
+    Reads the inputs of the BC PTF from the shapefile in one pass and calculates the
+    BC parameters for the whole layer. If inputTable (a chunk of data_access.streamTable)
+    is given, it is used instead of the shapefile.
+
+    Returns the warning and warnFlags of each record (see checks_PTFs.validateInputs)
+    and BCParams. Invalid records are reported in one warning. The K_sat of Saxton and Rawls (2006) is written to the shapefile.
+    '''
 
-            B_SR = (math.log(1500.0) - math.log(33.0)) / (math.log(WC_33kPa) - math.log(WC_1500kPa))
-            lambda_BC = 1.0 / float(B_SR)
-            hbt_BC = - (0.2167 * sandPerc[x]) - (0.2793 * clayPerc[x])  -  (81.97 * WC_sat_33kPa) + (0.7112 * sandPerc[x] * WC_sat_33kPa)  + (0.0829 * clayPerc[x]  * WC_sat_33kPa) + (0.001405 * sandPerc[x] * clayPerc[x])   + 27.16
-            hb_BC = hbt_BC + (0.02 * hbt_BC  ** 2)  - (0.113 * hbt_BC) - 0.7
+    bcPTF = _bcPTFs[PTFOption]
 
-        # If there is a valid lambda value
-        if lambda_BC != -9999:
-            K_sat = 1930.0 * ((WC_sat - WC_33kPa)**(3 - lambda_BC)) 
+    log.info("Calculating Brooks-Corey using " + bcPTF.description)
+
+    reqFields = getLayerFields(PTFOption, outputShp, carbContent)
+    OIDField = reqFields[0]
+    inputFields = reqFields[1:-1]
+
+    # Retrieve info from input (the fields of a chunk were checked before the stream)
+    # Missing values are NaN in the columns of inputTable
+    if inputTable is None:
+        checks_PTFs.checkInputFields(reqFields, outputShp)
+        inputTable = data_access.readTable(outputShp, reqFields)
+
+    record = inputTable[OIDField].tolist()
+    nameArray = inputTable["LUCIname"].tolist()
+
+    columns = {}
+    for field in inputFields:
+        if field == carbContent:
+            columns["carbon"] = inputTable[field]
         else:
-            # If not valid, set K_sat to -9999
-            K_sat = -9999
+            columns[_inputNames[field]] = inputTable[field]
+
+    # Data checks
+    warningArray, warnFlags = checks_PTFs.checkInputs(bcPTF.checks, record, **columns)
+
+    if "carbon" in columns:
+        carbonConFactor = PTFdatabase.getCarbonFactor(PTFOption, carbContent, carbonConFactor)
+
+    bcParams = calcBCArray(PTFOption, carbonConFactor=carbonConFactor, **columns)
+
+    checks_PTFs.checkNegOutputArray([getattr(bcParams, output) for output in bcPTF.negOutputs], record)
+
+    invalid = np.flatnonzero(~bcParams.validMask)
 
-        WC_resArray.append(WC_residual)
-        WC_satArray.append(WC_sat)
-        lambda_BCArray.append(lambda_BC)
-        hb_BCArray.append(hb_BC)
-        K_satArray.append(K_sat)
+    if len(invalid) > 0:
+        examples = ', '.join(str(nameArray[i]) for i in invalid[:5])
+
+        if len(invalid) > 5:
+            examples += ', ...'
+
+        log.warning('WARNING: Cannot calculate lambda for ' + str(len(invalid)) + ' soil(s), setting lambda and hb to -9999 for error catching, e.g. ' + examples)
 
     # Write K_sat to the output shapefile
-    arcpy.AddField_management(outputShp, "K_sat", "DOUBLE", 10, 6)
+    if bcParams.K_sat is not None:
+        data_access.addField(outputShp, "K_sat", "DOUBLE", 10, 6)
+        data_access.writeColumns(outputShp, "K_sat", bcParams.K_sat)
+
+    return warningArray, warnFlags, bcParams
+
+def _runLayer(PTFOption, outputShp, carbContent=None, carbonConFactor=1.0):
+
+    # Returns the warning, WC_res, WC_sat, lambda_BC and hb_BC lists of the BC PTF functions below
+    warningArray, warnFlags, bcParams = calcBCLayer(PTFOption, outputShp, carbContent, carbonConFactor)
+
+    return (warningArray, bcParams.WC_res.tolist(), bcParams.WC_sat.tolist(),
+            bcParams.lambda_BC.tolist(), bcParams.hb_BC.tolist())
+
+#######################################
+### BC PTFs on the output shapefile ###
+#######################################
+
+def Cosby_1984_SandC_BC(outputShp, PTFOption):
+
+    # Required: sand and clay
+    return _runLayer("Cosby_1984_SandC_BC", outputShp)
+
+def Cosby_1984_SSC_BC(outputShp, PTFOption):
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, "K_sat") as cursor:
-        for row in cursor:
-            row[0] = K_satArray[recordNum]
+    # Required: sand, silt and clay
+    return _runLayer("Cosby_1984_SSC_BC", outputShp)
 
-            cursor.updateRow(row)
-            recordNum += 1
+def RawlsBrakensiek_1985_BC(outputShp, PTFOption):
+
+    # Required: sand, clay and WC_sat
+    return _runLayer("RawlsBrakensiek_1985_BC", outputShp)
+
+def CampbellShiozawa_1992_BC(outputShp, PTFOption):
 
-    return warningArray, WC_resArray, WC_satArray, lambda_BCArray, hb_BCArray
+    # Required: silt, clay, BD and WC_sat
+    return _runLayer("CampbellShiozawa_1992_BC", outputShp)
+
+def Saxton_1986_BC(outputShp, PTFOption):
+
+    # Required: sand and clay
+    return _runLayer("Saxton_1986_BC", outputShp)
+
+def SaxtonRawls_2006_BC(outputShp, PTFOption, carbonConFactor, carbContent):
+
+    # Requirements: sand, clay, and OM
+    return _runLayer("SaxtonRawls_2006_BC", outputShp, carbContent, carbonConFactor)
@@ -1,76 +1,113 @@
-import arcpy
 import os
 import sys
 import csv
+import numpy as np
 
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
+import LUCI_PTFs.lib.curve_cache as curve_cache
+import LUCI_PTFs.lib.dedup as dedup
+import LUCI_PTFs.lib.kernels as kernels
+import LUCI_PTFs.lib.data_access as data_access
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, curve_cache, dedup, kernels, data_access])
 
 def calcBrooksCoreyFXN(pressure, hb_BC, theta_r, theta_s, lambda_BC):
 
-    # log.info('DEBUG: pressure: ' + str(pressure))
-    # log.info('DEBUG: hb_BC: ' + str(hb_BC))
-    # log.info('DEBUG: theta_r: ' + str(theta_r))
-    # log.info('DEBUG: theta_s: ' + str(theta_s))
-    # log.info('DEBUG: lambda_BC: ' + str(lambda_BC))
+    # Calculate the WC @ pressure using Brooks-Corey for a single soil
+    # Returns a list with one water content per pressure
 
-    bcArray = []
+    bcArray = calcBrooksCoreyArray(pressure, [hb_BC], [theta_r], [theta_s], [lambda_BC])
 
-    for i in range(0, len(pressure)):
+    return bcArray[0].tolist()
 
-        pressureVal = pressure[i]
+def calcBrooksCoreyArray(pressures, hb_BCArray, WC_resArray, WC_satArray, lambda_BCArray):
 
-        # Calculate the WC @ pressure using Brooks-Corey
-        if pressure[i] < hb_BC:
-            # if pressure is less than to hb_BC
-            bc_WC = theta_s
-            bcArray.append(bc_WC)
+    # Batched Brooks-Corey evaluation over records (N) and pressures (P)
+    # Below the air-entry pressure (hb_BC) the soil is saturated
+    # Above it: theta_r + (theta_s - theta_r) * (hb_BC / pressure) ** lambda_BC
+    # Records with the invalid lambda sentinel (-9999) are returned as -9999
+    # Returns an N x P array with one row per record and one column per pressure (kPa)
 
-        else:
-            # if pressure is greater than hb_BC
-            # bc_WC = theta_r + (((theta_s - theta_r) * (hb_BC ** lambda_BC)) / (pressure[i] ** lambda_BC))
-            
-            # if pressure is greater than hb_BC
-            # bc_WC = theta_r + ((theta_s - theta_r) * (hb_BC / float(pressureVal)) ** lambda_BC)
-            # bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / float(pressureVal) ** lambda_BC)
+    # Use the compiled kernel if Numba is installed
+    if kernels.available():
+        return kernels.bcArray(pressures, hb_BCArray, WC_resArray, WC_satArray, lambda_BCArray)
+
+    psi_kPa = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+
+    hb_BC = np.asarray(hb_BCArray, dtype=np.float64).reshape(-1, 1)
+    theta_r = np.asarray(WC_resArray, dtype=np.float64).reshape(-1, 1)
+    theta_s = np.asarray(WC_satArray, dtype=np.float64).reshape(-1, 1)
+    lambda_BC = np.asarray(lambda_BCArray, dtype=np.float64).reshape(-1, 1)
+
+    invalid = (lambda_BC == -9999)
+
+    # The power branch is also evaluated where it is not used, so silence the warnings
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / psi_kPa) ** lambda_BC
+
+    bc_WC = np.where(psi_kPa < hb_BC, theta_s, bc_WC)
+    bc_WC = np.where(invalid, -9999.0, bc_WC)
+
+    return bc_WC
+
+def calcPressureBCArray(targetWC, hb_BCArray, WC_resArray, WC_satArray, lambda_BCArray):
+
+    # Inverse of calcBrooksCoreyArray
+    # Calculates the pressure (kPa) at which each record falls to the target water contents
+    # Uses the closed form h = hb_BC * Se ** (-1 / lambda_BC)
+    # Targets at or above saturation return the air-entry pressure hb_BC
+    # Targets at or below the residual water content cannot be reached and return NaN
+    # Records with the invalid lambda sentinel (-9999) are returned as -9999
+    # Targets are either one vector (T) shared by all records or an N x T array
+    # Returns an N x T array with one row per record and one column per target
+
+    theta = np.asarray(targetWC, dtype=np.float64)
+
+    if theta.ndim < 2:
+        theta = theta.reshape(1, -1)
 
-            bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / float(pressureVal)) ** lambda_BC
+    hb_BC = np.asarray(hb_BCArray, dtype=np.float64).reshape(-1, 1)
+    theta_r = np.asarray(WC_resArray, dtype=np.float64).reshape(-1, 1)
+    theta_s = np.asarray(WC_satArray, dtype=np.float64).reshape(-1, 1)
+    lambda_BC = np.asarray(lambda_BCArray, dtype=np.float64).reshape(-1, 1)
 
-            bcArray.append(bc_WC)
+    invalid = (lambda_BC == -9999)
 
-    return bcArray
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Se = (theta - theta_r) / (theta_s - theta_r)
+        pressure = hb_BC * Se ** (-1.0 / lambda_BC)
 
-def writeBCParams(outputShp, warning, WC_res, WC_sat, lambda_BC, hb_BC):
+    pressure = np.where(Se >= 1.0, hb_BC, pressure)
+    pressure = np.where(Se > 0.0, pressure, np.nan)
+    pressure = np.where(invalid, -9999.0, pressure)
+
+    return pressure
+
+def writeBCParams(outputShp, warning, WC_res, WC_sat, lambda_BC, hb_BC, validMask=None):
 
     # Write BC Params to shapefile
+    # Where validMask is False, lambda_BC and hb_BC are written as -9999
+    if validMask is not None:
+        validMask = np.asarray(validMask, dtype=bool)
+        lambda_BC = np.where(validMask, lambda_BC, -9999.0).tolist()
+        hb_BC = np.where(validMask, hb_BC, -9999.0).tolist()
 
     # Add fields
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-    arcpy.AddField_management(outputShp, "WC_res", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_sat_BC", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "lambda_BC", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "hb_BC", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "warning", "TEXT")
+    data_access.addField(outputShp, "WC_res", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_sat_BC", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "lambda_BC", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "hb_BC", "DOUBLE", 10, 6)
 
     outputFields = ["warning", "WC_res", "WC_sat_BC", "lambda_BC", "hb_BC"]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warning[recordNum]
-            row[1] = WC_res[recordNum]
-            row[2] = WC_sat[recordNum]
-            row[3] = lambda_BC[recordNum]
-            row[4] = hb_BC[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, outputFields, [warning, WC_res, WC_sat, lambda_BC, hb_BC])
 
-def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray, nameArray, fcValue, sicValue, pwpValue):
+def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray, nameArray, fcValue, sicValue, pwpValue, validMask=None):
     # Create Brooks-Corey plots
     import matplotlib.pyplot as plt
     import numpy as np
@@ -81,36 +118,38 @@ def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray
     # Check what axis was chosen
     AxisChoice = common.getInputValue(outputFolder, 'Plot_axis')
 
-    # Check for any soils that we were not able to calculate BC parameters for    
-    errors = []
-    for i in range(0, len(lambdaArray)):
-        if lambdaArray[i] == -9999:
-            log.warning('Invalid lambda found for ' + str(nameArray[i]))
-            errors.append(i)
+    # Soils that we were not able to calculate BC parameters for are not plotted or written to CSV
+    if validMask is None:
+        validMask = np.asarray(lambdaArray, dtype=np.float64) != -9999
+    else:
+        validMask = np.asarray(validMask, dtype=bool)
+
+    # Each distinct soil (name and BC parameters) is plotted and written to the curve CSV once
+    bcParams = [hbArray, WC_resArray, WC_satArray, lambdaArray]
+    soils = [i for i in dedup.uniqueSoils(nameArray, bcParams) if validMask[i]]
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'BC_waterContents')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    nameArray = [nameArray[i] for i in soils]
+    hbArray, WC_resArray, WC_satArray, lambdaArray = [np.asarray(param, dtype=np.float64)[soils] for param in bcParams]
+
+    # Set pressure vector and calculate WC over it for every soil
+    psi_kPa = np.linspace(0.0, 1500.0, 1501)
+    bcCurves = curve_cache.getCurves('BC', calcBrooksCoreyArray, psi_kPa, [hbArray, WC_resArray, WC_satArray, lambdaArray])
+
+    # Write the curves of the valid soils to the curve CSV
+    common.writeCurveCSV(outputFolder, 'BC_waterContents', nameArray, psi_kPa, bcCurves, 'Pressures_kPa', 'WaterContents')
 
     ################################
     ### Plot 0: individual plots ###
     ################################
 
     # Plot 0: pressure on the y-axis and water content on the x-axis
-    for i in [x for x in range(0, len(nameArray)) if x not in errors]:
+    for i in range(0, len(nameArray)):
 
         outName = 'bc_' + str(nameArray[i]) + '.png'
         outPath = os.path.join(outputFolder, outName)
         title = 'Brooks-Corey plot for ' + str(nameArray[i])
 
-        # Set pressure vector
-        psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-        # Calculate WC over that pressure vector
-        bc_WC = calcBrooksCoreyFXN(psi_kPa, hbArray[i], WC_resArray[i], WC_satArray[i], lambdaArray[i])
-        
-        common.writeWCCSV(outFolder, nameArray[i], psi_kPa, bc_WC, 'Pressures_kPa', 'WaterContents')
+        bc_WC = bcCurves[i]
 
         ## Figure out what to do about multipliers
         if PTFUnit == 'kPa':
@@ -179,14 +218,10 @@ def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray
     outPath = os.path.join(outputFolder, 'plotBC_logPressure.png')
     title = 'Brooks-Corey plots of ' + str(len(nameArray)) + ' soils (log scale)'
 
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
+    for i in range(0, len(nameArray)):
 
-    for i in [x for x in range(0, len(nameArray)) if x not in errors]:
+        bc_WC = bcCurves[i]
 
-        # Calculate WC over pressure vector 
-        bc_WC = calcBrooksCoreyFXN(psi_kPa, hbArray[i], WC_resArray[i], WC_satArray[i], lambdaArray[i])
-        
         if PTFUnit == 'kPa':
             pressureUnit = 'kPa'
             psi_plot = psi_kPa
@@ -6,15 +6,18 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
+import csv
+from collections import OrderedDict
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.data_access as data_access
+import LUCI_PTFs.lib.dedup as dedup
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, PTFdatabase])
+refresh_modules([log, common, PTFdatabase, data_access, dedup])
 
 def checkInputFields(inputFields, inputShp):
 
@@ -126,6 +129,221 @@ def checkCarbon(carbon, carbContent, record):
 
     return warningFlag
 
+#########################################
+### Validation of all records at once ###
+#########################################
+
+# Every failed check sets one bit of the warnFlags value of the record, so no check
+# overwrites another. _flagTable is the decode table: (bit, warning, description).
+
+_flagTable = []
+_flagBits = {}
+
+def _flag(code, warningFlag, description):
+
+    bit = 1 << len(_flagTable)
+    _flagTable.append((bit, warningFlag, description))
+    _flagBits[code] = bit
+
+    return bit
+
+# Value checks (negative or over 100), named as in checkValue
+_valueNames = OrderedDict([("sand", "Sand"), ("silt", "Silt"), ("clay", "Clay"), ("BD", "Bulk density"),
+                           ("CEC", "CEC"), ("pH", "pH"), ("WC_sat", "WC at sat"), ("WC_FC", "WC at FC"), ("Ksat", "Ksat")])
+
+for _name, _label in _valueNames.items():
+    _flag(_name + "_neg", _label + ' is negative', _label + ' is negative')
+    _flag(_name + "_over100", _label + ' is over 100', _label + ' is over 100')
+
+# checkCarbon
+_flag("carbon_neg", 'Carbon negative', 'Organic carbon or organic matter content (percentage) is negative')
+_flag("carbon_over100", 'OC or OM over 100', 'Organic carbon or organic matter content (percentage) is higher than 100 percent')
+
+# checkSSC (negative sand, silt and clay use the value flags)
+_flag("SSC_low", 'SSC less than 99', 'Sand, silt, clay sum up to less than 99 percent')
+_flag("SSC_high", 'SSC more than 101', 'Sand, silt, clay sum up to more than 100')
+
+# checkBatjes
+_flag("Batjes_sand", 'Sand less than 5', 'Batjes (1996) requires sand content to be at least 5 percent')
+_flag("Batjes_silt", 'Silt less than 5', 'Batjes (1996) requires silt content to be at least 5 percent')
+_flag("Batjes_clay", 'Clay less than 5', 'Batjes (1996) requires clay content to be at least 5 percent')
+_flag("Batjes_carbon", 'Carbon less than 0.1', 'Batjes (1996) requires carbon content to be at least 0.1 percent')
+
+# PTFs with a log10 carbon term (e.g. Nguyen et al. (2014))
+_flag("carbon_log", 'Carbon not positive', 'Organic carbon or organic matter content must be positive for the log10 carbon term of the PTF')
+
+def getFlagTable():
+    # Returns the decode table of warnFlags: (bit, warning, description)
+    return list(_flagTable)
+
+def validateInputs(checks, **columns):
+
+    '''
+    Runs the checks on all records at once and returns the warnFlags of each record (int32).
+
+    checks is a list of input names (value checks; "carbon" for checkCarbon), "SSC",
+    "Batjes" and "logCarbon". columns holds the input arrays by name: sand, silt, clay, carbon, BD, CEC,
+    pH, WC_sat, WC_FC and Ksat. Missing values (NaN) do not fail any check.
+    '''
+
+    arrays = dict((name, np.asarray(values, dtype=np.float64)) for name, values in columns.items() if values is not None)
+    N = len(next(iter(arrays.values())))
+
+    flags = np.zeros(N, dtype=np.int32)
+
+    def setFlag(code, mask):
+        flags[mask] |= _flagBits[code]
+
+    with np.errstate(invalid='ignore'):
+
+        for check in checks:
+
+            if check == "SSC":
+                for name in ["sand", "silt", "clay"]:
+                    setFlag(name + "_neg", arrays[name] < 0.0)
+
+                SSC = arrays["sand"] + arrays["silt"] + arrays["clay"]
+                setFlag("SSC_low", SSC < 99.0)
+                setFlag("SSC_high", SSC > 101.0)
+
+            elif check == "Batjes":
+                for name in ["sand", "silt", "clay"]:
+                    setFlag("Batjes_" + name, arrays[name] < 5.0)
+
+                setFlag("Batjes_carbon", arrays["carbon"] < 0.1)
+
+            elif check == "logCarbon":
+                setFlag("carbon_log", arrays["carbon"] <= 0.0)
+
+            else:
+                setFlag(check + "_neg", arrays[check] < 0.0)
+                setFlag(check + "_over100", arrays[check] > 100.0)
+
+    return flags
+
+def decodeFlags(flags):
+
+    # Returns the warning of each record, listing every failed check ('' if none)
+    # The warning is built once per distinct combination of flags
+    flags, inverse = np.unique(np.asarray(flags), return_inverse=True)
+    warningArray = np.full(len(flags), '', dtype=object)
+
+    for bit, warningFlag, description in _flagTable:
+        hasFlag = (flags & bit) != 0
+
+        if hasFlag.any():
+            warningArray[hasFlag] = [warningFlag if w == '' else w + '; ' + warningFlag for w in warningArray[hasFlag]]
+
+    return warningArray[inverse.ravel()]
+
+class FlagSummary(object):
+
+    '''
+    Summary of the failed checks over one or more chunks of records: the number of
+    records checked and failing each check, and the first few records (OIDs) of each.
+    '''
+
+    def __init__(self, maxExamples=5):
+        self.maxExamples = maxExamples
+        self.numRecords = 0
+        self.failed = 0
+        self.counts = dict((bit, 0) for bit, warningFlag, description in _flagTable)
+        self.examples = dict((bit, []) for bit, warningFlag, description in _flagTable)
+
+    def add(self, flags, records):
+
+        flags = np.asarray(flags)
+        self.numRecords += len(flags)
+        self.failed += np.count_nonzero(flags)
+
+        for bit, warningFlag, description in _flagTable:
+            index = np.flatnonzero((flags & bit) != 0)
+
+            if len(index) > 0:
+                self.counts[bit] += len(index)
+                self.examples[bit] += [records[i] for i in index[:self.maxExamples - len(self.examples[bit])]]
+
+    def report(self):
+
+        # Logs one summary of the failed checks
+        if self.failed == 0:
+            return
+
+        log.warning('Data checks failed for ' + str(self.failed) + ' of ' + str(self.numRecords) + ' records (see the warning and warnFlags fields)')
+
+        for bit, warningFlag, description in _flagTable:
+            count = self.counts[bit]
+
+            if count > 0:
+                examples = ', '.join(str(record) for record in self.examples[bit])
+
+                if count > self.maxExamples:
+                    examples += ', ...'
+
+                log.warning('  ' + description + ': ' + str(count) + ' record(s), e.g. record ' + examples)
+
+# Summary of the run while the records are checked in chunks (see startSummary)
+_summary = [None]
+
+def startSummary():
+
+    # Collects the failed checks of the following chunks in one summary instead of logging them per chunk
+    _summary[0] = FlagSummary()
+
+def endSummary():
+
+    # Logs the summary of all chunks since startSummary
+    summary = _summary[0]
+    _summary[0] = None
+
+    if summary is not None:
+        summary.report()
+
+def reportFlags(flags, records, maxExamples=5):
+
+    '''
+    Logs one summary of the failed checks: the number of records failing each check
+    and the first few records (OIDs) as examples.
+    '''
+
+    summary = FlagSummary(maxExamples)
+    summary.add(flags, records)
+    summary.report()
+
+def checkInputs(checks, records, **columns):
+
+    # Validates all records, logs the summary (or adds to the summary of the run, see startSummary)
+    # and returns the warnings (list) and warnFlags
+    # Each distinct soil is only checked once (see dedup)
+    names = [name for name in columns if columns[name] is not None]
+    uniqueColumns, inverse = dedup.uniqueRows([columns[name] for name in names])
+    flags = dedup.scatter(validateInputs(checks, **dict(zip(names, uniqueColumns))), inverse)
+
+    if _summary[0] is not None:
+        _summary[0].add(flags, records)
+    else:
+        reportFlags(flags, records)
+
+    return decodeFlags(flags).tolist(), flags
+
+def writeFlags(outputShp, flags):
+
+    # Writes warnFlags to the output shapefile and the decode table next to it
+    data_access.addField(outputShp, "warnFlags", "LONG")
+
+    data_access.writeColumns(outputShp, "warnFlags", flags)
+
+    outCSV = os.path.join(os.path.dirname(outputShp), "warnFlags.csv")
+
+    with open(outCSV, 'wb') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["bit", "warning", "description"])
+
+        for bit, warningFlag, description in _flagTable:
+            writer.writerow([bit, warningFlag, description])
+
+    csv_file.close()
+
 # Checks for Batjes (1996): Sand, silt, clay should not be smaller than 5; OC should not be smaller than 0.1%
 def checkBatjes(sand, silt, clay, carbon, carbContent, record):
     warningFlag = ''
@@ -171,7 +389,7 @@ def pressureFields(outputFolder, inputShp, fieldFC, fieldSIC, fieldPWP):
     PTFPressures = PTFInfo.PTFPressures
 
     # Get OIDField
-    OIDField = arcpy.Describe(inputShp).OIDFieldName
+    OIDField = data_access.getOIDField(inputShp)
 
     fcArray = []
     sicArray = []
@@ -180,29 +398,31 @@ def pressureFields(outputFolder, inputShp, fieldFC, fieldSIC, fieldPWP):
     # Check the field capacity field
     if common.CheckField(inputShp, fieldFC):
 
-        with arcpy.da.SearchCursor(inputShp, [fieldFC, OIDField]) as searchCursor:
-            for row in searchCursor:
-                fc_kPa = row[0]
+        for fc_kPa in data_access.readColumns(inputShp, fieldFC)[0]:
 
-                if PTFType == 'vgPTF':
-                    if fc_kPa < 6 or fc_kPa > 33:
-                        log.warning("Field capacity for soil in row " + str(OIDField) + " should be between 6 to 33 kPa")
+            if PTFType == 'vgPTF':
+                if fc_kPa < 6 or fc_kPa > 33:
+                    log.warning("Field capacity for soil in row " + str(OIDField) + " should be between 6 to 33 kPa")
 
-                    fcArray.append(fc_kPa)
+                fcArray.append(fc_kPa)
 
-                elif PTFType == 'pointPTF':
-                    # Check if this pressure point is inside the array
+            elif PTFType == 'pointPTF':
+                # Pressures between the point-PTF pressures are interpolated
 
-                    if fc_kPa in PTFPressures:
-                        fcArray.append(fc_kPa)
+                if fc_kPa in PTFPressures:
+                    fcArray.append(fc_kPa)
 
-                    else:
-                        log.error("Pressure for field capacity NOT present in point-PTF pressures")
-                        log.error("Cannot calculate water content at this pressure for field capacity")
-                        sys.exit()
+                elif min(PTFPressures) <= fc_kPa <= max(PTFPressures):
+                    log.warning("Pressure for field capacity NOT present in point-PTF pressures, water content will be interpolated")
+                    fcArray.append(fc_kPa)
 
                 else:
-                    log.error("PTF type not recognised: " + str(PTFType))
+                    log.error("Pressure for field capacity outside the range of the point-PTF pressures")
+                    log.error("Cannot calculate water content at this pressure for field capacity")
+                    sys.exit()
+
+            else:
+                log.error("PTF type not recognised: " + str(PTFType))
 
     else:
         log.error("Field for field capacity not found in input shapefle: " + str(fieldFC))
@@ -211,29 +431,31 @@ def pressureFields(outputFolder, inputShp, fieldFC, fieldSIC, fieldPWP):
     if fieldSIC is not None:
         if common.CheckField(inputShp, fieldSIC):
 
-            with arcpy.da.SearchCursor(inputShp, [fieldSIC, OIDField]) as searchCursor:
-                for row in searchCursor:
-                    sic_kPa = row[0]                    
+            for sic_kPa in data_access.readColumns(inputShp, fieldSIC)[0]:
 
-                    if PTFType == 'vgPTF':
-                        ## TODO: Put in a check for the stoma closure pressure
-                        ## TODO: Need to know what is a realistic range for the SIC presusre
+                if PTFType == 'vgPTF':
+                    ## TODO: Put in a check for the stoma closure pressure
+                    ## TODO: Need to know what is a realistic range for the SIC presusre
                         
-                        sicArray.append(sic_kPa)
+                    sicArray.append(sic_kPa)
 
-                    elif PTFType == 'pointPTF':
-                        # Check if this pressure point is inside the array
+                elif PTFType == 'pointPTF':
+                    # Pressures between the point-PTF pressures are interpolated
 
-                        if sic_kPa in PTFPressures:
-                            sicArray.append(sic_kPa)
+                    if sic_kPa in PTFPressures:
+                        sicArray.append(sic_kPa)
 
-                        else:
-                            log.error("Pressure for stoma closure due to water stress NOT present in point-PTF pressures")
-                            log.error("Cannot calculate water content at this pressure for stoma closure due to water stress")
-                            sys.exit()
+                    elif min(PTFPressures) <= sic_kPa <= max(PTFPressures):
+                        log.warning("Pressure for stoma closure due to water stress NOT present in point-PTF pressures, water content will be interpolated")
+                        sicArray.append(sic_kPa)
 
                     else:
-                        log.error("PTF type not recognised: " + str(PTFType))
+                        log.error("Pressure for stoma closure due to water stress outside the range of the point-PTF pressures")
+                        log.error("Cannot calculate water content at this pressure for stoma closure due to water stress")
+                        sys.exit()
+
+                else:
+                    log.error("PTF type not recognised: " + str(PTFType))
 
         else:
             log.error("Field for water stress-induced stomatal closure not found in input shapefle: " + str(fieldFC))
@@ -250,33 +472,35 @@ def pressureFields(outputFolder, inputShp, fieldFC, fieldSIC, fieldPWP):
     if fieldPWP is not None:
         if common.CheckField(inputShp, fieldPWP):
 
-            with arcpy.da.SearchCursor(inputShp, [fieldPWP, OIDField]) as searchCursor:
-                for row in searchCursor:
-                    pwp_kPa = row[0]
+            for pwp_kPa in data_access.readColumns(inputShp, fieldPWP)[0]:
 
-                    if PTFType == 'vgPTF':
+                if PTFType == 'vgPTF':
 
-                        if pwp_kPa > 1500:
-                            log.warning("Permanent wilting point for soil in row " + str(OIDField) + " exceeds 1500 kPa")
+                    if pwp_kPa > 1500:
+                        log.warning("Permanent wilting point for soil in row " + str(OIDField) + " exceeds 1500 kPa")
 
-                            ## ASK B: vg not valid for over 1500 kPa?
-                            log.warning("The van Genuchten equation is not valid for pressures greater than 1500 kPa")
+                        ## ASK B: vg not valid for over 1500 kPa?
+                        log.warning("The van Genuchten equation is not valid for pressures greater than 1500 kPa")
 
-                        pwpArray.append(pwp_kPa)
+                    pwpArray.append(pwp_kPa)
 
-                    elif PTFType == 'pointPTF':
-                        # Check if this pressure point is inside the array
+                elif PTFType == 'pointPTF':
+                    # Pressures between the point-PTF pressures are interpolated
 
-                        if pwp_kPa in pwp_kPa:
-                            pwpArray.append(pwp_kPa)
+                    if pwp_kPa in PTFPressures:
+                        pwpArray.append(pwp_kPa)
 
-                        else:
-                            log.error("Pressure for permanent wilting point NOT present in point-PTF pressures")
-                            log.error("Cannot calculate water content at this pressure for permanent wilting point")
-                            sys.exit()
+                    elif min(PTFPressures) <= pwp_kPa <= max(PTFPressures):
+                        log.warning("Pressure for permanent wilting point NOT present in point-PTF pressures, water content will be interpolated")
+                        pwpArray.append(pwp_kPa)
 
                     else:
-                        log.error("PTF type not recognised: " + str(PTFType))
+                        log.error("Pressure for permanent wilting point outside the range of the point-PTF pressures")
+                        log.error("Cannot calculate water content at this pressure for permanent wilting point")
+                        sys.exit()
+
+                else:
+                    log.error("PTF type not recognised: " + str(PTFType))
 
 
         else:
@@ -311,4 +535,21 @@ def checkNegOutput(array, record):
 
         if output < 0.0:
             warningFlag = 'Soil moisture value is negative for record ' + str(record)
-            log.warning(warningFlag)
\ No newline at end of file
+            log.warning(warningFlag)
+
+def checkNegOutputArray(arrays, records=None, maxExamples=5):
+    # Array version of checkNegOutput, arrays holds one array of outputs (all records) per output
+    # Logs one warning with the number of records and the first few of them (OIDs if records is given)
+
+    with np.errstate(invalid='ignore'):
+        negative = np.any([np.asarray(output, dtype=np.float64) < 0.0 for output in arrays], axis=0)
+
+    index = np.flatnonzero(negative)
+
+    if len(index) > 0:
+        examples = ', '.join(str(i if records is None else records[i]) for i in index[:maxExamples])
+
+        if len(index) > maxExamples:
+            examples += ', ...'
+
+        log.warning('Soil moisture value is negative for ' + str(len(index)) + ' record(s), e.g. record ' + examples)
@@ -0,0 +1,264 @@
+'''
+Columnar export of the tool results (Parquet, Arrow IPC or NumPy .npz).
+
+Shapefile fields are limited to 10 character names and store numbers as text
+(DOUBLE 10,6), which is slow to parse back. If the columnarExport node of
+user_settings.xml is set, the solo drivers also write their output fields (at full
+precision) with the OID and LUCIname of each record to a columnar file next to
+their output, see data_access.startExport:
+
+    none    - no export (default)
+    parquet - Parquet file (.parquet), needs pyarrow
+    arrow   - Arrow IPC file (.arrow, also read by pyarrow.feather), needs pyarrow
+    npz     - NumPy .npz archive, one array per field (no extra dependency)
+
+If pyarrow is not installed the npz format is used instead.
+Parquet and Arrow files are written one record batch per chunk of records. For the npz
+format each chunk is saved to temporary .npy files, one per field, which are assembled
+into the archive when the export is closed, so only one chunk is held in memory.
+
+This module does not need arcpy (configuration only imports it if it is installed),
+readColumns can be used on its own to load only the fields needed from an export.
+'''
+
+import os
+import sys
+import shutil
+import tempfile
+import zipfile
+import xml.etree.cElementTree as ET
+import numpy as np
+
+import configuration
+
+from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
+import LUCI_PTFs.lib.log as log
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log])
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+except ImportError:
+    pa = None
+    pq = None
+
+# Export formats and the extension of their files
+formats = ['none', 'parquet', 'arrow', 'npz']
+defaultFormat = 'none'
+extensions = {'parquet': '.parquet', 'arrow': '.arrow', 'npz': '.npz'}
+
+def available():
+    return pa is not None
+
+def getExportFormat():
+
+    # Fetch the export format from the user settings file
+    exportFormat = defaultFormat
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            exportFormat = root.find("columnarExport").text.strip().lower()
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just use the default format.
+
+    if exportFormat not in formats:
+        log.warning('Columnar export format ' + str(exportFormat) + ' not recognised, using ' + defaultFormat)
+        exportFormat = defaultFormat
+
+    if exportFormat in ['parquet', 'arrow'] and not available():
+        log.warning('pyarrow is not installed, results are exported as a NumPy .npz archive instead of ' + exportFormat)
+        exportFormat = 'npz'
+
+    return exportFormat
+
+def getExportFile(outputDataset, exportFormat):
+    return os.path.splitext(outputDataset)[0] + extensions[exportFormat]
+
+def _array(column):
+
+    # Column (list or array) to a NumPy array, numbers as float64 with NaN for nulls and text as unicode
+    array = np.asarray(column)
+
+    if array.dtype.kind != 'O':
+        return array
+
+    if all(value is None or isinstance(value, (six.integer_types, float)) for value in column):
+        return np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+
+    return np.array([u'' if value is None else six.text_type(value) for value in column])
+
+class ColumnWriter(object):
+
+    '''
+    Writes chunks of columns to an export file. Every chunk has the same fields, in the
+    same order; the types of the first chunk are used for the following ones.
+    '''
+
+    def __init__(self, exportFile, exportFormat):
+
+        if exportFormat not in extensions:
+            log.error('Columnar export format not recognised: ' + str(exportFormat))
+            sys.exit()
+
+        if exportFormat in ['parquet', 'arrow'] and not available():
+            log.error('pyarrow is needed to export to ' + exportFormat)
+            sys.exit()
+
+        self.exportFile = exportFile
+        self.exportFormat = exportFormat
+        self.fields = None
+        self.numRecords = 0
+
+        self._writer = None
+        self._schema = None
+        self._tempFolder = None
+        self._numChunks = 0
+
+    def write(self, fields, columns):
+
+        fields = [str(field) for field in fields]
+        arrays = [_array(column) for column in columns]
+
+        if self.fields is None:
+            self.fields = fields
+
+        elif fields != self.fields:
+            log.error('The fields of each chunk exported to ' + str(self.exportFile) + ' must be the same')
+            sys.exit()
+
+        if self.exportFormat == 'npz':
+            self._saveChunk(arrays)
+
+        else:
+            self._writeBatch(arrays)
+
+        if len(arrays) > 0:
+            self.numRecords += len(arrays[0])
+
+    def _saveChunk(self, arrays):
+
+        # Each field of the chunk to its own .npy file in a temporary folder next to the export
+        if self._tempFolder is None:
+            self._tempFolder = tempfile.mkdtemp(prefix='npz_', dir=os.path.dirname(os.path.abspath(self.exportFile)))
+
+        for i, array in enumerate(arrays):
+            np.save(self._chunkFile(i, self._numChunks), array)
+
+        self._numChunks += 1
+
+    def _chunkFile(self, fieldNum, chunkNum):
+        return os.path.join(self._tempFolder, 'field' + str(fieldNum) + '_chunk' + str(chunkNum) + '.npy')
+
+    def _writeArchive(self):
+
+        # The chunks of each field are copied into one .npy file, which is then stored in the archive
+        try:
+            with zipfile.ZipFile(self.exportFile, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for i, field in enumerate(self.fields):
+                    chunkFiles = [self._chunkFile(i, chunkNum) for chunkNum in range(0, self._numChunks)]
+                    chunks = [np.load(chunkFile, mmap_mode='r') for chunkFile in chunkFiles]
+
+                    fieldFile = os.path.join(self._tempFolder, 'field' + str(i) + '.npy')
+                    # Empty chunks (read as float64) do not change the type of the field
+                    dtype = np.result_type(*[chunk.dtype for chunk in chunks if len(chunk) > 0] or [chunks[0].dtype])
+
+                    if self.numRecords > 0:
+                        fieldArray = np.lib.format.open_memmap(fieldFile, mode='w+', dtype=dtype, shape=(self.numRecords,))
+
+                        start = 0
+                        for chunk in chunks:
+                            fieldArray[start:start + len(chunk)] = chunk
+                            start += len(chunk)
+
+                        fieldArray.flush()
+                        del fieldArray
+
+                    else:
+                        np.save(fieldFile, np.empty(0, dtype=dtype))
+
+                    del chunks
+                    archive.write(fieldFile, field + '.npy')
+
+                    for chunkFile in chunkFiles + [fieldFile]:
+                        os.remove(chunkFile)
+
+        finally:
+            shutil.rmtree(self._tempFolder, ignore_errors=True)
+            self._tempFolder = None
+
+    def _writeBatch(self, arrays):
+
+        if self._schema is None:
+            batch = pa.RecordBatch.from_arrays([pa.array(array) for array in arrays], self.fields)
+            self._schema = batch.schema
+
+            if self.exportFormat == 'parquet':
+                self._writer = pq.ParquetWriter(self.exportFile, self._schema)
+            else:
+                self._writer = pa.RecordBatchFileWriter(self.exportFile, self._schema)
+
+        else:
+            batch = pa.RecordBatch.from_arrays([pa.array(array, type=self._schema[i].type) for i, array in enumerate(arrays)], self.fields)
+
+        if self.exportFormat == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+
+        if self.fields is None:
+            log.warning('No records exported to ' + str(self.exportFile))
+            return
+
+        if self.exportFormat == 'npz':
+            self._writeArchive()
+
+        else:
+            self._writer.close()
+
+        log.info('Results exported to: ' + str(self.exportFile))
+
+def readColumns(exportFile, fields):
+
+    '''
+    Reads only the fields from an export file (Parquet, Arrow or npz, from its extension).
+    Returns a structured array with the fields, in the order of fields.
+    '''
+
+    if isinstance(fields, six.string_types):
+        fields = [fields]
+
+    fields = [str(field) for field in fields]
+    ext = os.path.splitext(exportFile)[1].lower()
+
+    if ext == extensions['npz']:
+        # Only the arrays of the fields are loaded from the archive
+        with np.load(exportFile) as archive:
+            arrays = [archive[field] for field in fields]
+
+    elif ext in [extensions['parquet'], extensions['arrow']] and available():
+        if ext == extensions['parquet']:
+            table = pq.read_table(exportFile, columns=fields)
+        else:
+            table = pa.ipc.open_file(pa.memory_map(exportFile, 'r')).read_all()
+
+        arrays = [_array(table.column(field).to_numpy()) for field in fields]
+
+    else:
+        log.error('Export file not supported (use .npz, or .parquet and .arrow with pyarrow): ' + str(exportFile))
+        sys.exit()
+
+    dtype = [(field, array.dtype) for field, array in zip(fields, arrays)]
+    table = np.empty(len(arrays[0]) if len(arrays) > 0 else 0, dtype=dtype)
+
+    for field, array in zip(fields, arrays):
+        table[field] = array
+
+    return table
@@ -1,5 +1,3 @@
-import arcpy
-from arcpy.sa import Reclassify, RemapRange
 import os
 import sys
 import shutil
@@ -10,9 +8,17 @@ import xml.etree.cElementTree as ET
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import LUCI_PTFs.lib.log as log
+import LUCI_PTFs.lib.data_access as data_access
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log])
+refresh_modules([log, data_access])
+
+# The PTF calculations run without arcpy through data_access (e.g. on batch nodes),
+# the system checks and the functions below that use arcpy need it
+arcpy = data_access.arcpy
+
+# Number of rows of the curve CSV written in each block (see writeCurveCSV)
+curveBlockRows = 100000
 
 def strToBool(s):
     ''' Converts a true/false string to an actual Boolean'''
@@ -228,7 +234,7 @@ def readXML(XMLfile, nodeNameList, showErrors=True):
             tree = ET.parse(XMLfile)
         except IOError:
             if showErrors:
-                arcpy.AddError("XML File \"" + XMLfile + "\" does not exist or cannot be opened")
+                log.error("XML File \"" + XMLfile + "\" does not exist or cannot be opened")
             raise
 
         root = tree.getroot()
@@ -257,7 +263,7 @@ def readXML(XMLfile, nodeNameList, showErrors=True):
 
     except Exception:
         if showErrors:
-            arcpy.AddError("Data not read from XML file")
+            log.error("Data not read from XML file")
         raise
 
 def writeXML(XMLfile, nodeNameValueList):
@@ -399,8 +405,7 @@ def logWarnings(folder, warningMsg):
 def CheckField(checkfile, fieldname):
 
     try:
-        List = arcpy.ListFields(checkfile, fieldname)
-        if len(List) == 1:
+        if data_access.fieldExists(checkfile, fieldname):
             exist = 1
         else:
             exist = 0
@@ -412,39 +417,25 @@ def CheckField(checkfile, fieldname):
 
 def CleanFields(checkfile, fieldstokeep):
 
+    # Deletes the fields which are not in fieldstokeep (see data_access.keepFields)
     try:
-        desc = arcpy.Describe(checkfile)
-        List = arcpy.ListFields(checkfile)
-        fieldNameList = []
-
-        for field in List:
-            if not field.required:
-                if field.name not in fieldstokeep:
-                    fieldNameList.append(field.name)
-
-        # dBASE tables require a field other than an OID and Shape.  If this is
-        #  the case, retain an extra field (the first one in the original list)
-        if desc.dataType in ["ShapeFile", "DbaseTable"]:
-            fieldNameList = fieldNameList[1:]
-
-        arcpy.DeleteField_management(checkfile, fieldNameList)
+        data_access.keepFields(checkfile, fieldstokeep)
 
     except Exception:
         log.error("Error occurred while attempting to clean unwanted fields in file " + checkfile)
         raise
 
-
 def writeFields(outputShp, fieldArray):
 
     # Writes fields to the outputShp
 
     # Write warning fields
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
+    data_access.addField(outputShp, "warning", "TEXT")
 
     # Write the rest of the fields (1 to end)
 
     for x in range(1, len(fieldArray)):
-        arcpy.AddField_management(outputShp, fieldArray[x], "DOUBLE", 10, 6)
+        data_access.addField(outputShp, fieldArray[x], "DOUBLE", 10, 6)
 
 def getInputValue(folder, paramName):
  
@@ -460,20 +451,11 @@ def getInputValue(folder, paramName):
 def writeWarning(outputShp, warningArray):
 
     # Write the warnings to output shapefile
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-
-    outputFields = ["warning"]
-    
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.addField(outputShp, "warning", "TEXT")
+    data_access.writeColumns(outputShp, "warning", warningArray)
 
 def getOIDField(shapefile):
-    OID = str(arcpy.Describe(shapefile).oidFieldName)
+    OID = str(data_access.getOIDField(shapefile))
 
     return OID
 
@@ -481,62 +463,36 @@ def writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPa
     # Write outputs of VG or BC equations to output shapefile
 
     # Add fields
-    arcpy.AddField_management(outputShp, "WC_1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_200kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1000kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1500kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_1kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_3kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_10kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_33kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_100kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_200kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_1000kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_1500kPa", "DOUBLE", 10, 6)
 
     outputFields = ["WC_1kPa", "WC_3kPa", "WC_10kPa", "WC_33kPa", "WC_100kPa", "WC_200kPa", "WC_1000kPa", "WC_1500kpa"]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = WC_1kPaArray[recordNum]
-            row[1] = WC_3kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_100kPaArray[recordNum]
-            row[5] = WC_200kPaArray[recordNum]
-            row[6] = WC_1000kPaArray[recordNum]
-            row[7] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, outputFields, [WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray])
 
     log.info("Water content at default pressures written to output shapefile")
 
 def writeOutputCriticalWC(outputShp, wc_sat, wc_fc, wc_sic, wc_pwp, wc_DW, wc_RAW, wc_NRAW, wc_PAW):
 
     # Add fields
-    arcpy.AddField_management(outputShp, "wc_satCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_fcCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_sicCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_pwpCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_DW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_RAW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_NRAW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_PAW", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_satCalc", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_fcCalc", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_sicCalc", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_pwpCalc", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_DW", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_RAW", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_NRAW", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "wc_PAW", "DOUBLE", 10, 6)
 
     wcFields = ["wc_satCalc", "wc_fcCalc", "wc_sicCalc", "wc_pwpCalc", "wc_DW", "wc_RAW", "wc_NRAW", "wc_PAW"]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, wcFields) as cursor:
-        for row in cursor:
-            row[0] = wc_sat[recordNum]
-            row[1] = wc_fc[recordNum]
-            row[2] = wc_sic[recordNum]
-            row[3] = wc_pwp[recordNum]
-            row[4] = wc_DW[recordNum]
-            row[5] = wc_RAW[recordNum]
-            row[6] = wc_NRAW[recordNum]
-            row[7] = wc_PAW[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, wcFields, [wc_sat, wc_fc, wc_sic, wc_pwp, wc_DW, wc_RAW, wc_NRAW, wc_PAW])
 
     log.info('Water contents for critical thresholds written to output shapefile')
 
@@ -570,4 +526,75 @@ def writeWCCSV(outputFolder, soilName, pressureArray, WCArray, pressureTitle, WC
         msg = 'Output CSV with water contents and pressure saved to: ' + str(outCSV)
         log.info(msg)
 
-    csv_file.close()
\ No newline at end of file
+    csv_file.close()
+
+def getPerSoilCurveCSV():
+
+    # Fetch the legacy curve output option (one CSV per soil) from the user settings file
+    perSoil = False
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            perSoil = root.find("perSoilCurveCSV").text == 'Yes'
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just write the curve store.
+
+    return perSoil
+
+def writeCurveCSV(outputFolder, curveName, nameArray, pressureArray, curves, pressureTitle, valueTitle, soils=None):
+
+    '''
+    Writes the curves (soils x pressures matrix) to one long-format CSV, curveName.csv in the
+    output folder, with one row per soil and pressure: Name, pressure and value.
+    The rows are written in blocks of whole soils (about curveBlockRows rows each).
+
+    If perSoilCurveCSV is Yes in user_settings.xml, one CSV per soil is written to the
+    curveName folder instead (see writeWCCSV).
+    soils are the indices of the soils to write (all soils by default).
+    '''
+
+    import csv
+    import numpy as np
+
+    if soils is None:
+        soils = range(0, len(nameArray))
+
+    soils = list(soils)
+
+    if getPerSoilCurveCSV():
+        outFolder = os.path.join(outputFolder, curveName)
+        if not os.path.exists(outFolder):
+            os.mkdir(outFolder)
+
+        for i in soils:
+            writeWCCSV(outFolder, nameArray[i], pressureArray, curves[i], pressureTitle, valueTitle)
+
+        return
+
+    pressures = np.asarray(pressureArray, dtype=np.float64).ravel().tolist()
+    blockSoils = max(curveBlockRows // max(len(pressures), 1), 1)
+
+    outCSV = os.path.join(outputFolder, curveName + '.csv')
+
+    with data_access.openCSV(outCSV, 'w') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Name', pressureTitle, valueTitle])
+
+        for start in range(0, len(soils), blockSoils):
+            block = soils[start:start + blockSoils]
+            values = np.asarray(curves)[block].tolist()
+            rows = []
+
+            for i, soilValues in zip(block, values):
+                name = nameArray[i]
+                rows.extend([name, pressure, value] for pressure, value in zip(pressures, soilValues))
+
+            writer.writerows(rows)
+
+        msg = 'Output CSV with the curves of ' + str(len(soils)) + ' soils saved to: ' + str(outCSV)
+        log.info(msg)
+
+    csv_file.close()
@@ -0,0 +1,170 @@
+'''
+Per-run cache of curve matrices (records x pressures).
+
+The VG, MVG and Brooks-Corey curves are evaluated over the same pressure grid by the
+CSV export, every plot stage and the critical-point step. The matrices are stored here,
+keyed by (model, hash of the parameter set, hash of the pressure grid), so that each one
+is only calculated once per run.
+
+Eviction is least-recently-used and bounded by the curveCacheMB node of user_settings.xml.
+Matrices larger than that limit are not cached, unless the curveStore node is set: they are
+then calculated into memory-mapped files in the output folder (see curve_store), which stay
+cached for the run without counting towards the limit.
+
+Curves are only calculated for the distinct parameter sets (see dedup) and copied to the
+records sharing them; stored matrices are copied to the records in blocks, into a second
+file (see curve_store.scatterStore), so they are never copied into memory.
+'''
+
+import hashlib
+import os
+import xml.etree.cElementTree as ET
+import numpy as np
+from collections import OrderedDict
+
+import configuration
+import LUCI_PTFs.lib.curve_store as curve_store
+import LUCI_PTFs.lib.dedup as dedup
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([curve_store, dedup])
+
+# Default memory limit for cached matrices (MB) if it is not set in user_settings.xml
+defaultLimitMB = 256
+
+_cache = OrderedDict()
+_cacheBytes = [0]
+_memoryLimit = [None]
+
+def getMemoryLimit():
+
+    # Fetch the memory limit (bytes) from the user settings file
+    limitMB = defaultLimitMB
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            limitMB = float(root.find("curveCacheMB").text)
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just use the default limit.
+
+    return int(limitMB * 1024 * 1024)
+
+def clearCache(outputFolder=None):
+
+    # Called at the start of each run so that curves are not carried over between runs
+    # Stored curve matrices are written to the output folder of the run (see curve_store)
+    # The memory limit is read once per run
+    _cache.clear()
+    _cacheBytes[0] = 0
+    _memoryLimit[0] = getMemoryLimit()
+    curve_store.setFolder(outputFolder)
+
+def _getLimit():
+
+    # Memory limit of the run, read from the user settings file if clearCache has not been called
+    if _memoryLimit[0] is None:
+        _memoryLimit[0] = getMemoryLimit()
+
+    return _memoryLimit[0]
+
+def _hashArray(values):
+
+    array = np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+    return hashlib.md5(array.tobytes()).hexdigest() + str(array.shape)
+
+def _paramHash(paramArrays):
+
+    return _hashArray(np.column_stack([np.asarray(p, dtype=np.float64).ravel() for p in paramArrays]))
+
+def _memoryBytes(curves):
+
+    # Memory-mapped matrices are paged by the OS and do not count towards the limit
+    if isinstance(curves, np.memmap):
+        return 0
+
+    return curves.nbytes
+
+def _store(key, pressures, curves):
+
+    limit = _getLimit()
+
+    # Matrices larger than the limit are not cached at all
+    if _memoryBytes(curves) > limit:
+        return
+
+    _cache[key] = (np.asarray(pressures, dtype=np.float64).ravel(), curves)
+    _cacheBytes[0] += _memoryBytes(curves)
+
+    while _cacheBytes[0] > limit:
+        oldKey, (oldPressures, oldCurves) = _cache.popitem(last=False)
+        _cacheBytes[0] -= _memoryBytes(oldCurves)
+
+def getCurves(model, curveFxn, pressures, paramArrays):
+
+    '''
+    Returns the N x P curve matrix of curveFxn(pressures, *paramArrays).
+
+    The matrix is calculated on the first request and read from the cache afterwards.
+    model is a short name (e.g. 'VG') which stops different curve types sharing a key.
+    '''
+
+    key = (model, _paramHash(paramArrays), _hashArray(pressures))
+
+    if key in _cache:
+        entry = _cache.pop(key)
+        _cache[key] = entry
+        return entry[1]
+
+    # curveFxn is calculated once per distinct parameter set
+    uniqueParams, inverse = dedup.uniqueRows(paramArrays)
+
+    # Matrices of the records larger than the memory limit can be calculated into files instead
+    limit = _getLimit()
+    numRecords = len(uniqueParams[0]) if inverse is None else len(inverse)
+    numBytes = 8 * numRecords * len(np.asarray(pressures).ravel())
+
+    if curve_store.useStore(numBytes, limit):
+        curves = curve_store.computeStore(model, key[1] + key[2], curveFxn, pressures, uniqueParams, limit)
+
+        if inverse is not None:
+            curves = curve_store.scatterStore(model, key[1] + key[2], pressures, curves, inverse, limit)
+
+    else:
+        curves = dedup.scatter(curveFxn(pressures, *uniqueParams), inverse)
+
+    _store(key, pressures, curves)
+
+    return curves
+
+def getCurveColumns(model, curveFxn, pressures, paramArrays):
+
+    '''
+    Returns the N x P matrix of curveFxn at the requested pressures.
+
+    If every pressure lies on a grid already cached for this parameter set, the matching
+    columns are read from that matrix. Otherwise the curves are calculated (and cached).
+    '''
+
+    paramKey = _paramHash(paramArrays)
+    wanted = np.asarray(pressures, dtype=np.float64).ravel()
+
+    for key in reversed(list(_cache.keys())):
+
+        if key[0] != model or key[1] != paramKey:
+            continue
+
+        grid, curves = _cache[key]
+
+        # Grids are sorted (linspace) so look the pressures up with searchsorted
+        if np.any(np.diff(grid) < 0):
+            continue
+
+        columns = np.clip(np.searchsorted(grid, wanted), 0, len(grid) - 1)
+
+        if np.all(grid[columns] == wanted):
+            return curves[:, columns]
+
+    return getCurves(model, curveFxn, wanted, paramArrays)
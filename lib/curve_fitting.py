@@ -0,0 +1,235 @@
+'''
+Batched fitting of van Genuchten and Brooks-Corey parameters to water retention points
+
+Every record is fitted at the same time with a vectorised Levenberg-Marquardt using
+analytic Jacobians. The points can be point-PTF outputs or measured retention data,
+given as a pressure vector (P, kPa) and a water content matrix (N x P).
+Missing points (NaN) are ignored.
+'''
+
+import numpy as np
+
+def _levenbergMarquardt(modelFxn, params, pressures, wcMatrix, fixed, constrainFxn, maxIter, tolerance):
+
+    '''
+    Minimises the sum of squared residuals of every record simultaneously.
+
+    modelFxn(params, pressures) returns the predicted water contents (N x P) and the
+    Jacobian (N x P x k). Each record has its own damping factor, and steps that do
+    not reduce that record's cost are rejected. fixed (N x k) marks the parameters of
+    each record that are held at their starting values.
+    '''
+
+    N, k = params.shape
+
+    weights = np.isfinite(wcMatrix).astype(np.float64)
+    observed = np.where(weights > 0.0, wcMatrix, 0.0)
+
+    damping = np.full(N, 1e-3)
+    converged = np.zeros(N, dtype=bool)
+    free = (~np.asarray(fixed, dtype=bool)).astype(np.float64).reshape(N, k)
+    eye = np.eye(k).reshape(1, k, k)
+
+    predicted, jacobian = modelFxn(params, pressures)
+    residual = weights * (predicted - observed)
+    cost = np.sum(residual ** 2, axis=1)
+
+    for iteration in range(0, maxIter):
+
+        J = jacobian * weights[:, :, np.newaxis] * free[:, np.newaxis, :]
+        JTJ = np.einsum('npi,npj->nij', J, J)
+        gradient = np.einsum('npi,np->ni', J, residual)
+
+        diagonal = np.einsum('nii->ni', JTJ)
+        A = JTJ + (damping[:, np.newaxis, np.newaxis] * diagonal[:, :, np.newaxis] + 1e-12) * eye
+
+        step = -np.linalg.solve(A, gradient[:, :, np.newaxis])[:, :, 0]
+        step = np.where(np.isfinite(step), step, 0.0) * free
+        step[converged] = 0.0
+
+        trial = constrainFxn(params + step)
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            trialPredicted, trialJacobian = modelFxn(trial, pressures)
+
+        trialResidual = weights * (trialPredicted - observed)
+        trialCost = np.sum(trialResidual ** 2, axis=1)
+
+        improved = np.isfinite(trialCost) & (trialCost < cost) & ~converged
+
+        # Records that are no longer improving have converged
+        change = np.abs(cost - trialCost)
+        converged = converged | (improved & (change <= tolerance * (1.0 + cost))) | (cost < tolerance)
+
+        params = np.where(improved[:, np.newaxis], trial, params)
+        predicted = np.where(improved[:, np.newaxis], trialPredicted, predicted)
+        jacobian = np.where(improved[:, np.newaxis, np.newaxis], trialJacobian, jacobian)
+        residual = np.where(improved[:, np.newaxis], trialResidual, residual)
+        cost = np.where(improved, trialCost, cost)
+
+        damping = np.where(improved, damping * 0.3, damping * 10.0)
+
+        # Damping this large means the step is effectively zero
+        converged = converged | (damping > 1e10)
+
+        if converged.all():
+            break
+
+    points = np.maximum(np.sum(weights, axis=1), 1.0)
+    rmse = np.sqrt(cost / points)
+
+    return params, rmse, converged
+
+def _initialGuess(pressures, wcMatrix):
+
+    # theta_s from the wettest point, theta_r at 0, and the pressure half way down the curve
+    theta_s = np.nanmax(wcMatrix, axis=1)
+    theta_min = np.nanmin(wcMatrix, axis=1)
+
+    halfWC = 0.5 * (theta_s + theta_min)
+    distance = np.where(np.isfinite(wcMatrix), np.abs(wcMatrix - halfWC[:, np.newaxis]), np.inf)
+    halfPressure = pressures[np.argmin(distance, axis=1)]
+    halfPressure = np.where(halfPressure > 0.0, halfPressure, 1.0)
+
+    return theta_s, theta_min, halfPressure
+
+def _vgModel(params, pressures):
+
+    # VG with m = 1 - 1/n, parameters: theta_r, theta_s, ln(alpha), ln(n - 1)
+    theta_r = params[:, 0:1]
+    theta_s = params[:, 1:2]
+    alpha = np.exp(params[:, 2:3])
+    n = 1.0 + np.exp(params[:, 3:4])
+    m = 1.0 - 1.0 / n
+
+    h = pressures.reshape(1, -1)
+    alphaH = alpha * h
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lnAlphaH = np.where(alphaH > 0.0, np.log(alphaH), 0.0)
+
+    A = np.where(alphaH > 0.0, np.exp(n * lnAlphaH), 0.0)
+    B = 1.0 + A
+    S = B ** -m
+
+    predicted = theta_r + (theta_s - theta_r) * S
+
+    # d ln S / d n, with m depending on n
+    dlnS_dn = -np.log(B) / (n ** 2) - m * A * lnAlphaH / B
+
+    jacobian = np.empty(predicted.shape + (4,))
+    jacobian[:, :, 0] = 1.0 - S
+    jacobian[:, :, 1] = S
+    jacobian[:, :, 2] = -(theta_s - theta_r) * S * m * n * A / B
+    jacobian[:, :, 3] = (theta_s - theta_r) * S * dlnS_dn * (n - 1.0)
+
+    return predicted, jacobian
+
+def _bcModel(params, pressures):
+
+    # Brooks-Corey, parameters: theta_r, theta_s, ln(lambda), ln(hb)
+    theta_r = params[:, 0:1]
+    theta_s = params[:, 1:2]
+    lambda_BC = np.exp(params[:, 2:3])
+    hb_BC = np.exp(params[:, 3:4])
+
+    h = pressures.reshape(1, -1)
+    wet = h < hb_BC
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lnRatio = np.where(wet, 0.0, np.log(hb_BC / h))
+
+    X = np.where(wet, 1.0, np.exp(lambda_BC * lnRatio))
+
+    predicted = theta_r + (theta_s - theta_r) * X
+
+    jacobian = np.empty(predicted.shape + (4,))
+    jacobian[:, :, 0] = 1.0 - X
+    jacobian[:, :, 1] = X
+    jacobian[:, :, 2] = np.where(wet, 0.0, (theta_s - theta_r) * X * lnRatio * lambda_BC)
+    jacobian[:, :, 3] = np.where(wet, 0.0, (theta_s - theta_r) * X * lambda_BC)
+
+    return predicted, jacobian
+
+def _constrainWC(params):
+
+    # 0 <= theta_r < theta_s <= 1
+    params = params.copy()
+    params[:, 1] = np.clip(params[:, 1], 1e-3, 1.0)
+    params[:, 0] = np.clip(params[:, 0], 0.0, params[:, 1] - 1e-3)
+    params[:, 2:] = np.clip(params[:, 2:], -20.0, 20.0)
+
+    return params
+
+def fitVGArray(pressures, wcMatrix, maxIter=200, tolerance=1e-10):
+
+    '''
+    Fits theta_r, theta_s, alpha and n (with m = 1 - 1/n) to every record.
+
+    Returns WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, in the
+    order taken by vanGenuchten.writeVGParams, followed by the RMSE of each fit and a
+    warning per record ('' if the fit converged).
+    Records with fewer than four valid points keep theta_r fixed at 0.
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).ravel()
+    wcMatrix = np.asarray(wcMatrix, dtype=np.float64).reshape(-1, len(pressures))
+
+    theta_s, theta_min, halfPressure = _initialGuess(pressures, wcMatrix)
+
+    params = np.column_stack([np.zeros(len(theta_s)), theta_s, np.log(1.0 / halfPressure), np.full(len(theta_s), np.log(0.5))])
+    params = _constrainWC(params)
+
+    # theta_r is fixed for records with fewer than four valid points
+    fixed = np.zeros(params.shape, dtype=bool)
+    fixed[:, 0] = np.sum(np.isfinite(wcMatrix), axis=1) < 4
+
+    params, rmse, converged = _levenbergMarquardt(_vgModel, params, pressures, wcMatrix, fixed, _constrainWC, maxIter, tolerance)
+
+    WC_residualArray = params[:, 0]
+    WC_satArray = params[:, 1]
+    alpha_VGArray = np.exp(params[:, 2])
+    n_VGArray = 1.0 + np.exp(params[:, 3])
+    m_VGArray = 1.0 - 1.0 / n_VGArray
+
+    warningArray = ['' if ok else 'VG fit did not converge' for ok in converged]
+
+    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, rmse, warningArray
+
+def fitBCArray(pressures, wcMatrix, maxIter=200, tolerance=1e-10):
+
+    '''
+    Fits theta_r, theta_s, lambda and hb (air-entry pressure, kPa) to every record.
+
+    Returns warning, WC_res, WC_sat, lambda_BC, hb_BC in the order of the bc_PTFs
+    functions and brooksCorey.writeBCParams, followed by the RMSE of each fit.
+    Records that do not converge get the invalid lambda sentinel (-9999).
+    Records with fewer than four valid points keep theta_r fixed at 0.
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).ravel()
+    wcMatrix = np.asarray(wcMatrix, dtype=np.float64).reshape(-1, len(pressures))
+
+    theta_s, theta_min, halfPressure = _initialGuess(pressures, wcMatrix)
+
+    # Start the air-entry pressure at the smallest positive pressure
+    positive = pressures[pressures > 0.0]
+    hbStart = np.min(positive) if len(positive) > 0 else 1.0
+
+    params = np.column_stack([np.zeros(len(theta_s)), theta_s, np.full(len(theta_s), np.log(0.3)), np.full(len(theta_s), np.log(hbStart))])
+    params = _constrainWC(params)
+
+    # theta_r is fixed for records with fewer than four valid points
+    fixed = np.zeros(params.shape, dtype=bool)
+    fixed[:, 0] = np.sum(np.isfinite(wcMatrix), axis=1) < 4
+
+    params, rmse, converged = _levenbergMarquardt(_bcModel, params, pressures, wcMatrix, fixed, _constrainWC, maxIter, tolerance)
+
+    WC_res = params[:, 0]
+    WC_sat = params[:, 1]
+    lambda_BC = np.where(converged, np.exp(params[:, 2]), -9999.0)
+    hb_BC = np.exp(params[:, 3])
+
+    warning = ['' if ok else 'BC fit did not converge' for ok in converged]
+
+    return warning, WC_res, WC_sat, lambda_BC, hb_BC, rmse
@@ -0,0 +1,180 @@
+'''
+On-disk curve matrices (soils x pressures) for runs too large for memory.
+
+If the curveStore node of user_settings.xml is float32 or float64, the curve matrices
+larger than the curve cache limit (curveCacheMB, see curve_cache) are not calculated in
+memory. They are calculated in blocks of records straight into a memory-mapped .npy file
+in the curves folder of the output folder. The plots, CSVs and critical-point steps read
+slices of the matrix and the OS pages it in and out. The curves are calculated for the
+distinct parameter sets (see curve_cache), one row each; if records share parameter sets,
+the rows are then copied to the records in blocks into a second file (see scatterStore).
+
+Each matrix has a small XML header next to it (same name, .xml) with the model, the
+pressure grid, the number of records, the fields (Se, theta, Kh and Ktheta for MVG) and
+the data type, so that it can be opened again with openStore.
+'''
+
+import hashlib
+import os
+import xml.etree.cElementTree as ET
+import numpy as np
+
+import configuration
+
+# Data types of the stored curves, none keeps every matrix in memory
+storeTypes = ['none', 'float32', 'float64']
+defaultStoreType = 'none'
+
+# Output folder of the run (see setFolder)
+_storeFolder = [None]
+
+def setFolder(outputFolder):
+
+    # The curve files of a run are written to the curves folder of its output folder
+    _storeFolder[0] = outputFolder
+
+def getStoreType():
+
+    # Fetch the data type of the stored curves from the user settings file
+    storeType = defaultStoreType
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            storeType = root.find("curveStore").text.strip().lower()
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just keep the curves in memory.
+
+    if storeType not in storeTypes:
+        storeType = defaultStoreType
+
+    return storeType
+
+def useStore(numBytes, limit):
+
+    # Only matrices larger than the memory limit are stored, if a store type and folder are set
+    return _storeFolder[0] is not None and numBytes > limit and getStoreType() != 'none'
+
+def _blockParams(paramArrays, start, end):
+
+    return [None if p is None else np.asarray(p, dtype=np.float64).ravel()[start:end] for p in paramArrays]
+
+def computeStore(model, storeKey, curveFxn, pressures, paramArrays, blockBytes):
+
+    '''
+    Calculates curveFxn(pressures, *paramArrays) in blocks of records of about blockBytes
+    into a memory-mapped .npy file and returns it, opened read-only.
+    curveFxn returns an N x P array, or an N x P structured array (MVG).
+    storeKey identifies the parameter set and the pressure grid (it names the file).
+    '''
+
+    storeType = getStoreType()
+    pressures = np.asarray(pressures, dtype=np.float64).ravel()
+    numRecords = len(np.asarray(paramArrays[0]).ravel())
+
+    # Room for the four fields of the MVG curves in each block
+    blockRecords = max(int(blockBytes // (32 * max(len(pressures), 1))), 1)
+
+    curveFile = _curveFile(model, storeKey)
+
+    curves = None
+
+    for start in range(0, numRecords, blockRecords):
+        end = min(start + blockRecords, numRecords)
+        block = curveFxn(pressures, *_blockParams(paramArrays, start, end))
+
+        if curves is None:
+            if block.dtype.names is None:
+                dtype = np.dtype(storeType)
+            else:
+                dtype = np.dtype([(name, storeType) for name in block.dtype.names])
+
+            curves = np.lib.format.open_memmap(curveFile, mode='w+', dtype=dtype, shape=(numRecords, len(pressures)))
+
+        if block.dtype.names is None:
+            curves[start:end] = block
+        else:
+            for name in block.dtype.names:
+                curves[name][start:end] = block[name]
+
+    if curves is None:
+        return curveFxn(pressures, *paramArrays)
+
+    fields = curves.dtype.names
+    curves.flush()
+    del curves
+
+    _writeHeader(curveFile, model, pressures, numRecords, fields, storeType)
+
+    return np.load(curveFile, mmap_mode='r')
+
+def scatterStore(model, storeKey, pressures, curves, inverse, blockBytes):
+
+    '''
+    Copies the rows of a stored matrix of the distinct parameter sets to the records (row
+    inverse[i] for record i, see dedup) in blocks of records of about blockBytes, into a
+    second memory-mapped .npy file, and returns it opened read-only. The whole matrix of
+    the records is never held in memory.
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).ravel()
+    numRecords = len(inverse)
+    rowBytes = max(curves.dtype.itemsize * max(len(pressures), 1), 1)
+    blockRecords = max(int(blockBytes // rowBytes), 1)
+
+    recordFile = _curveFile(model, storeKey, '_records')
+    records = np.lib.format.open_memmap(recordFile, mode='w+', dtype=curves.dtype, shape=(numRecords, len(pressures)))
+
+    for start in range(0, numRecords, blockRecords):
+        end = min(start + blockRecords, numRecords)
+        records[start:end] = curves[inverse[start:end]]
+
+    fields = records.dtype.names
+    storeType = str(records.dtype[0] if fields is not None else records.dtype)
+    records.flush()
+    del records
+
+    _writeHeader(recordFile, model, pressures, numRecords, fields, storeType)
+
+    return np.load(recordFile, mmap_mode='r')
+
+def _curveFile(model, storeKey, suffix=''):
+
+    # Curve files of the run are named from the model and the hash of the parameter set and pressure grid
+    storeFolder = os.path.join(_storeFolder[0], 'curves')
+    if not os.path.exists(storeFolder):
+        os.mkdir(storeFolder)
+
+    return os.path.join(storeFolder, model + '_' + hashlib.md5(storeKey.encode('utf-8')).hexdigest()[:12] + suffix + '.npy')
+
+def getHeaderFile(curveFile):
+    return os.path.splitext(curveFile)[0] + '.xml'
+
+def _writeHeader(curveFile, model, pressures, numRecords, fields, storeType):
+
+    root = ET.Element("data")
+
+    for name, value in [("curveFile", os.path.basename(curveFile)),
+                        ("model", model),
+                        ("records", str(numRecords)),
+                        ("pressures", ' '.join(repr(float(pressure)) for pressure in pressures)),
+                        ("fields", '' if fields is None else ' '.join(fields)),
+                        ("dataType", storeType)]:
+        node = ET.SubElement(root, name)
+        node.text = value
+
+    ET.ElementTree(root).write(getHeaderFile(curveFile), encoding='utf-8')
+
+def openStore(curveFile, mode='r'):
+
+    '''
+    Opens a stored curve matrix. Returns the pressure grid (kPa) from its header and the
+    memory-mapped N x P matrix (a structured array with one field per curve for MVG).
+    '''
+
+    root = ET.parse(getHeaderFile(curveFile)).getroot()
+    pressures = np.array([float(pressure) for pressure in root.find("pressures").text.split()])
+
+    return pressures, np.load(curveFile, mmap_mode=mode)
@@ -0,0 +1,1821 @@
+'''
+Data access for the PTF tools: list, read, add and write fields and copy datasets.
+
+The PTF modules and the solo drivers read and write their tables through the
+functions below instead of calling arcpy directly. Four backends are available:
+
+    arcpy  - arcpy.da cursors and the management tools (shapefiles, geodatabases)
+    dbf    - pure Python, reads and rewrites the .dbf of a shapefile (or a .dbf table)
+    csv    - pure Python, reads and rewrites a CSV table
+    raster - pure Python, reads and writes a folder of aligned float grids (.flt and .hdr)
+
+CSV files always use the csv backend and folders the raster backend. Shapefiles and
+.dbf tables use arcpy if it can be imported, otherwise the dbf backend;
+setBackend('python') forces the pure Python backends (e.g. to compare the results of both).
+
+Reads are bulk, columnar reads (TableToNumPyArray with arcpy) returning a structured
+NumPy array of only the requested fields, without geometry. Numeric fields are float64
+with NaN for missing values (the OID field is an integer) and text fields are strings.
+The arrays are cached per dataset until clearCache() is called at the start of a run,
+so the solo driver and the PTF functions share one read of the input fields.
+
+Columns passed to writeColumns have one value per record, in record order.
+Between startOutput and writeOutput the fields added and the columns written to a
+dataset are held in memory, then the new fields are created and all the columns are
+written in one pass (ExtendTable with arcpy, one rewrite of the file otherwise).
+
+Large layers are processed with streamTable: the input fields are read in chunks of
+records (chunkRecords node of user_settings.xml) and the output of each chunk is written
+before the next one is read, so that only one chunk is held in memory.
+The OID field of the pure Python backends is virtual: FID (from 0) for shapefiles and
+.dbf tables, OID (from 1) for CSV files and CELL (from 0) for raster stacks, whose
+cells are read in strips of whole rows (see createRasterOutput).
+
+The outputMode node of user_settings.xml sets how the tools create their output (see
+createOutput): 'copy' (default) adds the results to a copy of the input, 'table' writes
+only the results to a side table keyed by the OID of the input, without touching the
+geometry. Fields of the input are read through the side table from its source.
+
+The output fields of a tool can also be exported, with the OID and LUCIname of each record,
+to a columnar file (Parquet, Arrow or .npz, see startExport and the columnar module).
+'''
+
+import os
+import sys
+import csv
+import shutil
+import struct
+import datetime
+from collections import OrderedDict
+import xml.etree.cElementTree as ET
+import numpy as np
+
+import configuration
+
+from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
+import LUCI_PTFs.lib.log as log
+import LUCI_PTFs.lib.columnar as columnar
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, columnar])
+
+try:
+    import arcpy
+    backend = 'arcpy'
+
+except ImportError:
+    arcpy = None
+    backend = 'python'
+
+def setBackend(name):
+
+    global backend
+
+    if name not in ['arcpy', 'python']:
+        log.error('Data access backend not recognised: ' + str(name))
+        sys.exit()
+
+    if name == 'arcpy' and arcpy is None:
+        log.error('arcpy is not available, use the python data access backend')
+        sys.exit()
+
+    backend = name
+
+# Structured arrays read from each dataset in this run (see readTable)
+_tableCache = {}
+
+# Output buffers of the datasets between startOutput and writeOutput
+_outputBuffers = {}
+
+# Source dataset of each side table (see createOutput)
+_sources = {}
+
+# Columnar exports of the output of datasets (see startExport)
+_exports = {}
+
+# Default number of records per chunk of streamTable, if it is not set in user_settings.xml
+defaultChunkRecords = 100000
+
+# Output modes and the key field of the side tables
+outputModes = ['copy', 'table']
+defaultOutputMode = 'copy'
+keyField = 'SRC_OID'
+
+# Nulls in integer fields are read as this value by TableToNumPyArray, then set to NaN
+_intNull = -2147483648
+
+def _pyValue(value):
+
+    # NumPy scalars to Python values for the cursors and writers
+    if hasattr(value, 'item'):
+        return value.item()
+
+    return value
+
+def openCSV(path, mode):
+
+    '''
+    Opens a CSV file for the csv module: in binary mode on Python 2, and in text mode
+    without newline translation on Python 3.
+    '''
+
+    if six.PY2:
+        return open(path, mode + 'b')
+
+    return open(path, mode, newline='')
+
+#####################
+### arcpy backend ###
+#####################
+
+class _ArcpyTable(object):
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def listFields(self):
+        return [field.name for field in arcpy.ListFields(self.dataset)]
+
+    def getOIDField(self):
+        return str(arcpy.Describe(self.dataset).oidFieldName)
+
+    def readColumns(self, fields):
+
+        columns = [[] for field in fields]
+
+        with arcpy.da.SearchCursor(self.dataset, fields) as searchCursor:
+            for row in searchCursor:
+                for i in range(0, len(fields)):
+                    columns[i].append(row[i])
+
+        return columns
+
+    def countRecords(self):
+        return int(arcpy.GetCount_management(self.dataset).getOutput(0))
+
+    def iterColumns(self, fields, chunkSize):
+
+        # Yields the columns of the fields for each chunk of chunkSize records. Each chunk is read
+        # in bulk by its range of OIDs, so no cursor is held open while the chunk is processed
+        OIDField = self.getOIDField()
+        OIDs = self._readOIDs()
+
+        for start in range(0, len(OIDs), chunkSize):
+            chunkOIDs = OIDs[start:start + chunkSize]
+            table = self.readTable(fields, self._OIDRange(OIDField, chunkOIDs))
+
+            yield [table[field] for field in fields]
+
+    def readTable(self, fields, whereClause=None):
+
+        OIDField = self.getOIDField()
+        fieldTypes = dict((field.name.lower(), field.type) for field in arcpy.ListFields(self.dataset))
+
+        nullValues = {}
+        for field in fields:
+            fieldType = fieldTypes.get(field.lower())
+
+            if fieldType in ['Double', 'Single']:
+                nullValues[field] = np.nan
+            elif fieldType in ['Integer', 'SmallInteger'] and field != OIDField:
+                nullValues[field] = _intNull
+            elif fieldType == 'String':
+                nullValues[field] = ''
+
+        table = arcpy.da.TableToNumPyArray(self.dataset, fields, where_clause=whereClause, skip_nulls=False, null_value=nullValues)
+
+        return _normalise(table, OIDField)
+
+    def _readOIDs(self):
+
+        # OIDs of the records in the order of the cursors
+        OIDField = self.getOIDField()
+        return np.sort(arcpy.da.TableToNumPyArray(self.dataset, [OIDField])[OIDField].astype(np.int32))
+
+    def _OIDRange(self, OIDField, OIDs):
+
+        # Where clause selecting the records from the first to the last of the sorted OIDs
+        delimited = arcpy.AddFieldDelimiters(self.dataset, OIDField)
+        return delimited + ' >= ' + str(int(OIDs[0])) + ' AND ' + delimited + ' <= ' + str(int(OIDs[-1]))
+
+    def addField(self, field, fieldType, precision=None, scale=None):
+
+        if precision is None:
+            arcpy.AddField_management(self.dataset, field, fieldType)
+        else:
+            arcpy.AddField_management(self.dataset, field, fieldType, precision, scale)
+
+    def writeColumns(self, fields, columns):
+
+        recordNum = 0
+        with arcpy.da.UpdateCursor(self.dataset, fields) as cursor:
+            for row in cursor:
+                for i in range(0, len(fields)):
+                    row[i] = _pyValue(columns[i][recordNum])
+
+                cursor.updateRow(row)
+                recordNum += 1
+
+    def writeOutput(self, newFields, fields, columns):
+
+        existing = [name.lower() for name in self.listFields()]
+        newFields = [newField for newField in newFields if newField[0].lower() not in existing]
+        newNames = [newField[0].lower() for newField in newFields]
+
+        if len(newFields) > 0:
+
+            # The new fields are created from the array types and filled in one ExtendTable call
+            OIDField = self.getOIDField()
+            OIDs = arcpy.da.TableToNumPyArray(self.dataset, [OIDField])[OIDField].astype(np.int32)
+            written = dict((field.lower(), column) for field, column in zip(fields, columns))
+
+            names = ["JOIN_OID"]
+            arrays = [OIDs]
+
+            for field, fieldType, precision, scale in newFields:
+                names.append(field)
+                arrays.append(self._extendArray(field, fieldType, written.get(field.lower()), len(OIDs)))
+
+            arcpy.da.ExtendTable(self.dataset, OIDField, _structured(names, arrays), "JOIN_OID")
+
+        # Fields which already existed are written in one cursor pass
+        existingFields = [field for field in fields if field.lower() not in newNames]
+
+        if len(existingFields) > 0:
+            self.writeColumns(existingFields, [columns[fields.index(field)] for field in existingFields])
+
+    def startStream(self, newFields, fields):
+
+        # The new fields are created in one ExtendTable call before the first chunk is written
+        existing = [name.lower() for name in self.listFields()]
+        newFields = [newField for newField in newFields if newField[0].lower() not in existing]
+
+        OIDField = self.getOIDField()
+        OIDs = self._readOIDs()
+
+        if len(newFields) > 0:
+            names = ["JOIN_OID"]
+            arrays = [OIDs]
+
+            for field, fieldType, precision, scale in newFields:
+                names.append(field)
+                arrays.append(self._extendArray(field, fieldType, None, len(OIDs)))
+
+            arcpy.da.ExtendTable(self.dataset, OIDField, _structured(names, arrays), "JOIN_OID")
+
+        self._streamFields = fields
+        self._streamOIDs = OIDs
+        self._streamStart = 0
+
+    def writeChunk(self, columns):
+
+        # Each chunk is written by an update cursor over its range of OIDs, closed before the next chunk is read
+        numRecords = len(columns[0]) if len(columns) > 0 else 0
+
+        if numRecords == 0:
+            return
+
+        chunkOIDs = self._streamOIDs[self._streamStart:self._streamStart + numRecords]
+        self._streamStart += numRecords
+
+        recordNum = 0
+        with arcpy.da.UpdateCursor(self.dataset, self._streamFields, self._OIDRange(self.getOIDField(), chunkOIDs)) as cursor:
+            for row in cursor:
+                for i in range(0, len(columns)):
+                    row[i] = _pyValue(columns[i][recordNum])
+
+                cursor.updateRow(row)
+                recordNum += 1
+
+    def endStream(self, completed=True):
+
+        # No cursor is left open between the chunks
+        del self._streamFields, self._streamOIDs, self._streamStart
+
+    def _extendArray(self, field, fieldType, column, numRecords):
+
+        if column is None:
+            column = [None] * numRecords
+
+        # Numeric arrays are converted without visiting each value
+        if isinstance(column, np.ndarray):
+            if fieldType in ['DOUBLE', 'FLOAT'] and column.dtype.kind in 'biuf':
+                return column.astype(np.float64)
+
+            elif fieldType in ['LONG', 'SHORT'] and column.dtype.kind in 'biu':
+                return column.astype(np.int32)
+
+        if fieldType in ['DOUBLE', 'FLOAT']:
+            return np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+
+        elif fieldType in ['LONG', 'SHORT']:
+            return np.array([0 if value is None else value for value in column], dtype=np.int32)
+
+        elif fieldType == 'TEXT':
+            return np.array([u'' if value is None else six.text_type(value) for value in column], dtype='<U255')
+
+        log.error('Field type not supported in the output of ' + str(self.dataset) + ': ' + str(field) + ' (' + str(fieldType) + ')')
+        sys.exit()
+
+    def keepFields(self, fieldsToKeep):
+
+        desc = arcpy.Describe(self.dataset)
+        fieldNameList = [field.name for field in arcpy.ListFields(self.dataset) if not field.required and field.name not in fieldsToKeep]
+
+        # dBASE tables require a field other than an OID and Shape.  If this is
+        #  the case, retain an extra field (the first one in the original list)
+        if desc.dataType in ["ShapeFile", "DbaseTable"]:
+            fieldNameList = fieldNameList[1:]
+
+        if len(fieldNameList) > 0:
+            arcpy.DeleteField_management(self.dataset, fieldNameList)
+
+    def create(self, keyField, keys):
+
+        if arcpy.Exists(self.dataset):
+            arcpy.Delete_management(self.dataset)
+
+        arcpy.da.NumPyArrayToTable(_structured([keyField], [np.asarray(keys, dtype=np.int32)]), self.dataset)
+
+    def copy(self, outDataset):
+
+        if arcpy.Describe(self.dataset).dataType in ['ShapeFile', 'FeatureClass', 'FeatureLayer']:
+            arcpy.CopyFeatures_management(self.dataset, outDataset)
+        else:
+            arcpy.CopyRows_management(self.dataset, outDataset)
+
+##########################################
+### Pure Python backends (DBF and CSV) ###
+##########################################
+
+class _PythonTable(object):
+
+    '''
+    Base of the pure Python backends. The table is read into memory as a list of
+    field names and one list of values per record, and rewritten after each change.
+    Streamed reads and writes (iterColumns, startStream) go one record at a time.
+    '''
+
+    OIDField = None
+    OIDStart = 0
+
+    # True if the table must keep a field other than the OID (see keepFields)
+    retainField = False
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.tableFile = dataset
+
+    def _read(self):
+        names, types = self._fields()
+        return names, types, list(self._iterRecords())
+
+    def _write(self, names, types, records):
+
+        self._startWrite(self.tableFile, names, types)
+
+        for record in records:
+            self._writeRecord(record)
+
+        self._endWrite()
+
+    def listFields(self):
+        names, types = self._fields()
+        return [self.OIDField] + names
+
+    def countRecords(self):
+        return sum(1 for record in self._iterRecords())
+
+    def getOIDField(self):
+        return self.OIDField
+
+    def readColumns(self, fields):
+
+        names, types, records = self._read()
+        columns = []
+
+        for field in fields:
+            if field == self.OIDField:
+                columns.append(list(range(self.OIDStart, self.OIDStart + len(records))))
+            else:
+                i = self._fieldIndex(names, field)
+                columns.append([record[i] for record in records])
+
+        return columns
+
+    def readTable(self, fields):
+        return _columnsTable(fields, self.readColumns(fields), self.OIDField)
+
+    def iterColumns(self, fields, chunkSize):
+
+        # Yields the columns of the fields for each chunk of chunkSize records
+        names, types = self._fields()
+        indexes = [None if field == self.OIDField else self._fieldIndex(names, field) for field in fields]
+
+        columns = [[] for field in fields]
+        recordNum = self.OIDStart
+
+        for record in self._iterRecords():
+            for i, index in enumerate(indexes):
+                columns[i].append(recordNum if index is None else record[index])
+
+            recordNum += 1
+
+            if len(columns[0]) == chunkSize:
+                yield columns
+                columns = [[] for field in fields]
+
+        if len(columns[0]) > 0:
+            yield columns
+
+    def addField(self, field, fieldType, precision=None, scale=None):
+        self.writeOutput([(field, fieldType, precision, scale)], [], [])
+
+    def writeColumns(self, fields, columns):
+        self.writeOutput([], fields, columns)
+
+    def writeOutput(self, newFields, fields, columns):
+
+        # Adds the new fields and writes the columns with one read and one rewrite of the table
+        names, types, records = self._read()
+        lowerNames = [name.lower() for name in names]
+
+        for field, fieldType, precision, scale in newFields:
+
+            # As AddField_management, adding an existing field does nothing
+            if field.lower() in lowerNames:
+                continue
+
+            names.append(field)
+            lowerNames.append(field.lower())
+            types.append(self._fieldType(fieldType, precision, scale))
+
+            for record in records:
+                record.append(None)
+
+        for field, column in zip(fields, columns):
+            if field == self.OIDField:
+                continue
+
+            i = self._fieldIndex(names, field)
+
+            for recordNum in range(0, len(records)):
+                records[recordNum][i] = _pyValue(column[recordNum])
+
+        self._write(names, types, records)
+
+    def create(self, keyField, keys):
+        self._write([keyField], [self._fieldType('LONG', None, None)], [[key] for key in keys])
+
+    def keepFields(self, fieldsToKeep):
+
+        names, types, records = self._read()
+        deleted = [i for i in range(0, len(names)) if names[i] not in fieldsToKeep]
+
+        # As with arcpy, the first field which is not kept is retained in a dBASE table
+        if self.retainField:
+            deleted = deleted[1:]
+
+        if len(deleted) == 0:
+            return
+
+        kept = [i for i in range(0, len(names)) if i not in deleted]
+
+        self._write([names[i] for i in kept], [types[i] for i in kept], [[record[i] for i in kept] for record in records])
+
+    def startStream(self, newFields, fields):
+
+        # The table is rewritten to a temporary file as the chunks are written (see writeChunk)
+        names, types = self._fields()
+        numFields = len(names)
+        lowerNames = [name.lower() for name in names]
+
+        for field, fieldType, precision, scale in newFields:
+            if field.lower() not in lowerNames:
+                names.append(field)
+                lowerNames.append(field.lower())
+                types.append(self._fieldType(fieldType, precision, scale))
+
+        self._streamIndexes = [None if field == self.OIDField else self._fieldIndex(names, field) for field in fields]
+        self._streamNewFields = len(names) - numFields
+        self._streamRecords = self._iterRecords()
+
+        self._startWrite(self.tableFile + '.tmp', names, types)
+
+    def writeChunk(self, columns):
+
+        # Writes the next len(columns[0]) records with the columns set
+        for recordNum in range(0, len(columns[0]) if len(columns) > 0 else 0):
+            record = next(self._streamRecords) + [None] * self._streamNewFields
+
+            for index, column in zip(self._streamIndexes, columns):
+                if index is not None:
+                    record[index] = _pyValue(column[recordNum])
+
+            self._writeRecord(record)
+
+    def endStream(self, completed=True):
+
+        if completed:
+            # Records after the last chunk are copied unchanged
+            for record in self._streamRecords:
+                self._writeRecord(record + [None] * self._streamNewFields)
+
+        else:
+            self._streamRecords.close()
+
+        self._endWrite()
+
+        if completed:
+            os.remove(self.tableFile)
+            os.rename(self.tableFile + '.tmp', self.tableFile)
+        else:
+            os.remove(self.tableFile + '.tmp')
+
+    def _fieldIndex(self, names, field):
+
+        lowerNames = [name.lower() for name in names]
+
+        if field.lower() not in lowerNames:
+            log.error('Field ' + str(field) + ' not found in ' + str(self.dataset))
+            sys.exit()
+
+        return lowerNames.index(field.lower())
+
+class _DBFTable(_PythonTable):
+
+    '''
+    dBASE III table, as used for the attributes of a shapefile. Field types are
+    stored as (type, length, decimals), e.g. ('N', 19, 11) or ('C', 254, 0).
+    '''
+
+    OIDField = 'FID'
+    OIDStart = 0
+    retainField = True
+
+    # Extensions of the files making up a shapefile
+    shpExtensions = ['.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx', '.shp.xml']
+
+    def __init__(self, dataset):
+        super(_DBFTable, self).__init__(dataset)
+        self.tableFile = os.path.splitext(dataset)[0] + '.dbf'
+
+    def _encoding(self):
+
+        cpgFile = os.path.splitext(self.tableFile)[0] + '.cpg'
+
+        if os.path.exists(cpgFile):
+            with open(cpgFile, 'r') as f:
+                encoding = f.read().strip()
+
+            if encoding.upper() in ['UTF-8', 'UTF8', '65001']:
+                return 'utf-8'
+
+        return 'latin-1'
+
+    def _fieldType(self, fieldType, precision, scale):
+
+        if fieldType == 'TEXT':
+            return ('C', 254, 0)
+        elif fieldType in ['DOUBLE', 'FLOAT']:
+            return ('N', 19, 11 if scale is None else int(scale))
+        elif fieldType == 'LONG':
+            return ('N', 10, 0)
+        elif fieldType == 'SHORT':
+            return ('N', 5, 0)
+        elif fieldType == 'DATE':
+            return ('D', 8, 0)
+        else:
+            log.error('Field type not supported by the dbf backend: ' + str(fieldType))
+            sys.exit()
+
+    def _readHeader(self, f, encoding):
+
+        header = f.read(32)
+        numRecords, headerLength, recordLength = struct.unpack('<xxxxLHH20x', header)
+
+        names = []
+        types = []
+        numFields = (headerLength - 33) // 32
+
+        for i in range(0, numFields):
+            fieldDesc = f.read(32)
+            name, fieldType, length, decimals = struct.unpack('<11sc4xBB14x', fieldDesc)
+            names.append(name.split(b'\x00')[0].decode(encoding))
+            types.append((fieldType.decode('ascii'), length, decimals))
+
+        return names, types, numRecords, headerLength, recordLength
+
+    def _fields(self):
+
+        with open(self.tableFile, 'rb') as f:
+            names, types, numRecords, headerLength, recordLength = self._readHeader(f, self._encoding())
+
+        return names, types
+
+    def _iterRecords(self):
+
+        # Yields the records one at a time, so that the table is never held in memory
+        encoding = self._encoding()
+
+        with open(self.tableFile, 'rb') as f:
+            names, types, numRecords, headerLength, recordLength = self._readHeader(f, encoding)
+            f.seek(headerLength)
+
+            for i in range(0, numRecords):
+                data = f.read(recordLength)
+
+                # Skip deleted records
+                if data[:1] == b'*':
+                    continue
+
+                record = []
+                pos = 1
+                for fieldType in types:
+                    value = data[pos:pos + fieldType[1]]
+                    record.append(self._decode(value, fieldType, encoding))
+                    pos += fieldType[1]
+
+                yield record
+
+    def _decode(self, value, fieldType, encoding):
+
+        code, length, decimals = fieldType
+        text = value.decode(encoding).strip().rstrip('\x00')
+
+        if code in ['N', 'F']:
+            if text == '' or text.startswith('*'):
+                return None
+            if decimals == 0 and '.' not in text and 'e' not in text.lower():
+                return int(text)
+            return float(text)
+
+        elif code == 'L':
+            if text in ['Y', 'y', 'T', 't']:
+                return True
+            if text in ['N', 'n', 'F', 'f']:
+                return False
+            return None
+
+        elif code == 'D':
+            if text == '':
+                return None
+            return datetime.date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+
+        return text
+
+    def _encode(self, value, fieldType, encoding):
+
+        code, length, decimals = fieldType
+
+        if value is None or (isinstance(value, float) and value != value):
+            text = ''
+
+        elif code in ['N', 'F']:
+            if decimals == 0:
+                text = str(int(round(value)))
+            else:
+                text = ('%.' + str(decimals) + 'f') % value
+
+                # Use exponent notation if the fixed notation does not fit
+                if len(text) > length:
+                    text = ('%.' + str(max(length - 7, 1)) + 'e') % value
+
+            text = text.rjust(length)
+
+        elif code == 'L':
+            text = 'T' if value else 'F'
+
+        elif code == 'D':
+            text = value.strftime('%Y%m%d')
+
+        else:
+            text = six.text_type(value)
+
+        data = text.encode(encoding)[:length]
+        return data + b' ' * (length - len(data))
+
+    def _startWrite(self, path, names, types):
+
+        # The number of records is set in the header by _endWrite
+        self._outEncoding = self._encoding()
+        self._outTypes = types
+        self._outCount = 0
+
+        recordLength = 1 + sum(fieldType[1] for fieldType in types)
+        headerLength = 32 + 32 * len(names) + 1
+        today = datetime.date.today()
+
+        self._out = open(path, 'wb')
+        self._out.write(struct.pack('<BBBBLHH20x', 3, today.year - 1900, today.month, today.day,
+                                    0, headerLength, recordLength))
+
+        for name, fieldType in zip(names, types):
+            code, length, decimals = fieldType
+            self._out.write(struct.pack('<11sc4xBB14x', name.encode(self._outEncoding)[:10], code.encode('ascii'),
+                                        length, decimals))
+
+        self._out.write(b'\r')
+
+    def _writeRecord(self, record):
+
+        self._out.write(b' ')
+        for value, fieldType in zip(record, self._outTypes):
+            self._out.write(self._encode(value, fieldType, self._outEncoding))
+
+        self._outCount += 1
+
+    def _endWrite(self):
+
+        self._out.write(b'\x1a')
+        self._out.seek(4)
+        self._out.write(struct.pack('<L', self._outCount))
+        self._out.close()
+
+    def copy(self, outDataset):
+
+        inBase = os.path.splitext(self.dataset)[0]
+        outBase = os.path.splitext(outDataset)[0]
+
+        for ext in self.shpExtensions:
+            if os.path.exists(inBase + ext):
+                shutil.copyfile(inBase + ext, outBase + ext)
+
+class _CSVTable(_PythonTable):
+
+    '''
+    CSV table with the field names in the first row. Numbers are read as floats
+    and empty cells as None. Field types are not stored.
+    '''
+
+    OIDField = 'OID'
+    OIDStart = 1
+
+    def _fieldType(self, fieldType, precision, scale):
+        return fieldType
+
+    def _open(self, path, mode):
+        return openCSV(path, mode)
+
+    def _fields(self):
+
+        with self._open(self.tableFile, 'r') as csv_file:
+            names = next(csv.reader(csv_file), [])
+
+        return names, [None for name in names]
+
+    def _iterRecords(self):
+
+        with self._open(self.tableFile, 'r') as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader, None)
+
+            for row in reader:
+                yield [self._decode(value) for value in row]
+
+    def _decode(self, value):
+
+        if value == '':
+            return None
+
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    def _startWrite(self, path, names, types):
+
+        self._out = self._open(path, 'w')
+        self._outWriter = csv.writer(self._out)
+        self._outWriter.writerow(names)
+
+    def _writeRecord(self, record):
+        self._outWriter.writerow(['' if value is None else value for value in record])
+
+    def _endWrite(self):
+        self._out.close()
+
+    def copy(self, outDataset):
+        shutil.copyfile(self.dataset, outDataset)
+
+##########################################
+### Raster stacks (flat binary grids) ###
+##########################################
+
+# Header keys which must be equal for the grids of a stack to be aligned
+_alignKeys = ['ncols', 'nrows', 'xllcorner', 'yllcorner', 'xllcenter', 'yllcenter', 'cellsize']
+
+# Field types written to grids, other fields (e.g. the warning text) are not written
+_gridTypes = ['DOUBLE', 'FLOAT', 'LONG', 'SHORT']
+
+def _readGridHeader(headerFile):
+
+    # ESRI grid header (.hdr): one key and value per line, keys matched without case
+    header = OrderedDict()
+
+    with open(headerFile, 'r') as f:
+        for line in f:
+            parts = line.split()
+
+            if len(parts) >= 2:
+                header[parts[0].lower()] = parts[1]
+
+    return header
+
+def _writeGridHeader(headerFile, header):
+
+    with open(headerFile, 'w') as f:
+        for key, value in header.items():
+            if key == 'nodata_value':
+                key = 'NODATA_value'
+
+            f.write(key.ljust(14) + str(value) + '\n')
+
+class _RasterStack(object):
+
+    '''
+    Raster stack: a folder of aligned single-band float grids (ESRI .flt with a .hdr),
+    one per field. Each cell is a record, in row-major order from the top left cell.
+    The OID field CELL (from 0) and LUCIname (the row and column of the cell, e.g. R12C40)
+    are virtual. NODATA cells are read as NaN and
+    NaN is written as NODATA. The grids are read and written in strips of whole rows.
+    Only numeric fields are written, text fields such as the warnings are left out.
+    '''
+
+    OIDField = 'CELL'
+    nameField = 'LUCIname'
+    headerFile = 'stack.hdr'
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._header = None
+
+    def _gridFile(self, name, ext='.flt'):
+        return os.path.join(self.dataset, name + ext)
+
+    def _grids(self):
+
+        if not os.path.isdir(self.dataset):
+            return []
+
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.dataset) if name.lower().endswith('.flt'))
+
+    def _gridName(self, field):
+
+        # Name of the grid of the field (matched without case), None if there is none
+        for name in self._grids():
+            if name.lower() == field.lower():
+                return name
+
+        return None
+
+    def getHeader(self):
+
+        # Header of the stack (stack.hdr, or the header of its first grid), all the grids must match it
+        if self._header is not None:
+            return self._header
+
+        headerFiles = [self._gridFile(name, '.hdr') for name in self._grids()]
+
+        if os.path.exists(os.path.join(self.dataset, self.headerFile)):
+            headerFiles.insert(0, os.path.join(self.dataset, self.headerFile))
+
+        if len(headerFiles) == 0:
+            log.error('No grids (.flt) found in the raster stack ' + str(self.dataset))
+            sys.exit()
+
+        header = _readGridHeader(headerFiles[0])
+
+        for headerFile in headerFiles[1:]:
+            gridHeader = _readGridHeader(headerFile)
+
+            for key in _alignKeys:
+                if key in header and (key not in gridHeader or float(gridHeader[key]) != float(header[key])):
+                    log.error('Grid ' + str(headerFile) + ' is not aligned with the raster stack ' + str(self.dataset) + ' (' + key + ')')
+                    sys.exit()
+
+        self._header = header
+
+        return header
+
+    def _gridInfo(self):
+
+        # Number of columns and rows, data type and NODATA value of the grids
+        header = self.getHeader()
+
+        if header.get('byteorder', 'LSBFIRST').upper() == 'MSBFIRST':
+            dtype = np.dtype('>f4')
+        else:
+            dtype = np.dtype('<f4')
+
+        return int(header['ncols']), int(header['nrows']), dtype, float(header.get('nodata_value', -9999))
+
+    def listFields(self):
+
+        return [self.OIDField] + self._grids() + [self.nameField]
+
+    def getOIDField(self):
+        return self.OIDField
+
+    def countRecords(self):
+
+        ncols, nrows, dtype, nodata = self._gridInfo()
+
+        return ncols * nrows
+
+    def _cellNames(self, cells, ncols):
+
+        rows = (cells // ncols).astype(str)
+        cols = (cells % ncols).astype(str)
+
+        return np.char.add(np.char.add(np.char.add('R', rows), 'C'), cols)
+
+    def iterColumns(self, fields, chunkSize):
+
+        # Yields the columns of the fields (arrays) for each strip of rows of about chunkSize cells
+        ncols, nrows, dtype, nodata = self._gridInfo()
+        rowsPerChunk = max(chunkSize // ncols, 1)
+
+        gridFiles = []
+
+        try:
+            for field in fields:
+                name = None if field in [self.OIDField, self.nameField] else self._gridName(field)
+
+                if name is None and field not in [self.OIDField, self.nameField]:
+                    log.error('Field ' + str(field) + ' not found in ' + str(self.dataset))
+                    sys.exit()
+
+                gridFiles.append(None if name is None else open(self._gridFile(name), 'rb'))
+
+            for row in range(0, nrows, rowsPerChunk):
+                numRows = min(rowsPerChunk, nrows - row)
+                cells = np.arange(row * ncols, (row + numRows) * ncols)
+                columns = []
+
+                for field, gridFile in zip(fields, gridFiles):
+                    if gridFile is not None:
+                        values = np.fromfile(gridFile, dtype=dtype, count=len(cells)).astype(np.float64)
+                        values[values == nodata] = np.nan
+                        columns.append(values)
+
+                    elif field == self.OIDField:
+                        columns.append(cells)
+
+                    else:
+                        columns.append(self._cellNames(cells, ncols))
+
+                yield columns
+
+        finally:
+            for gridFile in gridFiles:
+                if gridFile is not None:
+                    gridFile.close()
+
+    def readTable(self, fields):
+
+        chunks = self.iterColumns(fields, max(self.countRecords(), 1))
+
+        try:
+            columns = next(chunks)
+        finally:
+            chunks.close()
+
+        return _columnsTable(fields, columns, self.OIDField)
+
+    def readColumns(self, fields):
+
+        table = self.readTable(fields)
+
+        return [table[name].tolist() for name in table.dtype.names]
+
+    def _gridValues(self, column, dtype, nodata):
+
+        # Column to grid values, with NODATA for NaN and None
+        values = np.asarray(column, dtype=np.float64)
+
+        return np.where(np.isfinite(values), values, nodata).astype(dtype)
+
+    def _newGrids(self, newFields):
+
+        # Names of the new fields which are written to new grids
+        return [field for field, fieldType, precision, scale in newFields
+                if fieldType.upper() in _gridTypes and self._gridName(field) is None]
+
+    def _writeHeader(self, name):
+        _writeGridHeader(self._gridFile(name, '.hdr'), self.getHeader())
+
+    def addField(self, field, fieldType, precision=None, scale=None):
+        self.writeOutput([(field, fieldType, precision, scale)], [], [])
+
+    def writeColumns(self, fields, columns):
+        self.writeOutput([], fields, columns)
+
+    def writeOutput(self, newFields, fields, columns):
+
+        # New numeric fields are created as grids of NODATA, then each column is written to its grid
+        ncols, nrows, dtype, nodata = self._gridInfo()
+
+        for name in self._newGrids(newFields):
+            self._writeHeader(name)
+
+            with open(self._gridFile(name), 'wb') as gridFile:
+                for row in range(0, nrows):
+                    np.full(ncols, nodata, dtype=dtype).tofile(gridFile)
+
+        for field, column in zip(fields, columns):
+            name = None if field in [self.OIDField, self.nameField] else self._gridName(field)
+
+            if name is not None:
+                with open(self._gridFile(name), 'wb') as gridFile:
+                    self._gridValues(column, dtype, nodata).tofile(gridFile)
+
+    def startStream(self, newFields, fields):
+
+        # The grids of the fields are written strip by strip as the chunks are written (see writeChunk)
+        self._streamNewGrids = self._newGrids(newFields)
+
+        for name in self._streamNewGrids:
+            self._writeHeader(name)
+            open(self._gridFile(name), 'wb').close()
+
+        self._streamFiles = []
+
+        for field in fields:
+            name = None if field in [self.OIDField, self.nameField] else self._gridName(field)
+            self._streamFiles.append(None if name is None else open(self._gridFile(name), 'r+b'))
+
+    def writeChunk(self, columns):
+
+        ncols, nrows, dtype, nodata = self._gridInfo()
+
+        for gridFile, column in zip(self._streamFiles, columns):
+            if gridFile is not None:
+                self._gridValues(column, dtype, nodata).tofile(gridFile)
+
+    def endStream(self, completed=True):
+
+        for gridFile in self._streamFiles:
+            if gridFile is not None:
+                gridFile.close()
+
+        # The new grids of a stream which did not complete are removed
+        if not completed:
+            for name in self._streamNewGrids:
+                for ext in ['.flt', '.hdr']:
+                    if os.path.exists(self._gridFile(name, ext)):
+                        os.remove(self._gridFile(name, ext))
+
+    def copy(self, outDataset):
+        shutil.copytree(self.dataset, outDataset)
+
+#############################
+### Data access functions ###
+#############################
+
+def _structured(names, arrays):
+
+    # Builds a structured array from one array per field
+    dtype = [(str(name), array.dtype) for name, array in zip(names, arrays)]
+    table = np.empty(len(arrays[0]) if len(arrays) > 0 else 0, dtype=dtype)
+
+    for name, array in zip(names, arrays):
+        table[str(name)] = array
+
+    return table
+
+def _columnsTable(fields, columns, OIDField):
+
+    # Builds the structured array of columns read by the cursors or the pure Python backends
+    arrays = []
+
+    for field, column in zip(fields, columns):
+        # Arrays of the raster stacks are used as they are
+        if isinstance(column, np.ndarray) and column.dtype.kind in 'iuf':
+            arrays.append(column.astype(np.float64))
+        elif isinstance(column, np.ndarray) and column.dtype.kind == 'U':
+            arrays.append(column)
+        elif all(value is None or isinstance(value, (six.integer_types, float)) for value in column):
+            arrays.append(np.array([np.nan if value is None else value for value in column], dtype=np.float64))
+        else:
+            arrays.append(np.array([u'' if value is None else six.text_type(value) for value in column]))
+
+    return _normalise(_structured(fields, arrays), OIDField)
+
+def _normalise(table, OIDField):
+
+    # Numeric fields to float64 with NaN for nulls, the OID field to int64
+    names = table.dtype.names
+    arrays = []
+
+    for name in names:
+        column = table[name]
+
+        if name == OIDField:
+            arrays.append(column.astype(np.int64))
+
+        elif column.dtype.kind in 'iu':
+            column = column.astype(np.float64)
+            column[column == _intNull] = np.nan
+            arrays.append(column)
+
+        elif column.dtype.kind == 'f':
+            arrays.append(column.astype(np.float64))
+
+        else:
+            arrays.append(column)
+
+    return _structured(names, arrays)
+
+def _cacheKey(dataset):
+    return os.path.normcase(os.path.abspath(dataset))
+
+def clearCache():
+
+    # Called at the start of each run so that tables, outputs and side tables are not carried over between runs
+    _tableCache.clear()
+    _outputBuffers.clear()
+    _sources.clear()
+    _exports.clear()
+
+def _invalidate(dataset, fields):
+
+    # Fields read earlier in the run are read again after they are overwritten
+    cached = _tableCache.get(_cacheKey(dataset))
+
+    if cached is not None and any(field in cached.dtype.names for field in fields):
+        del _tableCache[_cacheKey(dataset)]
+
+class _OutputBuffer(object):
+
+    '''
+    Output of a dataset held in memory: the fields to add, as (field, fieldType,
+    precision, scale), and the last column written to each field, in the order given.
+    Field names are matched without case, as in arcpy.
+    '''
+
+    def __init__(self):
+        self.newFields = []
+        self.fields = []
+        self.columns = []
+
+    def isEmpty(self):
+        return len(self.newFields) == 0 and len(self.fields) == 0
+
+    def hasField(self, field):
+        return field.lower() in [newField[0].lower() for newField in self.newFields] + [name.lower() for name in self.fields]
+
+    def addField(self, field, fieldType, precision, scale):
+
+        if field.lower() not in [newField[0].lower() for newField in self.newFields]:
+            self.newFields.append((field, fieldType, precision, scale))
+
+    def getColumns(self, fields):
+
+        # Columns of the fields, in the order of fields
+        lowerFields = [name.lower() for name in self.fields]
+        columns = []
+
+        for field in fields:
+            if field.lower() not in lowerFields:
+                log.error('No output written to field ' + str(field) + ' in this chunk')
+                sys.exit()
+
+            columns.append(self.columns[lowerFields.index(field.lower())])
+
+        return columns
+
+    def setColumns(self, fields, columns):
+
+        # Arrays are kept as they are (no copy to a list of Python values), other columns are copied to lists
+        for field, column in zip(fields, columns):
+            lowerFields = [name.lower() for name in self.fields]
+
+            if not isinstance(column, np.ndarray):
+                column = list(column)
+
+            if field.lower() in lowerFields:
+                self.columns[lowerFields.index(field.lower())] = column
+            else:
+                self.fields.append(field)
+                self.columns.append(column)
+
+def _flush(dataset):
+
+    # Writes the buffered output of the dataset, which stays buffered
+    key = _cacheKey(dataset)
+    outputBuffer = _outputBuffers.get(key)
+
+    if outputBuffer is None or outputBuffer.isEmpty():
+        return
+
+    _table(dataset).writeOutput(outputBuffer.newFields, outputBuffer.fields, outputBuffer.columns)
+    _invalidate(dataset, outputBuffer.fields)
+
+    # The columns are also kept, at full precision, for the export
+    export = _exports.get(key)
+
+    if export is not None:
+        export.output.setColumns(outputBuffer.fields, outputBuffer.columns)
+
+    _outputBuffers[key] = _OutputBuffer()
+
+def startOutput(dataset):
+
+    '''
+    Holds the fields added (addField) and the columns written (writeColumns) to the dataset
+    in memory until writeOutput, so that the output schema is created once and all the
+    output columns are written in one pass.
+    '''
+
+    _outputBuffers[_cacheKey(dataset)] = _OutputBuffer()
+
+def writeOutput(dataset):
+
+    # Creates the buffered fields and writes the buffered columns in one pass, then stops buffering
+    _flush(dataset)
+    _outputBuffers.pop(_cacheKey(dataset), None)
+
+    _endExport(dataset)
+
+def _table(dataset):
+
+    ext = os.path.splitext(dataset)[1].lower()
+
+    if ext == '' and os.path.isdir(dataset):
+        return _RasterStack(dataset)
+
+    if ext == '.csv':
+        return _CSVTable(dataset)
+
+    if backend == 'arcpy':
+        return _ArcpyTable(dataset)
+
+    if ext in ['.shp', '.dbf']:
+        return _DBFTable(dataset)
+
+    log.error('Dataset not supported without arcpy (use a shapefile, .dbf, .csv or a raster stack folder): ' + str(dataset))
+    sys.exit()
+
+def _ownFields(dataset):
+
+    # Lower-case names of the fields stored in the dataset itself (not its OID field), including buffered new fields
+    table = _table(dataset)
+    fields = [field.lower() for field in table.listFields() if field != table.getOIDField()]
+    outputBuffer = _outputBuffers.get(_cacheKey(dataset))
+
+    if outputBuffer is not None:
+        fields += [newField[0].lower() for newField in outputBuffer.newFields]
+
+    return fields
+
+def listFields(dataset):
+
+    # Returns the names of the fields of the dataset, including the buffered new fields
+    # and, for a side table, the fields of its source
+    source = _sources.get(_cacheKey(dataset))
+
+    if source is None:
+        fields = _table(dataset).listFields()
+    else:
+        fields = listFields(source)
+
+    outputBuffer = _outputBuffers.get(_cacheKey(dataset))
+    ownFields = []
+
+    if source is not None:
+        table = _table(dataset)
+        ownFields = [field for field in table.listFields() if field != table.getOIDField()]
+
+    if outputBuffer is not None:
+        ownFields += [newField[0] for newField in outputBuffer.newFields]
+
+    for field in ownFields:
+        if field.lower() not in [name.lower() for name in fields]:
+            fields.append(field)
+
+    return fields
+
+def fieldExists(dataset, field):
+    return field.lower() in [name.lower() for name in listFields(dataset)]
+
+def getOIDField(dataset):
+
+    # The OID field of a side table is the OID field of its source
+    source = _sources.get(_cacheKey(dataset))
+
+    if source is not None:
+        return getOIDField(source)
+
+    return _table(dataset).getOIDField()
+
+def _readTable(dataset, fields):
+
+    key = _cacheKey(dataset)
+
+    # Buffered output fields are written before they are read
+    outputBuffer = _outputBuffers.get(key)
+
+    if outputBuffer is not None and any(outputBuffer.hasField(field) for field in fields):
+        _flush(dataset)
+
+    cached = _tableCache.get(key)
+
+    if cached is None:
+        missing = fields
+    else:
+        missing = [field for field in fields if field not in cached.dtype.names]
+
+    if len(missing) > 0:
+        table = _table(dataset).readTable(missing)
+
+        if cached is not None:
+            names = list(cached.dtype.names) + list(table.dtype.names)
+            arrays = [cached[name] for name in cached.dtype.names] + [table[name] for name in table.dtype.names]
+            table = _structured(names, arrays)
+
+        _tableCache[key] = table
+        cached = table
+
+    return _structured(fields, [cached[field] for field in fields])
+
+def readTable(dataset, fields):
+
+    '''
+    Returns a structured array of the fields of all records (no geometry).
+    Fields already read from the dataset in this run are taken from the cache,
+    the others are read in one bulk read and added to it.
+    The fields of a side table which it does not store are read from its source.
+    '''
+
+    if isinstance(fields, six.string_types):
+        fields = [fields]
+
+    fields = list(fields)
+    source = _sources.get(_cacheKey(dataset))
+
+    if source is None:
+        return _readTable(dataset, fields)
+
+    ownFields = _ownFields(dataset)
+    tableFields = [field for field in fields if field.lower() in ownFields]
+    sourceFields = [field for field in fields if field.lower() not in ownFields]
+
+    arrays = {}
+
+    if len(tableFields) > 0:
+        table = _readTable(dataset, tableFields)
+        arrays.update((field, table[field]) for field in tableFields)
+
+    if len(sourceFields) > 0:
+        table = readTable(source, sourceFields)
+        arrays.update((field, table[field]) for field in sourceFields)
+
+    return _structured(fields, [arrays[field] for field in fields])
+
+def readColumns(dataset, fields):
+
+    '''
+    Reads the fields of all records (see readTable).
+    Returns one list per field, in the order of fields; missing numbers are NaN.
+    '''
+
+    table = readTable(dataset, fields)
+
+    return [table[name].tolist() for name in table.dtype.names]
+
+def addField(dataset, field, fieldType, precision=None, scale=None):
+
+    # fieldType is as in AddField_management: TEXT, DOUBLE, FLOAT, LONG, SHORT or DATE
+    outputBuffer = _outputBuffers.get(_cacheKey(dataset))
+
+    if outputBuffer is not None:
+        outputBuffer.addField(field, fieldType, precision, scale)
+    else:
+        _table(dataset).addField(field, fieldType, precision, scale)
+
+def writeColumns(dataset, fields, columns):
+
+    '''
+    Writes one column (list or array, one value per record) to each field in one pass.
+    The fields must exist (or be added to the output buffer, see startOutput).
+    '''
+
+    if isinstance(fields, six.string_types):
+        fields = [fields]
+        columns = [columns]
+
+    outputBuffer = _outputBuffers.get(_cacheKey(dataset))
+
+    if outputBuffer is not None:
+        outputBuffer.setColumns(list(fields), columns)
+        return
+
+    _table(dataset).writeColumns(list(fields), columns)
+    _invalidate(dataset, fields)
+
+def copyDataset(inDataset, outDataset):
+
+    # Copies the input dataset (all the files of a shapefile) to outDataset
+    ext = os.path.splitext(inDataset)[1].lower()
+
+    if _cacheKey(inDataset) in _sources:
+        log.error('A side table cannot be copied, join it to its source instead: ' + str(inDataset))
+        sys.exit()
+
+    if ext == '.csv' and os.path.splitext(outDataset)[1].lower() != '.csv':
+        log.error('A CSV table can only be copied to a CSV file: ' + str(outDataset))
+        sys.exit()
+
+    # The buffered output of the input is written before it is copied
+    _flush(inDataset)
+
+    _table(inDataset).copy(outDataset)
+    _tableCache.pop(_cacheKey(outDataset), None)
+    _outputBuffers.pop(_cacheKey(outDataset), None)
+
+def keepFields(dataset, fieldsToKeep):
+
+    # Deletes the fields of the dataset which are not in fieldsToKeep (the OID and Shape fields stay)
+    if _cacheKey(dataset) in _sources:
+        log.error('The fields of a side table cannot be deleted: ' + str(dataset))
+        sys.exit()
+
+    # The buffered output is written before the fields are deleted
+    _flush(dataset)
+
+    _table(dataset).keepFields(list(fieldsToKeep))
+    _tableCache.pop(_cacheKey(dataset), None)
+
+
+#################
+### Streaming ###
+#################
+
+def getChunkSize():
+
+    # Fetch the number of records per chunk from the user settings file
+    chunkSize = defaultChunkRecords
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            chunkSize = int(root.find("chunkRecords").text)
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just use the default size.
+
+    return max(chunkSize, 1)
+
+def countRecords(dataset):
+    return _table(dataset).countRecords()
+
+def _fieldSources(dataset, fields):
+
+    # Groups the fields by the dataset storing them: the dataset, or the sources of a side table
+    groups = []
+
+    while len(fields) > 0:
+        source = _sources.get(_cacheKey(dataset))
+
+        if source is None:
+            storedFields = fields
+        else:
+            ownFields = _ownFields(dataset)
+            storedFields = [field for field in fields if field.lower() in ownFields]
+
+        if len(storedFields) > 0:
+            groups.append((dataset, storedFields))
+
+        fields = [field for field in fields if field not in storedFields]
+        dataset = source
+
+    return groups
+
+def iterChunks(dataset, fields, chunkSize=None):
+
+    '''
+    Reads the fields in chunks of chunkSize records (see getChunkSize) and yields a
+    structured array for each chunk, as readTable. Only one chunk is held in memory.
+    '''
+
+    if chunkSize is None:
+        chunkSize = getChunkSize()
+
+    groups = _fieldSources(dataset, list(fields))
+    iterators = [_table(storingDataset).iterColumns(storedFields, chunkSize) for storingDataset, storedFields in groups]
+
+    try:
+        for chunkColumns in six.moves.zip(*iterators):
+            arrays = {}
+
+            for (storingDataset, storedFields), columns in zip(groups, chunkColumns):
+                table = _columnsTable(storedFields, columns, _table(storingDataset).getOIDField())
+                arrays.update((field, table[field]) for field in storedFields)
+
+            yield _structured(fields, [arrays[field] for field in fields])
+
+    finally:
+        # Closes the files and cursors of the readers
+        for iterator in iterators:
+            iterator.close()
+
+def _validRecords(chunk, fields):
+
+    # Records with a value in every numeric field (missing values and NODATA cells are NaN)
+    valid = np.ones(len(chunk), dtype=bool)
+
+    for field in fields:
+        if chunk.dtype[field].kind == 'f':
+            valid &= np.isfinite(chunk[field])
+
+    return valid
+
+def _scatterColumn(column, valid):
+
+    # Column of the valid records to all the records of the chunk, missing (NaN or None) for the others
+    if isinstance(column, np.ndarray) and column.dtype.kind in 'biuf':
+        values = np.full(len(valid), np.nan)
+        values[valid] = column
+
+        return values
+
+    values = [None] * len(valid)
+
+    for i, value in zip(np.flatnonzero(valid), column):
+        values[i] = value
+
+    return values
+
+def streamTable(dataset, inputFields, process, chunkSize=None, skipMissing=False):
+
+    '''
+    Calls process(chunk) on the inputFields of the dataset in chunks of records (see iterChunks)
+    and writes the output of each chunk before the next chunk is read, so that memory is
+    bounded by the chunk size rather than the size of the layer.
+
+    process adds and writes its output fields with addField and writeColumns (one value per
+    record of the chunk), e.g. through the write functions of common. They are held in an
+    output buffer and written as the chunk. Every chunk must write the same fields, which
+    are added before the first chunk is written. If the output of the dataset is exported
+    (see startExport), each chunk is also written to the export.
+
+    If skipMissing is set, only the records with a value in every numeric input field are
+    passed to process (the chunk may then be empty) and the output of the other records is
+    written as missing (NODATA in the output grids).
+    '''
+
+    key = _cacheKey(dataset)
+
+    # Output buffered before the stream is written first
+    _flush(dataset)
+    outputBuffer = _outputBuffers.pop(key, None)
+
+    # The key fields of the export (see startExport) are read with the input fields
+    export = _exports.pop(key, None)
+    readFields = list(inputFields)
+
+    if export is not None:
+        readFields += [field for field in export.keyFields if field not in readFields]
+
+    table = _table(dataset)
+    chunks = iterChunks(dataset, readFields, chunkSize)
+    fields = None
+    completed = False
+
+    try:
+        for chunk in chunks:
+            _outputBuffers[key] = _OutputBuffer()
+
+            if skipMissing:
+                valid = _validRecords(chunk, inputFields)
+                process(chunk[valid])
+            else:
+                process(chunk)
+
+            chunkBuffer = _outputBuffers.pop(key)
+
+            if fields is None:
+                fields = chunkBuffer.fields
+                table.startStream(chunkBuffer.newFields, fields)
+
+            columns = chunkBuffer.getColumns(fields)
+
+            if skipMissing:
+                columns = [_scatterColumn(column, valid) for column in columns]
+
+            table.writeChunk(columns)
+
+            if export is not None:
+                export.writer.write(export.keyFields + fields, [chunk[field] for field in export.keyFields] + columns)
+
+        completed = True
+
+    finally:
+        chunks.close()
+        _outputBuffers.pop(key, None)
+
+        if fields is not None:
+            table.endStream(completed)
+
+        if outputBuffer is not None:
+            _outputBuffers[key] = outputBuffer
+
+    if export is not None:
+        export.writer.close()
+
+    if fields is not None:
+        _invalidate(dataset, fields)
+
+###################
+### Side tables ###
+###################
+
+def getOutputMode():
+
+    # Fetch the output mode (copy or table) from the user settings file
+    outputMode = defaultOutputMode
+    try:
+        if os.path.exists(configuration.userSettingsFile):
+
+            tree = ET.parse(configuration.userSettingsFile)
+            root = tree.getroot()
+            outputMode = root.find("outputMode").text.strip().lower()
+
+    except Exception:
+        pass # If any errors occur, ignore them. Just use the default mode.
+
+    if outputMode not in outputModes:
+        log.warning('Output mode ' + str(outputMode) + ' not recognised, using ' + defaultOutputMode)
+        outputMode = defaultOutputMode
+
+    return outputMode
+
+def getSideTable(outputDataset):
+
+    # Side table written instead of outputDataset in table mode, as a CSV file for CSV inputs
+    base = os.path.splitext(outputDataset)[0]
+
+    if os.path.splitext(outputDataset)[1].lower() == '.csv':
+        return base + '_table.csv'
+
+    return base + '_table.dbf'
+
+def getJoinFile(sideTable):
+    return os.path.splitext(sideTable)[0] + '_join.xml'
+
+def createOutput(inputDataset, outputDataset):
+
+    '''
+    Creates the output of a tool and returns the dataset the results are written to.
+
+    In copy mode the input is copied to outputDataset (with the .csv extension if the input
+    is a CSV table, e.g. soil_vg.csv for soil_vg.shp). In table mode only a side table is
+    created (see getSideTable) with one record per input record and the input OID in the
+    SRC_OID field. The join of the side table to the input (SRC_OID to the input OID field)
+    is written next to the side table (see getJoinFile), e.g. for AddJoin_management.
+    '''
+
+    if getOutputMode() == 'copy':
+
+        # A CSV table is copied to a CSV table
+        if os.path.splitext(inputDataset)[1].lower() == '.csv':
+            outputDataset = os.path.splitext(outputDataset)[0] + '.csv'
+
+        copyDataset(inputDataset, outputDataset)
+        return outputDataset
+
+    sideTable = getSideTable(outputDataset)
+    OIDField = getOIDField(inputDataset)
+    keys = readTable(inputDataset, [OIDField])[OIDField]
+
+    _table(sideTable).create(keyField, keys)
+
+    key = _cacheKey(sideTable)
+    _tableCache.pop(key, None)
+    _outputBuffers.pop(key, None)
+    _sources[key] = inputDataset
+
+    _writeJoin(sideTable, inputDataset, OIDField)
+
+    log.info('Results will be written to the side table ' + str(sideTable))
+
+    return sideTable
+
+def createRasterOutput(inputStack, outputStack):
+
+    '''
+    Creates the output raster stack (folder of grids) of a tool run on a raster stack.
+    The output grids are aligned with the input grids (same header), and the input grids
+    are read through the output stack as the fields of a side table from its source.
+    '''
+
+    if not os.path.exists(outputStack):
+        os.makedirs(outputStack)
+
+    _writeGridHeader(os.path.join(outputStack, _RasterStack.headerFile), _RasterStack(inputStack).getHeader())
+
+    key = _cacheKey(outputStack)
+    _tableCache.pop(key, None)
+    _outputBuffers.pop(key, None)
+    _sources[key] = inputStack
+
+    log.info('Results will be written to the raster stack ' + str(outputStack))
+
+    return outputStack
+
+def findOutput(outputDataset):
+
+    '''
+    Returns the output of an earlier run: outputDataset if it exists, otherwise the side table
+    written in table mode, which is joined to its source again for reading.
+    '''
+
+    sideTable = getSideTable(outputDataset)
+
+    if os.path.exists(outputDataset) or not os.path.exists(sideTable) or not _join(sideTable):
+        return outputDataset
+
+    return sideTable
+
+def _join(sideTable):
+
+    # Joins the side table to its source from the join file (and the source to its own if it is a side table)
+    joinFile = getJoinFile(sideTable)
+
+    if not os.path.exists(joinFile):
+        return False
+
+    source = ET.parse(joinFile).getroot().find("sourceDataset").text
+    _join(source)
+
+    _sources[_cacheKey(sideTable)] = source
+
+    return True
+
+def _writeJoin(sideTable, inputDataset, OIDField):
+
+    # Join definition of the side table: the key field, the source dataset and its OID field
+    root = ET.Element("data")
+
+    for name, value in [("sideTable", os.path.abspath(sideTable)),
+                        ("keyField", keyField),
+                        ("sourceDataset", os.path.abspath(inputDataset)),
+                        ("sourceOIDField", OIDField)]:
+        node = ET.SubElement(root, name)
+        node.text = value
+
+    ET.ElementTree(root).write(getJoinFile(sideTable), encoding='utf-8')
+
+#######################
+### Columnar export ###
+#######################
+
+class _Export(object):
+
+    '''
+    Columnar export of the output of a dataset: the writer (see columnar.ColumnWriter),
+    the key fields written with each record (OID and LUCIname) and the output columns
+    written by writeOutput, held at full precision.
+    '''
+
+    def __init__(self, writer, keyFields):
+        self.writer = writer
+        self.keyFields = keyFields
+        self.output = _OutputBuffer()
+
+def startExport(dataset):
+
+    '''
+    Exports the output fields written to the dataset, keyed by its OID and LUCIname fields,
+    to a columnar file if the columnarExport node of user_settings.xml is set (see columnar).
+    Call it before startOutput or streamTable: the export is written by writeOutput, or
+    chunk by chunk by streamTable.
+    '''
+
+    exportFormat = columnar.getExportFormat()
+
+    if exportFormat == 'none':
+        return
+
+    keyFields = [getOIDField(dataset)]
+    keyFields += [field for field in listFields(dataset) if field.lower() == 'luciname'][:1]
+
+    writer = columnar.ColumnWriter(columnar.getExportFile(dataset, exportFormat), exportFormat)
+    _exports[_cacheKey(dataset)] = _Export(writer, keyFields)
+
+def _endExport(dataset):
+
+    # Writes the output columns kept since startExport with the key fields, then closes the export
+    export = _exports.pop(_cacheKey(dataset), None)
+
+    if export is None:
+        return
+
+    if len(export.output.fields) > 0:
+        keys = readTable(dataset, export.keyFields)
+        export.writer.write(export.keyFields + export.output.fields,
+                            [keys[field] for field in export.keyFields] + export.output.columns)
+
+    export.writer.close()
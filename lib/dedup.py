@@ -0,0 +1,103 @@
+'''
+Distinct soils of a layer.
+
+Soil layers repeat the same soil (identical Sand, Silt, Clay, OC, BD, ... values) across
+many polygons. The array PTFs, the curves and the data checks are calculated once for each
+distinct row of their inputs and the results are scattered back to the records with the
+inverse index:
+
+    uniqueColumns, inverse = uniqueRows(columns)
+    results = scatter(function(*uniqueColumns), inverse)
+
+or calcUnique(function, columns). Rows are compared on the bytes of their float64 values
+(np.unique on a void view of the rows), so missing values (NaN) match each other.
+If every row is distinct the columns are used as they are (inverse is None).
+
+The plots, curve CSVs and stored curves are made once for each distinct soil and name
+(the first record of each, see uniqueSoils).
+'''
+
+import numpy as np
+
+def uniqueRows(columns):
+
+    '''
+    Returns the distinct rows of the columns (one array per column, in the order of their
+    first record) and the inverse index giving the distinct row of each record.
+    Columns which are None stay None. inverse is None if there are no repeated rows.
+    '''
+
+    arrays = [None if column is None else np.asarray(column, dtype=np.float64).ravel() for column in columns]
+    present = [array for array in arrays if array is not None]
+
+    if len(present) == 0 or len(present[0]) < 2:
+        return arrays, None
+
+    rows = np.ascontiguousarray(np.column_stack(present))
+    rowView = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+    unused, first, inverse = np.unique(rowView, return_index=True, return_inverse=True)
+
+    if len(first) == len(rowView):
+        return arrays, None
+
+    # Distinct rows in the order of their first record
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+
+    first = first[order]
+    inverse = rank[inverse.ravel()]
+
+    return [None if array is None else array[first] for array in arrays], inverse
+
+def scatter(results, inverse):
+
+    '''
+    Scatters the results of the distinct rows back to the records: an array (rows on the
+    first axis, e.g. N x P curves or a structured array), or a tuple, list or namedtuple
+    of them. None and scalars are returned as they are.
+    '''
+
+    if inverse is None or results is None:
+        return results
+
+    if isinstance(results, np.ndarray):
+        if results.ndim == 0:
+            return results
+
+        # The scattered copy is in memory, stored curve matrices are scattered by curve_store.scatterStore
+        return np.take(np.asarray(results), inverse, axis=0)
+
+    if isinstance(results, tuple) and hasattr(results, '_fields'):
+        return type(results)(*[scatter(result, inverse) for result in results])
+
+    if isinstance(results, (tuple, list)):
+        return type(results)(scatter(result, inverse) for result in results)
+
+    return results
+
+def calcUnique(function, columns, *args, **kwargs):
+
+    # Calls function(*args, *distinct columns, **kwargs) on the distinct rows only and scatters the results back
+    uniqueColumns, inverse = uniqueRows(columns)
+    results = function(*(list(args) + list(uniqueColumns)), **kwargs)
+
+    return scatter(results, inverse)
+
+def uniqueSoils(nameArray, columns):
+
+    '''
+    Returns the indices of the first record of each distinct soil, in record order: records
+    with the same name and the same row of the columns (e.g. the curve parameters) are one soil.
+    '''
+
+    names, nameCodes = np.unique(np.array([str(name) for name in nameArray], dtype=object), return_inverse=True)
+    uniqueColumns, inverse = uniqueRows([nameCodes] + list(columns))
+
+    if inverse is None:
+        return np.arange(len(nameArray))
+
+    unused, first = np.unique(inverse, return_index=True)
+
+    return first
@@ -0,0 +1,169 @@
+'''
+Ensemble of point-PTFs and VG PTFs
+
+All point-PTFs and VG PTFs whose input columns are present are evaluated on arrays read
+once from the input shapefile. The tabulated (linear) PTFs share one design matrix product,
+the other point-PTFs are evaluated with the array functions of point_PTFs (point_PTFs.arrayPTFs)
+and the VG PTFs with the array functions of vg_PTFs.
+
+Each point-PTF is then interpolated (PCHIP, no extrapolation) onto a common pressure grid,
+the VG curves are evaluated at the pressures of that grid, and the mean, standard deviation,
+minimum and maximum across PTFs are calculated at every pressure.
+'''
+
+import warnings
+import numpy as np
+from collections import OrderedDict
+
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.linear_PTFs as linear_PTFs
+import LUCI_PTFs.lib.point_PTFs as point_PTFs
+import LUCI_PTFs.lib.vg_PTFs as vg_PTFs
+import LUCI_PTFs.lib.vanGenuchten as vanGenuchten
+import LUCI_PTFs.lib.interpolation as interpolation
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([PTFdatabase, linear_PTFs, point_PTFs, vg_PTFs, vanGenuchten, interpolation])
+
+# Input columns (PTFdatabase names) and the keyword used by linear_PTFs and the VG PTFs
+# CEC and pH are only used by the VG PTFs
+_inputNames = [("Sand", "sand"), ("Silt", "silt"), ("Clay", "clay"), ("carbon", "carbon"), ("BD", "BD"),
+               ("CEC", "CEC"), ("pH", "pH")]
+
+_pointInputs = ["sand", "silt", "clay", "carbon", "BD"]
+
+def isVectorised(PTFOption):
+
+    # True if the point-PTF is evaluated on arrays by calcPointPTFs
+    return linear_PTFs.isLinear(PTFOption) or PTFOption in point_PTFs.arrayPTFs
+
+def isCurve(PTFOption):
+
+    # True if the PTF gives a water retention curve (VG PTF) evaluated at the ensemble pressures
+    return PTFdatabase.getPTF(PTFOption).PTFType == "vgPTF"
+
+def applicablePTFs(availableFields, carbContent):
+
+    '''
+    Returns the point-PTFs and VG PTFs which can be calculated from the available fields,
+    in the order of PTFdatabase, and those which cannot.
+    '''
+
+    available = []
+    missing = []
+
+    for PTFOption in PTFdatabase.getOptions("pointPTF") + PTFdatabase.getOptions("vgPTF"):
+
+        # The VG PTFs do not use LUCIname and texture
+        reqFields = [field for field in PTFdatabase.getRequiredFields(PTFOption, carbContent) if field not in ["LUCIname", "texture"]]
+
+        if all(field in availableFields for field in reqFields):
+            available.append(PTFOption)
+        else:
+            missing.append(PTFOption)
+
+    return available, missing
+
+def calcPointPTFs(PTFOptions, inputs, carbContent, carbonConFactor, pressures=None):
+
+    '''
+    Evaluates the point-PTFs and VG PTFs for all records, once per distinct soil (see dedup).
+
+    inputs maps "Sand", "Silt", "Clay", "carbon", "BD", "CEC" and "pH" to the input arrays (N);
+    carbon is the carbContent (OC or OM) column and is converted for the PTFs using the other.
+    Returns an OrderedDict of PTFOption: water contents (N x P, PTFdatabase pressure order
+    for the point-PTFs, the pressures (T, kPa) for the VG PTFs).
+    '''
+
+    arrays = {}
+    for field, name in _inputNames:
+        if inputs.get(field) is not None:
+            arrays[name] = np.asarray(inputs[field], dtype=np.float64).ravel()
+
+    pointArrays = dict((name, array) for name, array in arrays.items() if name in _pointInputs)
+
+    N = len(next(iter(arrays.values())))
+    missing = np.full(N, np.nan)
+
+    results = {}
+
+    # Tabulated PTFs, one product per carbon conversion factor
+    factors = OrderedDict()
+    for PTFOption in PTFOptions:
+        if linear_PTFs.isLinear(PTFOption):
+            factor = PTFdatabase.getCarbonFactor(PTFOption, carbContent, carbonConFactor)
+            factors.setdefault(factor, []).append(PTFOption)
+
+    for factor, linearOptions in factors.items():
+        linearWC = linear_PTFs.calcLinearPTFs(linearOptions, carbonConFactor=factor, **pointArrays)
+
+        for PTFOption, WC in zip(linearOptions, linearWC):
+            results[PTFOption] = WC
+
+    # Other PTFs
+    for PTFOption in PTFOptions:
+        if PTFOption in point_PTFs.arrayPTFs:
+            args = dict((name, arrays.get(name, missing)) for name in _pointInputs)
+
+            if "carbon" in arrays:
+                args["carbon"] = arrays["carbon"] * PTFdatabase.getCarbonFactor(PTFOption, carbContent, carbonConFactor)
+
+            results[PTFOption] = point_PTFs.calcArrayPTF(PTFOption, **args)
+
+        # VG curves at the pressures
+        elif isCurve(PTFOption):
+            factor = PTFdatabase.getCarbonFactor(PTFOption, carbContent, carbonConFactor)
+            vgParams = vg_PTFs.calcVGParams(PTFOption, factor, **arrays)
+
+            results[PTFOption] = vanGenuchten.calcVGArray(pressures, *vgParams[:5])
+
+    return OrderedDict([(PTFOption, results[PTFOption]) for PTFOption in PTFOptions if PTFOption in results])
+
+def ensemblePressures(PTFOptions, extraPressures=None):
+
+    # Sorted union of the point-PTF pressures (and any extra pressures, e.g. the critical points)
+    pressures = set()
+
+    for PTFOption in PTFOptions:
+        if not isCurve(PTFOption):
+            pressures.update(float(p) for p in PTFdatabase.getPTF(PTFOption).PTFPressures)
+
+    if extraPressures is not None:
+        pressures.update(float(p) for p in extraPressures)
+
+    return np.array(sorted(pressures))
+
+def ensembleStats(wcResults, pressures):
+
+    '''
+    Interpolates every point-PTF in wcResults onto the pressures (T) and returns the number of
+    PTFs covering each pressure and their mean, standard deviation, minimum and maximum,
+    each N x T. A point-PTF only contributes within the range of its own pressures, the VG
+    PTFs are already at the pressures.
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).ravel()
+    stack = []
+
+    for PTFOption, WC in wcResults.items():
+        if isCurve(PTFOption):
+            stack.append(WC)
+        else:
+            curves = interpolation.buildPCHIP(PTFdatabase.getPTF(PTFOption).PTFPressures, WC)
+            stack.append(interpolation.evalPCHIP(curves, pressures))
+
+    stack = np.array(stack)
+    count = np.sum(np.isfinite(stack), axis=0)
+
+    # Pressures not covered by any PTF are NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+
+        mean = np.nanmean(stack, axis=0)
+        minimum = np.nanmin(stack, axis=0)
+        maximum = np.nanmax(stack, axis=0)
+        sd = np.nanstd(stack, axis=0, ddof=1)
+
+    sd = np.where(count > 1, sd, np.where(count == 1, 0.0, np.nan))
+
+    return count, mean, sd, minimum, maximum
@@ -0,0 +1,119 @@
+'''
+Monotone (PCHIP) interpolation of point-PTF water contents at arbitrary pressures
+'''
+
+import numpy as np
+from collections import namedtuple
+
+# x: log-pressure nodes (P), y: water contents (N x P), d: slopes at the nodes (N x P)
+PCHIPCurves = namedtuple('PCHIPCurves', ['pressures', 'x', 'y', 'd'])
+
+def _logPressure(pressures):
+
+    # Interpolation is done in log(1 + pressure) so that 0 kPa (saturation) can be a node
+    return np.log1p(np.asarray(pressures, dtype=np.float64))
+
+def _endSlope(h0, h1, delta0, delta1):
+
+    # Shape-preserving three-point slope at the ends of the curve (Fritsch and Carlson, 1980)
+    d = ((2.0 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+
+    d = np.where(np.sign(d) != np.sign(delta0), 0.0, d)
+    d = np.where((np.sign(delta0) != np.sign(delta1)) & (np.abs(d) > np.abs(3.0 * delta0)), 3.0 * delta0, d)
+
+    return d
+
+def buildPCHIP(pressures, wcMatrix):
+
+    '''
+    Builds the interpolant once for all records.
+
+    pressures is the vector of point-PTF pressures (P, kPa) and wcMatrix holds the
+    water contents with one row per record and one column per pressure (N x P).
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64)
+    y = np.asarray(wcMatrix, dtype=np.float64)
+
+    if y.ndim == 1:
+        y = y.reshape(1, -1)
+
+    # Sort the nodes by pressure
+    order = np.argsort(pressures)
+    pressures = pressures[order]
+    y = y[:, order]
+
+    x = _logPressure(pressures)
+    P = len(x)
+
+    if P < 2:
+        return PCHIPCurves(pressures, x, y, np.zeros(y.shape))
+
+    h = np.diff(x)
+    delta = np.diff(y, axis=1) / h
+
+    if P == 2:
+        return PCHIPCurves(pressures, x, y, np.hstack([delta, delta]))
+
+    d = np.zeros(y.shape)
+
+    # Interior slopes: weighted harmonic mean of the neighbouring secants, 0 at local extrema
+    h0 = h[:-1]
+    h1 = h[1:]
+    w1 = 2.0 * h1 + h0
+    w2 = h1 + 2.0 * h0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interior = (w1 + w2) / (w1 / delta[:, :-1] + w2 / delta[:, 1:])
+
+    sameSign = (delta[:, :-1] * delta[:, 1:]) > 0.0
+    d[:, 1:-1] = np.where(sameSign, interior, 0.0)
+
+    d[:, 0] = _endSlope(h[0], h[1], delta[:, 0], delta[:, 1])
+    d[:, -1] = _endSlope(h[-1], h[-2], delta[:, -1], delta[:, -2])
+
+    return PCHIPCurves(pressures, x, y, d)
+
+def inRange(curves, pressure):
+
+    # True if the pressure can be interpolated (no extrapolation beyond the PTF pressures)
+    return float(curves.pressures[0]) <= float(pressure) <= float(curves.pressures[-1])
+
+def evalPCHIP(curves, pressures):
+
+    '''
+    Evaluates the interpolant at the requested pressures (T, kPa) for all records.
+
+    Returns an N x T array. Pressures outside the range of the PTF pressures return NaN.
+    '''
+
+    t = _logPressure(pressures).ravel()
+    x = curves.x
+    y = curves.y
+    d = curves.d
+
+    N = y.shape[0]
+
+    if len(x) < 2:
+        out = np.repeat(y[:, :1], len(t), axis=1)
+        out[:, t != x[0]] = np.nan
+        return out
+
+    # Interval of each target pressure
+    k = np.clip(np.searchsorted(x, t) - 1, 0, len(x) - 2)
+
+    hk = x[k + 1] - x[k]
+    s = (t - x[k]) / hk
+
+    # Cubic Hermite basis functions
+    h00 = (1.0 + 2.0 * s) * (1.0 - s) ** 2
+    h10 = s * (1.0 - s) ** 2
+    h01 = s ** 2 * (3.0 - 2.0 * s)
+    h11 = s ** 2 * (s - 1.0)
+
+    out = h00 * y[:, k] + h10 * hk * d[:, k] + h01 * y[:, k + 1] + h11 * hk * d[:, k + 1]
+
+    outside = (t < x[0]) | (t > x[-1])
+    out[:, outside] = np.nan
+
+    return out.reshape(N, len(t))
@@ -0,0 +1,199 @@
+'''
+Compiled curve kernels for the VG, MVG and Brooks-Corey functions.
+
+If Numba is installed the curves are evaluated in one fused, parallel loop over
+records x pressures, without the temporary arrays the NumPy expressions create.
+If it is not installed (or only one core is available), backend is 'numpy' and the
+callers in vanGenuchten.py and brooksCorey.py use their own NumPy implementations.
+
+This module does not import arcpy, so the benchmark can be run on its own:
+    python kernels.py [records] [pressures]
+'''
+
+import numpy as np
+
+try:
+    import numba
+
+    # The compiled loops only beat NumPy when they can run on more than one core
+    if numba.config.NUMBA_NUM_THREADS > 1:
+        backend = 'numba'
+    else:
+        backend = 'numpy'
+
+except ImportError:
+    numba = None
+    backend = 'numpy'
+
+def available():
+    return backend == 'numba'
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _vgKernel(psi_kPa, theta_res, theta_sat, alpha, n, m, out):
+
+        for i in numba.prange(out.shape[0]):
+            for j in range(out.shape[1]):
+                out[i, j] = theta_res[i] + (theta_sat[i] - theta_res[i]) / (1.0 + (alpha[i] * psi_kPa[j]) ** n[i]) ** m[i]
+
+    @numba.njit(parallel=True, cache=True)
+    def _bcKernel(psi_kPa, hb_BC, theta_r, theta_s, lambda_BC, out):
+
+        for i in numba.prange(out.shape[0]):
+            for j in range(out.shape[1]):
+
+                if lambda_BC[i] == -9999:
+                    out[i, j] = -9999.0
+
+                elif psi_kPa[j] < hb_BC[i]:
+                    out[i, j] = theta_s[i]
+
+                else:
+                    out[i, j] = theta_r[i] + (theta_s[i] - theta_r[i]) * (hb_BC[i] / psi_kPa[j]) ** lambda_BC[i]
+
+    @numba.njit(parallel=True, cache=True)
+    def _mvgKernel(psi_kPa, K_sat, alpha, n, m, l, theta_res, theta_sat, Se, theta, Kh, Ktheta):
+
+        for i in numba.prange(Se.shape[0]):
+            for j in range(Se.shape[1]):
+
+                alphaH = alpha[i] * psi_kPa[j]
+                alphaH_n = alphaH ** n[i]
+                B = 1.0 + alphaH_n
+                B_m = B ** m[i]
+
+                if alphaH > 0.0:
+                    alphaH_n1 = alphaH_n / alphaH
+                elif n[i] == 1.0:
+                    alphaH_n1 = 1.0
+                else:
+                    alphaH_n1 = 0.0
+
+                SeVal = 1.0 / B_m
+
+                Se[i, j] = SeVal
+                theta[i, j] = theta_res[i] + (theta_sat[i] - theta_res[i]) * SeVal
+                Kh[i, j] = K_sat[i] * ((B_m - alphaH_n1) ** 2.0) / (B_m ** (l[i] + 2.0))
+                Ktheta[i, j] = K_sat[i] * (SeVal ** l[i]) * (1.0 - (alphaH_n / B) ** m[i]) ** 2.0
+
+def _vector(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64).ravel())
+
+def vgArray(pressures, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
+
+    # Compiled version of vanGenuchten.calcVGArray
+    psi_kPa = _vector(pressures)
+    theta_res = _vector(WC_residualArray)
+
+    out = np.empty((len(theta_res), len(psi_kPa)), dtype=np.float64)
+    _vgKernel(psi_kPa, theta_res, _vector(WC_satArray), _vector(alpha_VGArray), _vector(n_VGArray), _vector(m_VGArray), out)
+
+    return out
+
+def bcArray(pressures, hb_BCArray, WC_resArray, WC_satArray, lambda_BCArray):
+
+    # Compiled version of brooksCorey.calcBrooksCoreyArray
+    psi_kPa = _vector(pressures)
+    hb_BC = _vector(hb_BCArray)
+
+    out = np.empty((len(hb_BC), len(psi_kPa)), dtype=np.float64)
+    _bcKernel(psi_kPa, hb_BC, _vector(WC_resArray), _vector(WC_satArray), _vector(lambda_BCArray), out)
+
+    return out
+
+def mvgArray(pressures, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray=None, WC_satArray=None):
+
+    # Compiled version of vanGenuchten.calcMVGArray
+    psi_kPa = _vector(pressures)
+    K_sat = _vector(K_satArray)
+    shape = (len(K_sat), len(psi_kPa))
+
+    if WC_residualArray is not None and WC_satArray is not None:
+        theta_res = _vector(WC_residualArray)
+        theta_sat = _vector(WC_satArray)
+    else:
+        theta_res = np.full(len(K_sat), np.nan)
+        theta_sat = np.full(len(K_sat), np.nan)
+
+    Se = np.empty(shape)
+    theta = np.empty(shape)
+    Kh = np.empty(shape)
+    Ktheta = np.empty(shape)
+
+    _mvgKernel(psi_kPa, K_sat, _vector(alpha_VGArray), _vector(n_VGArray), _vector(m_VGArray), _vector(l_MvGArray), theta_res, theta_sat, Se, theta, Kh, Ktheta)
+
+    mvgArray = np.empty(shape, dtype=[('Se', 'f8'), ('theta', 'f8'), ('Kh', 'f8'), ('Ktheta', 'f8')])
+    mvgArray['Se'] = Se
+    mvgArray['theta'] = theta
+    mvgArray['Kh'] = Kh
+    mvgArray['Ktheta'] = Ktheta
+
+    return mvgArray
+
+def benchmark(records=10000, pressures=1501, repeats=3):
+
+    # Times the NumPy expressions against the compiled kernels on random parameter sets
+    import timeit
+
+    rng = np.random.RandomState(0)
+    psi_kPa = np.linspace(0.0, 1500.0, pressures)
+
+    theta_res = rng.uniform(0.0, 0.1, records)
+    theta_sat = rng.uniform(0.35, 0.55, records)
+    alpha = rng.uniform(0.01, 1.0, records)
+    n = rng.uniform(1.1, 3.0, records)
+    m = 1.0 - 1.0 / n
+    K_sat = rng.uniform(1.0, 100.0, records)
+    l = np.full(records, 0.5)
+
+    P = psi_kPa.reshape(1, -1)
+    r, s, a, nn, mm, Ks, ll = [v.reshape(-1, 1) for v in (theta_res, theta_sat, alpha, n, m, K_sat, l)]
+
+    def vgNumpy():
+        return r + ((s - r) / ((1.0 + ((a * P) ** nn))) ** mm)
+
+    def mvgNumpy():
+        alphaH = a * P
+        alphaH_n = alphaH ** nn
+        B = 1.0 + alphaH_n
+        B_m = B ** mm
+        Se = 1.0 / B_m
+        theta = r + (s - r) * Se
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alphaH_n1 = np.where(alphaH > 0.0, alphaH_n / alphaH, 0.0)
+        Kh = Ks * ((B_m - alphaH_n1) ** 2.0) / (B_m ** (ll + 2.0))
+        Ktheta = Ks * (Se ** ll) * (1.0 - (alphaH_n / B) ** mm) ** 2.0
+        return Se, theta, Kh, Ktheta
+
+    cases = [('VG', vgNumpy, lambda: vgArray(psi_kPa, theta_res, theta_sat, alpha, n, m)),
+             ('MVG', mvgNumpy, lambda: mvgArray(psi_kPa, K_sat, alpha, n, m, l, theta_res, theta_sat))]
+
+    timings = []
+
+    for name, numpyFxn, compiledFxn in cases:
+
+        numpyTime = min(timeit.repeat(numpyFxn, number=1, repeat=repeats))
+        print('%-4s numpy %6d x %5d: %8.4f s' % (name, records, pressures, numpyTime))
+
+        if numba is not None:
+            compiledFxn()  # compile
+            compiledTime = min(timeit.repeat(compiledFxn, number=1, repeat=repeats))
+            print('%-4s numba %6d x %5d: %8.4f s (%d threads, speedup %.1fx)' % (name, records, pressures, compiledTime, numba.config.NUMBA_NUM_THREADS, numpyTime / compiledTime))
+        else:
+            compiledTime = None
+
+        timings.append((name, numpyTime, compiledTime))
+
+    if numba is None:
+        print('Numba is not installed, only the NumPy backend is available')
+
+    print('Selected backend: ' + backend)
+
+    return timings
+
+if __name__ == '__main__':
+    import sys
+
+    args = [int(arg) for arg in sys.argv[1:3]]
+    benchmark(*args)
@@ -2,484 +2,203 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
+from collections import namedtuple
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
 import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.data_access as data_access
+import LUCI_PTFs.lib.dedup as dedup
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs, PTFdatabase])
+refresh_modules([log, common, checks_PTFs, PTFdatabase, data_access, dedup])
 
-def Cosby_1984(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
+#####################################
+### Ksat PTFs on the input arrays ###
+#####################################
 
-    log.info('Calculating saturated hydraulic conductivity using Cosby et al. (1984)')
+# Each function takes the input columns as arrays and returns K_sat (mm/hr) for all records
+# Inputs: sand, silt, clay (%), carbon (OM, %), BD (g/cm3), WC_sat and WC_FC (m3/m3)
 
-    PTFInfo = PTFdatabase.checkPTF("Cosby_1984")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+def _Cosby_1984(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return 25.4 * 10**(-0.6 + (0.0126 * sand) - (0.0064 * clay))
 
-    # Requirements: sand and clay
+def _Puckett_1985(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return 156.96 * np.exp(-0.1975 * clay)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def _Jabro_1992(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return 10**(9.56 - (0.81 * np.log10(silt)) - (1.09 * np.log10(clay)) - (4.64 * BD)) * 10.0
 
-    reqFields = [OIDField, "Sand", "Clay"]
+def _CampbellShiozawa_1994(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return 54.0 * np.exp((- 0.07 * silt) - (0.167 * clay))
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+def _FerrerJulia_2004_1(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return 0.920 * np.exp(0.0491 * sand)
 
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
+def _FerrerJulia_2004_2(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    return - 4.994 + (0.56728 * sand) - (0.131 * clay) - (0.0127 * carbon)
 
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
+def _Ahuja_1989(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    Eff_porosity = WC_sat - WC_FC
+    return 7645.0 * Eff_porosity ** 3.29
 
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
+def _MinasnyMcBratney_2000(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
+    Eff_porosity = WC_sat - WC_FC
+    return 23190.55 * Eff_porosity ** 3.66
 
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
+def _Brakensiek_1984(sand, silt, clay, carbon, BD, WC_sat, WC_FC):
 
-        K_sat = 25.4 * 10**(-0.6 + (0.0126 * sandPerc[x]) - (0.0064 * clayPerc[x]))
+    sandSq = sand ** 2
+    claySq = clay ** 2
+    WC_satSq = WC_sat ** 2
 
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
+    return 10 * np.exp((19.52348 * WC_sat) - 8.96847 - (0.028212 * clay) + (0.00018107 * sandSq) - (0.0094125 * claySq) - (8.395215 * WC_satSq) + (0.077718 * sand * WC_sat) - (0.00298 * sandSq * WC_satSq) - (0.019492 * claySq * WC_satSq) + (0.0000173 * sandSq * clay) + (0.02733 * claySq * WC_sat) + (0.001434 * sandSq * WC_sat) - (0.0000035 * claySq * sand))
 
-        K_satArray.append(K_sat)
+# description: for the log, function: array function above,
+# checks: inputs checked by checks_PTFs.validateInputs
+KsatPTF = namedtuple('KsatPTF', ['description', 'function', 'checks'])
 
-    return warningArray, K_satArray
+_ksatPTFs = {
+    "Cosby_1984": KsatPTF("Cosby et al. (1984)", _Cosby_1984, ["sand", "clay"]),
+    "Puckett_1985": KsatPTF("Puckett et al. (1985)", _Puckett_1985, ["clay"]),
+    "Jabro_1992": KsatPTF("Jabro (1992)", _Jabro_1992, ["silt", "clay", "BD"]),
+    "CampbellShiozawa_1994": KsatPTF("Campbell and Shiozawa (1994)", _CampbellShiozawa_1994, ["silt", "clay"]),
+    "FerrerJulia_2004_1": KsatPTF("Ferrer Julia et al. (2004) - Sand", _FerrerJulia_2004_1, ["sand"]),
+    "FerrerJulia_2004_2": KsatPTF("Ferrer Julia et al. (2004) - Sand, clay, OM", _FerrerJulia_2004_2, ["carbon", "sand", "clay", "BD"]),
+    "Ahuja_1989": KsatPTF("Ahuja et al. (1989)", _Ahuja_1989, ["WC_sat", "WC_FC"]),
+    "MinasnyMcBratney_2000": KsatPTF("Minasny and McBratney (2000)", _MinasnyMcBratney_2000, ["WC_sat", "WC_FC"]),
+    "Brakensiek_1984": KsatPTF("Brakensiek et al. (1984)", _Brakensiek_1984, ["sand", "clay", "WC_sat"])
+}
 
-def Puckett_1985(outputFolder, outputShp):
+# Shapefile field of each input (the carbon field is OC or OM)
+_inputNames = {"Sand": "sand", "Silt": "silt", "Clay": "clay", "BD": "BD",
+               "wc_satCalc": "WC_sat", "wc_fcCalc": "WC_FC"}
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
+def calcKsatArray(KsatOption, sand=None, silt=None, clay=None, carbon=None, BD=None,
+                  WC_sat=None, WC_FC=None, carbonConFactor=1.0):
 
-    log.info('Calculating saturated hydraulic conductivity using Puckett et al. (1985)')
+    '''
+    Calculates K_sat (mm/hr) for all records with the Ksat PTF, once per distinct soil (see dedup).
+    carbon is multiplied by carbonConFactor to give OM.
+    '''
 
-    PTFInfo = PTFdatabase.checkPTF("Puckett_1985")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+    def asArray(values):
+        if values is None:
+            return None
+        return np.asarray(values, dtype=np.float64)
 
-    # Requirements: Clay
+    if carbon is not None:
+        carbon = asArray(carbon) * float(carbonConFactor)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        K_sat = dedup.calcUnique(_ksatPTFs[KsatOption].function, [sand, silt, clay, carbon, BD, WC_sat, WC_FC])
 
-    reqFields = [OIDField, "Clay"]
+    return K_sat
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+def getLayerFields(KsatOption, outputShp, carbContent=None):
 
-    # Retrieve info from input
-    record = []
-    clayPerc = []
+    # Fields read by calcKsatLayer: the OID field and the inputs of the Ksat PTF
+    return [common.getOIDField(outputShp)] + PTFdatabase.getRequiredFields(KsatOption, carbContent)
 
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            clay = row[1]
+def calcKsatLayer(KsatOption, outputShp, carbContent=None, carbonConFactor=1.0, inputTable=None):
 
-            record.append(objectID)
-            clayPerc.append(clay)
+    '''
+    Reads the inputs of the Ksat PTF from the shapefile in one pass and calculates K_sat
+    for the whole layer. Returns the K_sat array, the warning of each record and the
+    warnFlags of each record (see checks_PTFs.validateInputs).
+    If inputTable (a chunk of data_access.streamTable) is given, it is used instead of the shapefile.
+    '''
 
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
+    ksatPTF = _ksatPTFs[KsatOption]
 
-        K_sat = 156.96 * math.exp(-0.1975 * clayPerc[x])
+    log.info('Calculating saturated hydraulic conductivity using ' + ksatPTF.description)
 
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
+    reqFields = getLayerFields(KsatOption, outputShp, carbContent)
+    OIDField = reqFields[0]
+    inputFields = reqFields[1:]
 
-        K_satArray.append(K_sat)
+    # Retrieve info from input (the fields of a chunk were checked before the stream)
+    # Missing values are NaN in the columns of inputTable
+    if inputTable is None:
+        checks_PTFs.checkInputFields(reqFields, outputShp)
+        inputTable = data_access.readTable(outputShp, reqFields)
 
-    return warningArray, K_satArray
+    record = inputTable[OIDField].tolist()
 
-def Jabro_1992(outputFolder, outputShp):
+    columns = {}
+    for field in inputFields:
+        if field == carbContent:
+            columns["carbon"] = inputTable[field]
+        else:
+            columns[_inputNames[field]] = inputTable[field]
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Jabro (1992)')
+    # Ferrer Julia et al. (2004) converts OC to OM with a factor of 1.724
+    if KsatOption == "FerrerJulia_2004_2" and carbContent == 'OC':
+        carbonConFactor = 1.724
+    elif "carbon" in columns:
+        carbonConFactor = PTFdatabase.getCarbonFactor(KsatOption, carbContent, carbonConFactor)
 
-    PTFInfo = PTFdatabase.checkPTF("Jabro_1992")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+    K_sat = calcKsatArray(KsatOption, carbonConFactor=carbonConFactor, **columns)
 
-    # Requirements: sand and clay
+    # Data checks on the inputs and K_sat
+    warningArray, warnFlags = checks_PTFs.checkInputs(ksatPTF.checks + ["Ksat"], record, Ksat=K_sat, **columns)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    return K_sat, warningArray, warnFlags
 
-    reqFields = [OIDField, "Silt", "Clay", "BD"]
+def _runLayer(KsatOption, outputShp, carbContent=None, carbonConFactor=1.0):
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    # Returns the warning and K_sat lists of the Ksat PTF functions below
+    K_sat, warningArray, warnFlags = calcKsatLayer(KsatOption, outputShp, carbContent, carbonConFactor)
 
-    # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
+    return warningArray, K_sat.tolist()
 
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            BD = row[3]
+#########################################
+### Ksat PTFs on the output shapefile ###
+#########################################
 
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+def Cosby_1984(outputFolder, outputShp):
 
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Silt", siltPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
+    # Requirements: sand and clay
+    return _runLayer("Cosby_1984", outputShp)
 
-        K_sat = 10**(9.56 - (0.81 * math.log(siltPerc[x], 10.0)) - (1.09 * math.log(clayPerc[x], 10.0)) - (4.64 * BDg_cm3[x])) * 10.0
+def Puckett_1985(outputFolder, outputShp):
 
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
+    # Requirements: Clay
+    return _runLayer("Puckett_1985", outputShp)
 
-        K_satArray.append(K_sat)
+def Jabro_1992(outputFolder, outputShp):
 
-    return warningArray, K_satArray
+    # Requirements: silt, clay and BD
+    return _runLayer("Jabro_1992", outputShp)
 
 def CampbellShiozawa_1994(outputFolder, outputShp):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Campbell and Shiozawa (1994)')
-
-    PTFInfo = PTFdatabase.checkPTF("CampbellShiozawa_1994")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
     # Requirements: silt and clay
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Silt", "Clay"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Silt", siltPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 54.0 * math.exp((- 0.07 * siltPerc[x]) - (0.167 * clayPerc[x]))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return _runLayer("CampbellShiozawa_1994", outputShp)
 
 def FerrerJulia_2004_1(outputFolder, outputShp):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ferrer Julia et al. (2004) - Sand')
-
-    PTFInfo = PTFdatabase.checkPTF("FerrerJulia_2004_1")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
     # Requirements: sand
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Sand"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 0.920 * math.exp(0.0491 * sandPerc[x])
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return _runLayer("FerrerJulia_2004_1", outputShp)
 
 def FerrerJulia_2004_2(outputFolder, outputShp, carbonConFactor, carbContent):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ferrer Julia et al. (2004) - Sand, clay, OM')
-
-    PTFInfo = PTFdatabase.checkPTF("FerrerJulia_2004_2")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
     # Requirements: sand, clay, OM, BD
-    if carbContent == 'OC':
-        reqFields = [OIDField, "Sand", "Clay", "OC", "BD"]
-        carbonConFactor = 1.724
-
-    elif carbContent == 'OM':
-        reqFields = [OIDField, "Sand", "Clay", "OM", "BD"]
-        carbonConFactor = 1.0
-        
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = - 4.994 + (0.56728 * sandPerc[x]) - (0.131 * clayPerc[x]) - (0.0127 * carbPerc[x]*float(carbonConFactor))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return _runLayer("FerrerJulia_2004_2", outputShp, carbContent, carbonConFactor)
 
 def Ahuja_1989(outputFolder, outputShp):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ahuja et al. (1989)')
-
-    PTFInfo = PTFdatabase.checkPTF("Ahuja_1989")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
     # Requirements: WC @ Sat and WC @ FC
-    reqFields = [OIDField, "wc_satCalc", "wc_fcCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    WC_satArray = []
-    WC_FCArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            WC_sat = row[1]
-            WC_FC = row[2]
-
-            record.append(objectID)
-            WC_satArray.append(WC_sat)
-            WC_FCArray.append(WC_FC)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at FC", WC_FCArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        Eff_porosity = WC_satArray[x] - WC_FCArray[x]
-        K_sat = 7645.0 * Eff_porosity **3.29
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-        
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return _runLayer("Ahuja_1989", outputShp)
 
 def MinasnyMcBratney_2000(outputFolder, outputShp):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Minasny and McBratney (2000)')
-
-    PTFInfo = PTFdatabase.checkPTF("MinasnyMcBratney_2000")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
     # Requirements: WC @ Sat and WC @ FC
-    reqFields = [OIDField, "wc_satCalc", "wc_fcCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    WC_satArray = []
-    WC_FCArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            WC_sat = row[1]
-            WC_FC = row[2]
-
-            record.append(objectID)
-            WC_satArray.append(WC_sat)
-            WC_FCArray.append(WC_FC)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at FC", WC_FCArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        Eff_porosity = WC_satArray[x] - WC_FCArray[x]
-        K_sat = 23190.55 * Eff_porosity ** 3.66
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-        
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return _runLayer("MinasnyMcBratney_2000", outputShp)
 
 def Brakensiek_1984(outputFolder, outputShp):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Brakensiek et al. (1984)')
-
-    PTFInfo = PTFdatabase.checkPTF("Brakensiek_1984")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
     # Requirements: Clay, sand, WC @ Sat
-    reqFields = [OIDField, "Sand", "Clay", "wc_satCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    WC_satArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            WC_sat = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            WC_satArray.append(WC_sat)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 10 * math.exp((19.52348 * WC_satArray[x]) - 8.96847 - (0.028212 * clayPerc[x]) + (0.00018107 * sandPerc[x]**2) - (0.0094125 * clayPerc[x]**2) - (8.395215 * WC_satArray[x]**2) + (0.077718 * sandPerc[x] * WC_satArray[x]) - (0.00298 * sandPerc[x]**2 * WC_satArray[x]**2) - (0.019492 * clayPerc[x]**2 * WC_satArray[x]**2) + (0.0000173 * sandPerc[x]**2 * clayPerc[x]) + (0.02733 * clayPerc[x]**2 * WC_satArray[x]) + (0.001434 * sandPerc[x]**2 * WC_satArray[x]) - (0.0000035 * clayPerc[x]**2 * sandPerc[x]))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
\ No newline at end of file
+    return _runLayer("Brakensiek_1984", outputShp)
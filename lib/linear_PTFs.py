@@ -0,0 +1,345 @@
+'''
+Coefficient tables for the point-PTFs that are linear in (products of) the soil properties
+
+Each PTF is a list of terms and one row of coefficients per pressure, in the order of
+PTFdatabase PTFPressures. A term is a product of inputs, e.g. "clay*BD", and "1" is the
+intercept. The design matrix X (records x terms) is built once per batch, so the water
+contents of all records at all pressures are a single np.dot(X, B).
+
+Inputs: sand, silt, clay (%), carbon (OC or OM multiplied by carbonConFactor), BD (g/cm3)
+and the derived log10C (log10 of carbon) and clayPerSilt (clay / silt).
+'''
+
+import numpy as np
+from collections import namedtuple
+
+import LUCI_PTFs.lib.dedup as dedup
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([dedup])
+
+# terms: tuple of term names, B: terms x pressures coefficient matrix, scale: applied to X.B
+LinearPTF = namedtuple('LinearPTF', ['terms', 'B', 'scale'])
+
+_tables = {}
+
+def _register(PTFOption, terms, coefficients, scale=1.0):
+
+    B = np.array(coefficients, dtype=np.float64).T
+    B.flags.writeable = False
+
+    _tables[PTFOption] = LinearPTF(tuple(terms), B, float(scale))
+
+# Nguyen et al. (2014)
+_register("Nguyen_2014",
+          ["1", "sand", "silt", "clay", "log10C", "BD"],
+          [[0.575, 0.0, 0.0, 0.002, 0.055, -0.144],     # 1 kPa
+           [0.527, 0.0, 0.0, 0.002, 0.067, -0.125],     # 3 kPa
+           [0.367, 0.0, 0.001, 0.003, 0.12, -0.062],    # 6 kPa
+           [0.228, 0.0, 0.001, 0.003, 0.127, 0.0],      # 10 kPa
+           [0.415, -0.002, 0.0, 0.002, 0.066, -0.058],  # 20 kPa
+           [0.493, -0.002, 0.0, 0.001, 0.0, -0.118],    # 33 kPa
+           [0.497, -0.003, 0.0, 0.0, 0.0, -0.107],      # 100 kPa
+           [0.234, -0.002, 0.0, 0.002, 0.0, -0.032]])   # 1500 kPa
+
+# Adhikary et al. (2008)
+_register("Adhikary_2008",
+          ["1", "sand", "silt", "clay"],
+          [[0.625, -0.0058, -0.0021, 0.0],     # 10 kPa
+           [0.5637, -0.0051, -0.0027, 0.0],    # 33 kPa
+           [0.1258, -0.0009, 0.0, 0.004],      # 100 kPa
+           [0.085, -0.0007, 0.0, 0.0038],      # 300 kPa
+           [0.0473, -0.0004, 0.0, 0.0042],     # 500 kPa
+           [0.0035, 0.0, 0.0, 0.0045],         # 1000 kPa
+           [0.0071, 0.0, 0.0, 0.0044]])        # 1500 kPa
+
+# Rawls et al. (1982)
+_register("Rawls_1982",
+          ["1", "sand", "silt", "clay", "carbon"],
+          [[0.4188, -0.0030, 0.0, 0.0023, 0.0317],     # 10 kPa
+           [0.3121, -0.0024, 0.0, 0.0032, 0.0314],     # 20 kPa
+           [0.2576, -0.002, 0.0, 0.0036, 0.0299],      # 33 kPa
+           [0.2065, -0.0016, 0.0, 0.0040, 0.0275],     # 50 kPa (60 kPa equation)
+           [0.0349, 0.0, 0.0014, 0.0055, 0.0251],      # 100 kPa
+           [0.0281, 0.0, 0.0011, 0.0054, 0.0220],      # 200 kPa
+           [0.0238, 0.0, 0.0008, 0.0052, 0.0190],      # 400 kPa
+           [0.0216, 0.0, 0.0006, 0.0050, 0.0167],      # 700 kPa
+           [0.0205, 0.0, 0.0005, 0.0049, 0.0154],      # 1000 kPa
+           [0.026, 0.0, 0.0, 0.005, 0.0158]])          # 1500 kPa
+
+# Hall et al. (1977) topsoil
+_register("Hall_1977_top",
+          ["1", "silt", "clay", "carbon", "BD", "clay*clay"],
+          [[47.0, 0.1, 0.25, 1.12, -16.52, 0.0],       # 5 kPa
+           [37.47, 0.12, 0.32, 1.15, -1.25, 0.0],      # 10 kPa
+           [22.66, 0.12, 0.36, 1.0, -7.64, 0.0],       # 33 kPa
+           [8.7, 0.11, 0.45, 1.03, 0.0, 0.0],          # 200 kPa
+           [2.94, 0.0, 0.83, 0.0, 0.0, -0.0054]],      # 1500 kPa
+          scale=0.01)
+
+# Hall et al. (1977) subsoil
+_register("Hall_1977_sub",
+          ["1", "silt", "clay", "BD", "clay*clay"],
+          [[37.20, 0.12, 0.35, -11.73, 0.0],   # 5 kPa
+           [27.87, 0.15, 0.41, -8.32, 0.0],    # 10 kPa
+           [20.81, 0.13, 0.45, -5.96, 0.0],    # 33 kPa
+           [7.57, 0.11, 0.48, 0.0, 0.0],       # 200 kPa
+           [1.48, 0.0, 0.84, 0.0, -0.0054]],   # 1500 kPa
+          scale=0.01)
+
+# Gupta and Larson (1979)
+_register("GuptaLarson_1979",
+          ["sand", "silt", "clay", "carbon", "BD"],
+          [[7.053e-3, 10.242e-3, 10.07e-3, 6.333e-3, -32.12e-2],    # 4 kPa
+           [5.678e-3, 9.228e-3, 9.135e-3, 6.103e-3, -26.96e-2],     # 7 kPa
+           [5.018e-3, 8.548e-3, 8.833e-3, 4.966e-3, -24.23e-2],     # 10 kPa
+           [3.89e-3, 7.066e-3, 8.408e-3, 2.817e-3, -18.78e-2],      # 20 kPa
+           [3.075e-3, 5.886e-3, 8.039e-3, 2.208e-3, -14.34e-2],     # 33 kPa
+           [2.181e-3, 4.557e-3, 7.557e-3, 2.191e-3, -9.276e-2],     # 60 kPa
+           [1.563e-3, 3.62e-3, 7.154e-3, 2.388e-3, -5.759e-2],      # 100 kPa
+           [0.932e-3, 2.643e-3, 6.636e-3, 2.717e-3, -2.214e-2],     # 200 kPa
+           [0.483e-3, 1.943e-3, 6.128e-3, 2.925e-3, -0.204e-2],     # 400 kPa
+           [0.214e-3, 1.538e-3, 5.908e-3, 2.855e-3, 1.53e-2],       # 700 kPa
+           [0.076e-3, 1.334e-3, 5.802e-3, 2.653e-3, 2.145e-2],      # 1000 kPa
+           [-0.059e-3, 1.142e-3, 5.766e-3, 2.228e-3, 2.671e-2]])    # 1500 kPa
+
+# Batjes (1996)
+_register("Batjes_1996",
+          ["silt", "clay", "carbon"],
+          [[0.5482, 0.6903, 4.2844],   # 0 kPa
+           [0.5436, 0.6463, 3.7091],   # 1 kPa
+           [0.3745, 0.5980, 3.7611],   # 3 kPa
+           [0.2614, 0.6681, 2.2150],   # 5 kPa
+           [0.3999, 0.5266, 3.1752],   # 10 kPa
+           [0.4197, 0.5082, 2.5043],   # 20 kPa
+           [0.3045, 0.4600, 2.0703],   # 33 kPa
+           [0.3636, 0.5032, 2.4461],   # 50 kPa
+           [0.2390, 0.4611, 1.5742],   # 250 kPa
+           [0.1170, 0.3624, 1.6054]],  # 1500 kPa
+          scale=0.01)
+
+# Pidgeon (1972), 10 and 33 kPa are derived from the field capacity equation
+_register("Pidgeon_1972",
+          ["1", "BD", "silt*BD", "clay*BD", "carbon*BD"],
+          [[-2.54 / 91.0, 7.38 / 91.0, 0.16 / 91.0, 0.3 / 91.0, 1.54 / 91.0],    # 10 kPa
+           [-3.77 / 95.0, 7.38 / 95.0, 0.16 / 95.0, 0.3 / 95.0, 1.54 / 95.0],    # 33 kPa
+           [0.0, -4.19e-2, 0.19e-2, 0.39e-2, 0.9e-2]])                           # 1500 kPa
+
+# Lal (1978) Group I
+_register("Lal_1978_Group1",
+          ["BD", "clay*BD"],
+          [[0.289, 0.004],     # 0 kPa
+           [0.102, 0.003],     # 10 kPa
+           [0.065, 0.004],     # 33 kPa
+           [0.006, 0.003]])    # 1500 kPa
+
+# Lal (1978) Group II
+_register("Lal_1978_Group2",
+          ["BD", "clay*BD"],
+          [[0.296, 0.004],     # 0 kPa
+           [0.080, 0.003],     # 10 kPa
+           [0.047, 0.003],     # 33 kPa
+           [0.025, 0.0022]])   # 1500 kPa
+
+# Aina and Periaswamy (1985)
+_register("AinaPeriaswamy_1985",
+          ["1", "sand", "clay", "BD"],
+          [[0.6788, -0.0055, 0.0, -0.0013],    # 33 kPa
+           [0.00213, 0.0, 0.0031, 0.0]])       # 1500 kPa
+
+# van den Berg et al. (1997)
+_register("vanDenBerg_1997",
+          ["1", "silt", "clay", "carbon", "silt*BD", "clay*BD"],
+          [[10.88, 0.211, 0.347, 1.756, 0.0, 0.0],     # 10 kPa
+           [0.0, 0.0, 0.0, 0.0, 0.104, 0.334]],        # 1500 kPa
+          scale=0.01)
+
+# Tomasella and Hodnett (1998)
+_register("TomasellaHodnett_1998",
+          ["1", "silt", "clay", "carbon"],
+          [[37.937, 0.298, 0.159, 2.24],   # 0 kPa
+           [23.839, 0.53, 0.255, 0.0],     # 1 kPa
+           [18.495, 0.552, 0.262, 0.0],    # 3 kPa
+           [12.333, 0.576, 0.3, 0.0],      # 6 kPa
+           [9.806, 0.543, 0.321, 0.0],     # 10 kPa
+           [4.046, 0.426, 0.404, 0.0],     # 33 kPa
+           [3.198, 0.369, 0.351, 0.0],     # 100 kPa
+           [1.567, 0.258, 0.361, 0.0],     # 500 kPa
+           [0.91, 0.15, 0.396, 0.0]],      # 1500 kPa
+          scale=0.01)
+
+# Reichert et al. (2009) - Sand, silt, clay, OM, BD
+_register("Reichert_2009_OM",
+          ["BD", "sand*BD", "silt*BD", "clay*BD", "carbon*BD", "BD*BD"],
+          [[0.415, 0.0, 0.26e-2, 0.26e-2, 0.61e-2, -0.207],                 # 6 kPa
+           [0.268, 0.0, 0.24e-2, 0.05e-2 + 0.24e-2, 0.85e-2, -0.127],       # 10 kPa
+           [0.106, 0.0, 0.29e-2, 0.29e-2, 0.93e-2, -0.048],                 # 33 kPa
+           [0.102, -0.08e-2, 0.23e-2 - 0.08e-2, 0.23e-2, 1.08e-2, 0.0],     # 100 kPa
+           [0.268, -0.31e-2, -0.11e-2, 0.0, 1.28e-2, 0.031],                # 500 kPa
+           [-0.04, 0.0, 0.17e-2, 0.15e-2 + 0.17e-2, 0.91e-2, 0.026]])       # 1500 kPa
+
+# Reichert et al. (2009) - Sand, silt, clay, BD
+_register("Reichert_2009",
+          ["BD", "sand*BD", "silt*BD", "clay*BD"],
+          [[0.037, 0.0, 0.38e-2, 0.38e-2],     # 10 kPa
+           [0.366, -0.34e-2, 0.0, 0.0],        # 33 kPa
+           [0.236, -0.21e-2, 0.0, 0.045e-2]])  # 1500 kPa
+
+# Shwetha and Varija (2013)
+_register("ShwethaVarija_2013",
+          ["1", "sand", "silt", "BD", "sand*sand", "sand*silt", "sand*BD", "silt*silt", "silt*BD", "BD*BD"],
+          [[-4.263, 0.00194, 0.02839, 5.568, -0.00005, -0.00011, 0.00106, -0.00005, -0.01158, -1.78],          # 33 kPa
+           [-2.081, -0.00776, 0.00589, 3.452, -0.00007, -0.00018, 0.01047, 0.0000003, 0.00402, -1.4],          # 100 kPa
+           [-2.029, -0.00039, 0.02393, 2.859, -0.00007, -0.000178, 0.00614, -0.000150, -0.00352, -1.092],      # 300 kPa
+           [-1.079, 0.01539, 0.02272, 0.961, -0.00009, -0.00021, -0.00275, -0.000171, -0.00146, -0.287],       # 500 kPa
+           [-2.488, -0.01215, 0.00750, 4.051, -0.00007, -0.00016, 0.01333, 0.00002, 0.00131, -1.633],          # 1000 kPa
+           [-1.076, -0.00234, -0.00334, 1.920, -0.00003, 0.00003, 0.00101, 0.00006, -0.00077, -0.666]])        # 1500 kPa
+
+# Dashtaki et al. (2010)
+_register("Dashtaki_2010_point",
+          ["1", "sand", "clay", "BD", "clayPerSilt"],
+          [[34.3, -0.38, 0.0, 12.4, 0.0],      # 10 kPa
+           [14.1, -0.283, 0.0, 17.1, 0.0],     # 30 kPa
+           [12.2, -0.31, 0.0, 14.3, 0.0],      # 100 kPa
+           [12.0, -0.22, 0.0, 8.41, 4.3],      # 300 kPa
+           [9.4, 0.0, 0.32, 0.0, 0.0],         # 500 kPa
+           [6.2, 0.0, 0.33, 0.0, 0.0]],        # 1500 kPa
+          scale=0.01)
+
+# Santra et al. (2018) - Sand, Clay, OC, BD (OC in g/kg, hence the factor of 10)
+_register("Santra_2018_OC",
+          ["BD", "sand*BD", "clay*BD", "carbon*BD", "sand*clay*BD", "sand*carbon*BD", "clay*carbon*BD"],
+          [[24.98, -0.205, 0.28, 0.192 * 10.0, 0.0, 0.0, 0.0],                  # 33 kPa
+           [4.341, 0.0, 0.435, 0.0, -0.00431, 0.00190 * 10.0, 0.00169 * 10.0]],  # 1500 kPa
+          scale=0.01)
+
+# Santra et al. (2018) - Sand, Clay, BD
+_register("Santra_2018",
+          ["BD", "sand*BD", "clay*BD", "sand*clay*BD"],
+          [[27.80, -0.231, 0.262, 0.0],            # 33 kPa
+           [10.06, -0.0847, 0.303, -0.00186]],     # 1500 kPa
+          scale=0.01)
+
+def isLinear(PTFOption):
+    return PTFOption in _tables
+
+def getTable(PTFOption):
+    return _tables[PTFOption]
+
+def usesLogCarbon(PTFOption):
+    # True if the tabulated PTF has a log10 carbon term (carbon must be positive)
+    return isLinear(PTFOption) and any("log10C" in term.split("*") for term in _tables[PTFOption].terms)
+
+def _inputColumns(sand, silt, clay, carbon, BD, carbonConFactor):
+
+    columns = {}
+
+    for name, values in [("sand", sand), ("silt", silt), ("clay", clay), ("BD", BD)]:
+        if values is not None:
+            columns[name] = np.asarray(values, dtype=np.float64).ravel()
+
+    if carbon is not None:
+        columns["carbon"] = np.asarray(carbon, dtype=np.float64).ravel() * float(carbonConFactor)
+
+    return columns
+
+def _uniqueColumns(columns):
+
+    # Distinct rows of the input columns (see dedup), the design matrix is only built for these
+    names = list(columns.keys())
+    uniqueColumns, inverse = dedup.uniqueRows([columns[name] for name in names])
+
+    return dict(zip(names, uniqueColumns)), inverse
+
+def _inputColumn(name, columns):
+
+    if name not in columns:
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if name == "log10C":
+                columns[name] = np.log10(columns["carbon"])
+
+            elif name == "clayPerSilt":
+                columns[name] = columns["clay"] / columns["silt"]
+
+            else:
+                raise KeyError("Input " + str(name) + " not supplied")
+
+    return columns[name]
+
+def designMatrix(terms, columns):
+
+    '''
+    Builds the records x terms design matrix from the input columns.
+    Columns (including products) are added to the columns dictionary, so a term
+    shared by several tables is only calculated once.
+    '''
+
+    N = len(next(iter(columns.values())))
+    X = np.empty((N, len(terms)), dtype=np.float64)
+
+    for k, term in enumerate(terms):
+
+        if term not in columns:
+
+            if term == "1":
+                columns[term] = np.ones(N)
+
+            else:
+                product = None
+                for name in term.split("*"):
+                    values = _inputColumn(name, columns)
+                    product = values if product is None else product * values
+
+                columns[term] = product
+
+        X[:, k] = columns[term]
+
+    return X
+
+def calcLinearPTF(PTFOption, sand=None, silt=None, clay=None, carbon=None, BD=None, carbonConFactor=1.0):
+
+    '''
+    Returns the water contents (records x pressures) of a tabulated point-PTF.
+    The design matrix only has a row per distinct soil, the water contents are scattered back.
+    carbon is OC or OM as read from the shapefile, it is multiplied by carbonConFactor.
+    '''
+
+    table = _tables[PTFOption]
+    columns, inverse = _uniqueColumns(_inputColumns(sand, silt, clay, carbon, BD, carbonConFactor))
+
+    X = designMatrix(table.terms, columns)
+
+    return dedup.scatter(np.dot(X, table.B) * table.scale, inverse)
+
+def calcLinearPTFs(PTFOptions, sand=None, silt=None, clay=None, carbon=None, BD=None, carbonConFactor=1.0):
+
+    '''
+    Evaluates several tabulated point-PTFs with one product of the design matrix
+    (union of their terms) and the side-by-side coefficient matrices.
+    Returns a list of records x pressures matrices, in the order of PTFOptions.
+    '''
+
+    tables = [_tables[PTFOption] for PTFOption in PTFOptions]
+
+    terms = []
+    for table in tables:
+        for term in table.terms:
+            if term not in terms:
+                terms.append(term)
+
+    widths = [table.B.shape[1] for table in tables]
+    B = np.zeros((len(terms), sum(widths)), dtype=np.float64)
+
+    col = 0
+    for table, width in zip(tables, widths):
+        rows = [terms.index(term) for term in table.terms]
+        B[rows, col:col + width] = table.B * table.scale
+        col += width
+
+    columns, inverse = _uniqueColumns(_inputColumns(sand, silt, clay, carbon, BD, carbonConFactor))
+    WC = dedup.scatter(np.dot(designMatrix(terms, columns), B), inverse)
+
+    bounds = np.cumsum([0] + widths)
+
+    return [WC[:, bounds[i]:bounds[i + 1]] for i in range(0, len(tables))]
@@ -1,8 +1,30 @@
 import logging
-import arcpy
 import os
+import sys
 import datetime
 
+# Without arcpy (batch runs) messages go to stdout/stderr
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+
+def _addMessage(msg, levelno):
+
+    if arcpy is not None:
+        if levelno >= logging.ERROR:
+            arcpy.AddError(msg)
+        elif levelno >= logging.WARNING:
+            arcpy.AddWarning(msg)
+        else:
+            arcpy.AddMessage(msg)
+
+    elif levelno >= logging.WARNING:
+        sys.stderr.write(str(msg) + '\n')
+
+    else:
+        sys.stdout.write(str(msg) + '\n')
+
 class ArcpyMessageHandler(logging.FileHandler):
 
     def __init__(self, filename, mode, encoding=None, delay=False):
@@ -19,12 +41,7 @@ class ArcpyMessageHandler(logging.FileHandler):
             msg = record.msg
 
         # Log message to arcpy.AddMessage, AddWarning or AddError
-        if record.levelno >= logging.ERROR:
-            arcpy.AddError(msg)
-        elif record.levelno >= logging.WARNING:
-            arcpy.AddWarning(msg)
-        else:
-            arcpy.AddMessage(msg)
+        _addMessage(msg, record.levelno)
 
         # Also log message to file using FileHandler's emit function
         logging.FileHandler.emit(self, record)
@@ -74,7 +91,7 @@ def info(msg):
         if len(root_logger.handlers) > 0:
             logging.info(msg)
         else:
-            arcpy.AddMessage(msg)
+            _addMessage(msg, logging.INFO)
 
     except:
         pass
@@ -88,7 +105,7 @@ def warning(msg):
         if len(root_logger.handlers) > 0:
             logging.warning(msg)
         else:
-            arcpy.AddWarning(msg)
+            _addMessage(msg, logging.WARNING)
 
     except:
         pass
@@ -102,7 +119,7 @@ def error(msg):
         if len(root_logger.handlers) > 0:
             logging.error(msg)
         else:
-            arcpy.AddError(msg)
+            _addMessage(msg, logging.ERROR)
 
     except:
         pass
@@ -116,7 +133,7 @@ def exception(msg):
         if len(root_logger.handlers) > 0:
             logging.exception(msg)
         else:
-            arcpy.AddError(msg)
+            _addMessage(msg, logging.ERROR)
 
     except:
         pass
@@ -6,7 +6,6 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.progress as progress
@@ -14,10 +13,11 @@ import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.vanGenuchten as vanGenuchten
 import LUCI_PTFs.lib.thresholds as thresholds
 import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.dedup as dedup
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, vanGenuchten, thresholds, PTFdatabase])
+refresh_modules([log, common, vanGenuchten, thresholds, PTFdatabase, dedup])
 
 def plotPTF(outputFolder, outputShp, PTFOption, nameArray, results):
 
@@ -25,12 +25,18 @@ def plotPTF(outputFolder, outputShp, PTFOption, nameArray, results):
     import matplotlib.pyplot as plt
     import numpy as np
 
-    PTFInfo = PTFdatabase.checkPTF(PTFOption)
+    PTFInfo = PTFdatabase.getPTF(PTFOption)
     PTFPressures = PTFInfo.PTFPressures
     PTFUnit = PTFInfo.PTFUnit
 
-    # Remove warning
-    results.pop(0)
+    # Remove warning (without modifying the caller's list)
+    results = results[1:]
+
+    # Each distinct soil (name and water contents) is checked and plotted once
+    soils = dedup.uniqueSoils(nameArray, results)
+
+    nameArray = [nameArray[i] for i in soils]
+    results = [np.asarray(result, dtype=np.float64)[soils] for result in results]
 
     waterContents = []
 
@@ -46,9 +52,7 @@ def plotPTF(outputFolder, outputShp, PTFOption, nameArray, results):
     # log.info('DEBUG: waterContents: ')
     # log.info(waterContents)
 
-    PTFInfo = PTFdatabase.checkPTF(PTFOption)
-    WCheadings = PTFInfo.PTFFields
-    WCheadings.pop(0) # remove warning
+    WCheadings = PTFInfo.PTFFields[1:] # remove warning
 
     for j in range(0, len(waterContents)):
         WC = waterContents[j]
@@ -1,10 +1,15 @@
-import arcpy
 import os
 import sys
 import time
 import traceback
 import xml.etree.cElementTree as ET
 
+# Without arcpy (batch runs) there is no scratch geodatabase to record
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 
@@ -14,7 +19,7 @@ refresh_modules([log, common])
 ### Global timing variables ###
 
 times = []
-startTime = time.clock()
+startTime = time.time()
 times.append(startTime)
 
 def initProgress(folder, rerun):
@@ -37,7 +42,7 @@ def initProgress(folder, rerun):
 
         # Write scratch GDB to XML file if not already present
         scratchGDBNode = root.find('ScratchGDB')
-        if scratchGDBNode is None:
+        if scratchGDBNode is None and arcpy is not None:
             scratchGDBNode = createXMLNode(root, 'ScratchGDB')
             scratchGDBNode.text = str(arcpy.env.scratchGDB)
 
@@ -91,7 +96,7 @@ def logProgress(codeBlockName, folder):
 
         # Calculate and update timings
         currentTimeFormatted = time.asctime(time.localtime(time.time()))
-        currentTime = time.clock()
+        currentTime = time.time()
         prevElapsed = round(currentTime - times[-1], 1)
         startElapsed = round(currentTime - startTime, 1)
 
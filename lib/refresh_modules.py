@@ -1,4 +1,3 @@
-import arcpy
 import os
 import xml.etree.cElementTree as ET
 import traceback
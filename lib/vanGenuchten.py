@@ -1,16 +1,20 @@
-import arcpy
 import os
 import sys
 import csv
+import numpy as np
 
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.curve_cache as curve_cache
+import LUCI_PTFs.lib.dedup as dedup
+import LUCI_PTFs.lib.kernels as kernels
+import LUCI_PTFs.lib.data_access as data_access
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, PTFdatabase])
+refresh_modules([log, common, PTFdatabase, curve_cache, dedup, kernels, data_access])
 
 def calcVGfxn(pressure, theta_res, theta_sat, alpha, n, m):
     
@@ -23,6 +27,29 @@ def calcVGfxn(pressure, theta_res, theta_sat, alpha, n, m):
     # Return WC    
     return vg_WC
 
+def calcVGArray(pressures, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
+
+    # Batched version of calcVGfxn
+    # Calculates the water content of every record at every pressure in one broadcast
+    # Parameter arrays have one value per record (N), pressures is a vector (P)
+    # Returns an N x P array with one row per record and one column per pressure (kPa)
+
+    # Use the compiled kernel if Numba is installed
+    if kernels.available():
+        return kernels.vgArray(pressures, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+
+    psi_kPa = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+
+    theta_res = np.asarray(WC_residualArray, dtype=np.float64).reshape(-1, 1)
+    theta_sat = np.asarray(WC_satArray, dtype=np.float64).reshape(-1, 1)
+    alpha = np.asarray(alpha_VGArray, dtype=np.float64).reshape(-1, 1)
+    n = np.asarray(n_VGArray, dtype=np.float64).reshape(-1, 1)
+    m = np.asarray(m_VGArray, dtype=np.float64).reshape(-1, 1)
+
+    vg_WC = theta_res + ((theta_sat - theta_res) / ((1.0 + ((alpha * psi_kPa) ** n))) ** m)
+
+    return vg_WC
+
 def calcMVGfxn(pressure, K_sat, alpha, n, m, l):
 
     # Calculate Mualem-van Genuchten
@@ -50,29 +77,233 @@ def calcthetaHKfxn(pressure, WC_res, WC_sat, alpha, n, m, K_sat, l):
             
     return thetaH, Ktheta
 
+def calcMVGArray(pressures, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray=None, WC_satArray=None):
+
+    # Fused Mualem-van Genuchten kernel
+    # Calculates Se, theta(h), K(h) and K(theta) for every record at every pressure
+    # (alpha * h) ** n is computed once and the other powers are derived from it
+    # Parameter arrays have one value per record (N), pressures is a vector (P)
+    # theta is only calculated if the residual and saturated water contents are given
+    # Returns an N x P structured array with the fields Se, theta, Kh and Ktheta
+
+    # Use the compiled kernel if Numba is installed
+    if kernels.available():
+        return kernels.mvgArray(pressures, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray, WC_satArray)
+
+    psi_kPa = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+
+    K_sat = np.asarray(K_satArray, dtype=np.float64).reshape(-1, 1)
+    alpha = np.asarray(alpha_VGArray, dtype=np.float64).reshape(-1, 1)
+    n = np.asarray(n_VGArray, dtype=np.float64).reshape(-1, 1)
+    m = np.asarray(m_VGArray, dtype=np.float64).reshape(-1, 1)
+    l = np.asarray(l_MvGArray, dtype=np.float64).reshape(-1, 1)
+
+    mvgArray = np.empty((K_sat.shape[0], psi_kPa.shape[1]), dtype=[('Se', 'f8'), ('theta', 'f8'), ('Kh', 'f8'), ('Ktheta', 'f8')])
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+
+        # Shared power terms
+        alphaH = alpha * psi_kPa
+        alphaH_n = alphaH ** n
+        B = 1.0 + alphaH_n
+        B_m = B ** m
+
+        # (alpha * h) ** (n - 1) from the shared term, it is 0 at h = 0 for n > 1
+        alphaH_n1 = np.where(alphaH > 0.0, alphaH_n / alphaH, np.where(n == 1.0, 1.0, 0.0))
+
+        # Se = 1 / (1 + (alpha * h) ** n) ** m, so Se ** (1 / m) = 1 / B
+        Se = 1.0 / B_m
+
+        mvgArray['Se'] = Se
+        mvgArray['Kh'] = K_sat * ((B_m - alphaH_n1) ** 2.0) / (B_m ** (l + 2.0))
+        mvgArray['Ktheta'] = K_sat * (Se ** l) * (1.0 - (alphaH_n / B) ** m) ** 2.0
+
+    if WC_residualArray is not None and WC_satArray is not None:
+        theta_res = np.asarray(WC_residualArray, dtype=np.float64).reshape(-1, 1)
+        theta_sat = np.asarray(WC_satArray, dtype=np.float64).reshape(-1, 1)
+        mvgArray['theta'] = theta_res + (theta_sat - theta_res) * Se
+
+    else:
+        mvgArray['theta'] = np.nan
+
+    return mvgArray
+
+def _targetArray(targets):
+
+    # Targets are either one vector (T) shared by all records or an N x T array
+    targetArray = np.asarray(targets, dtype=np.float64)
+
+    if targetArray.ndim < 2:
+        targetArray = targetArray.reshape(1, -1)
+
+    return targetArray
+
+def calcPressureVGArray(targetWC, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
+
+    # Inverse of calcVGArray
+    # Calculates the pressure (kPa) at which each record reaches the target water contents
+    # Uses the closed form h = ((Se ** (-1 / m) - 1) ** (1 / n)) / alpha
+    # Targets at or above saturation return 0 kPa
+    # Targets at or below the residual water content cannot be reached and return NaN
+    # Returns an N x T array with one row per record and one column per target
+
+    theta = _targetArray(targetWC)
+
+    theta_res = np.asarray(WC_residualArray, dtype=np.float64).reshape(-1, 1)
+    theta_sat = np.asarray(WC_satArray, dtype=np.float64).reshape(-1, 1)
+    alpha = np.asarray(alpha_VGArray, dtype=np.float64).reshape(-1, 1)
+    n = np.asarray(n_VGArray, dtype=np.float64).reshape(-1, 1)
+    m = np.asarray(m_VGArray, dtype=np.float64).reshape(-1, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Se = (theta - theta_res) / (theta_sat - theta_res)
+        pressure = ((Se ** (-1.0 / m) - 1.0) ** (1.0 / n)) / alpha
+
+    pressure = np.where(Se >= 1.0, 0.0, pressure)
+    pressure = np.where(Se > 0.0, pressure, np.nan)
+
+    return pressure
+
+def _lnKhGradient(lnX, lnKsat, n, m, l, excess):
+
+    # ln K(h) of the MVG model and d ln K / d ln h at ln(alpha * h), with the shared power terms of calcMVGArray
+    # excess is the exponent of x in (x ** n) ** m / x ** (n - 1), 0 for the Mualem constraint m = 1 - 1 / n
+    A = np.exp(n * lnX)
+    B = 1.0 + A
+    B_m = B ** m
+    C = np.exp((n - 1.0) * lnX)
+
+    # At the dry end B ** m - C = A ** m * ((1 + 1 / A) ** m - 1) + (A ** m - C), rewritten to avoid cancellation
+    D = np.where(lnX < 0.0, B_m - C,
+                 np.exp(m * n * lnX) * np.expm1(m * np.log1p(1.0 / A)) + C * np.expm1(excess * lnX))
+
+    lnK = lnKsat + 2.0 * np.log(np.abs(D)) - (l + 2.0) * m * np.log(B)
+    gradient = 2.0 * (m * n * A * B_m / B - (n - 1.0) * C) / D - (l + 2.0) * m * n * A / B
+
+    return lnK, gradient
+
+def calcPressureKhArray(targetK, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, maxIter=100, tolerance=1e-10):
+
+    # Inverse of the MVG K(h) in calcMVGArray, K = K_sat * (B ** m - x ** (n - 1)) ** 2 / B ** (m * (l + 2))
+    # with x = alpha * h and B = 1 + x ** n, for any m (m = 1 - 1 / n is not assumed)
+    # Calculates the pressure (kPa) at which each record's conductivity falls to the target values
+    # K(h) has no closed-form inverse so Newton's method is used on ln K against ln h, starting from
+    # the dry-end asymptote of K and kept inside a bracket of the root (bisection if a step leaves it)
+    # Without the constraint K(h) need not decrease monotonically, the bracket is then the first
+    # crossing of the target on a grid of ln(alpha * h), so the wettest pressure is returned
+    # Targets at or above K_sat return 0 kPa
+    # Non-positive targets, targets not reached for alpha * h up to exp(50) and records that
+    # do not converge return NaN
+    # Returns an N x T array with one row per record and one column per target
+
+    targetArray = _targetArray(targetK)
+
+    K_sat = np.asarray(K_satArray, dtype=np.float64).reshape(-1, 1)
+    alpha = np.asarray(alpha_VGArray, dtype=np.float64).reshape(-1, 1)
+    n = np.asarray(n_VGArray, dtype=np.float64).reshape(-1, 1)
+    m = np.asarray(m_VGArray, dtype=np.float64).reshape(-1, 1)
+    l = np.asarray(l_MvGArray, dtype=np.float64).reshape(-1, 1)
+
+    shape = np.broadcast(targetArray, K_sat).shape
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+
+        saturated = (targetArray >= K_sat) & np.ones(shape, dtype=bool)
+        unreachable = ~(targetArray > 0.0) & np.ones(shape, dtype=bool)
+
+        lnTarget = np.log(targetArray)
+        lnKsat = np.log(K_sat)
+
+        mualem = np.isclose(m, 1.0 - 1.0 / n, rtol=1e-12, atol=0.0)
+        excess = np.where(mualem, 0.0, m * n - (n - 1.0))
+
+        # Bracket of ln(alpha * h): K is above the target at the wet end, where (alpha * h) ** (n - 1)
+        # is below exp(-40), and below it at the dry end
+        lower = np.where(n > 1.0, np.clip(-40.0 / (n - 1.0), -4000.0, -10.0), -10.0) + np.zeros(shape)
+        upper = np.full(shape, 50.0)
+
+        lnKupper = _lnKhGradient(upper, lnKsat, n, m, l, excess)[0]
+        reached = lnKupper < lnTarget
+
+        if not mualem.all():
+            free = ~mualem & np.ones(shape, dtype=bool)
+            found = ~free
+
+            wettest = lower.copy()
+            spacing = (upper - lower) / 2400.0
+
+            for point in range(1, 2401):
+
+                if found.all():
+                    break
+
+                lnGrid = wettest + point * spacing
+                crossed = ~found & (_lnKhGradient(lnGrid, lnKsat, n, m, l, excess)[0] < lnTarget)
+                upper = np.where(crossed, lnGrid, upper)
+                lower = np.where(crossed, lnGrid - spacing, lower)
+                found = found | crossed
+
+            reached = np.where(free, found, reached)
+
+        unreachable = unreachable | ~reached
+
+        # Initial guess from the dry-end asymptote
+        # With the constraint K ~ K_sat * m ** 2 * x ** -(2 + (n - 1) * (l + 2)),
+        # otherwise K ~ K_sat * x ** (2 * max(m * n, n - 1) - m * n * (l + 2))
+        slope = np.where(mualem, 2.0 + (n - 1.0) * (l + 2.0), m * n * (l + 2.0) - 2.0 * np.maximum(m * n, n - 1.0))
+        offset = np.where(mualem, 2.0 * np.log(m), 0.0)
+
+        lnX = np.where(slope > 0.0, (lnKsat + offset - lnTarget) / slope, 0.0) + np.zeros(shape)
+        lnX = np.where((lnX > lower) & (lnX < upper), lnX, 0.5 * (lower + upper))
+
+        converged = saturated | unreachable
+
+        for iteration in range(0, maxIter):
+
+            lnK, gradient = _lnKhGradient(lnX, lnKsat, n, m, l, excess)
+            residual = lnK - lnTarget
+
+            converged = converged | (np.abs(residual) < tolerance)
+
+            if converged.all():
+                break
+
+            # K above the target: the root is drier, otherwise wetter
+            lower = np.where(residual > 0.0, lnX, lower)
+            upper = np.where(residual > 0.0, upper, lnX)
+
+            # Newton step, or bisection if it leaves the bracket
+            newX = lnX - residual / gradient
+            inside = np.isfinite(newX) & (newX > lower) & (newX < upper)
+            newX = np.where(inside, newX, 0.5 * (lower + upper))
+
+            converged = converged | (upper - lower < tolerance)
+            lnX = np.where(converged, lnX, newX)
+
+        # Only roots of the target are returned
+        residual = _lnKhGradient(lnX, lnKsat, n, m, l, excess)[0] - lnTarget
+        converged = converged & (np.abs(residual) < np.sqrt(tolerance))
+
+        pressure = np.exp(lnX) / alpha
+
+    pressure = np.where(converged & ~unreachable, pressure, np.nan)
+    pressure = np.where(saturated, 0.0, pressure)
+
+    return pressure
+
 def writeVGParams(outputShp, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
     # Write VG parameters to the shapefile
 
     # Add fields
-    arcpy.AddField_management(outputShp, "WC_res", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_sat", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "alpha_VG", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "n_VG", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "m_VG", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_res", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "WC_sat", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "alpha_VG", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "n_VG", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "m_VG", "DOUBLE", 10, 6)
 
     outputFields = ["WC_res", "WC_sat", "alpha_VG", "n_VG", "m_VG"]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = WC_residualArray[recordNum]
-            row[1] = WC_satArray[recordNum]
-            row[2] = alpha_VGArray[recordNum]
-            row[3] = n_VGArray[recordNum]
-            row[4] = m_VGArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, outputFields, [WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray])
 
 def plotVG(outputFolder, WC_residualArray,
            WC_satArray, alpha_VGArray, n_VGArray,
@@ -103,10 +334,19 @@ def plotVG(outputFolder, WC_residualArray,
     else:
         log.error('Pressure unit for PTF not recognised')
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'VG_waterContents')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    # Each distinct soil (name and VG parameters) is plotted and written to the curve CSV once
+    vgParams = [WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray]
+    soils = dedup.uniqueSoils(nameArray, vgParams)
+
+    nameArray = [nameArray[i] for i in soils]
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = [np.asarray(param, dtype=np.float64)[soils] for param in vgParams]
+
+    # Set pressure vector and calculate WC over it for every soil
+    psi_kPa = np.linspace(0.0, 1500.0, 1501)
+    vgCurves = curve_cache.getCurves('VG', calcVGArray, psi_kPa, [WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray])
+
+    # Write the curves of the soils to the curve CSV
+    common.writeCurveCSV(outputFolder, 'VG_waterContents', nameArray, psi_kPa, vgCurves, 'Pressures_kPa', 'WaterContents')
 
     # Plot 1: pressure on the x-axis and water content on the y-axis
     for i in range(0, len(nameArray)):
@@ -114,13 +354,7 @@ def plotVG(outputFolder, WC_residualArray,
         outPath = os.path.join(outputFolder, outName)
         title = 'Van Genuchten plot for ' + str(nameArray[i])
 
-        # Set pressure vector
-        psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-        # Calculate WC over the pressure vector above
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-
-        common.writeWCCSV(outFolder, nameArray[i], psi_kPa, vg_WC, 'Pressures_kPa', 'WaterContents')
+        vg_WC = vgCurves[i]
 
         # For plotting purposes, adjust psi_plot based on user-input
         if PTFUnit == 'kPa':
@@ -148,14 +382,14 @@ def plotVG(outputFolder, WC_residualArray,
             pwp_plot = float(pwpValue) * -0.1
 
         # Call check for theta at 0 vs theta_sat + 1%        
-        theta_0kPa = calcVGfxn(0, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
+        theta_0kPa = vg_WC[0]
         theta_sat_threshold = WC_satArray[i] * 1.1
 
         if theta_0kPa > theta_sat_threshold:
             log.warning('Water content at 0kPa is larger than theta(saturation) + 1 percent')
 
         # Limits ased on the WCsat and 1500kPa of the curve
-        theta_1500kPa = calcVGfxn(1500, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
+        theta_1500kPa = vg_WC[1500]
         wcBottom = max(theta_1500kPa - 0.01, 0)
         wcTop = min(WC_satArray[i] + 0.1, 1)
 
@@ -201,14 +435,11 @@ def plotVG(outputFolder, WC_residualArray,
     outPath = os.path.join(outputFolder, 'plotVG_logPressure.png')
     title = 'Van Genuchten plots of ' + str(len(nameArray)) + ' soils (log scale)'
 
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
     labels = []
     for i in range(0, len(nameArray)):
 
-        # Calculate WC 
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
+        # WC from the shared curve matrix
+        vg_WC = vgCurves[i]
         
         if PTFUnit == 'kPa':
             pressureUnit = 'kPa'
@@ -269,14 +500,11 @@ def plotVG(outputFolder, WC_residualArray,
     outPath = os.path.join(outputFolder, 'plotVG_Pressure.png')
     title = 'Van Genuchten plots of ' + str(len(nameArray)) + ' soils'
 
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
     labels = []
     for i in range(0, len(nameArray)):
 
-        # Calculate WC 
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
+        # WC from the shared curve matrix
+        vg_WC = vgCurves[i]
         
         if PTFUnit == 'kPa':
             pressureUnit = 'kPa'
@@ -337,10 +565,8 @@ def calcPressuresVG(name, WC_residual, WC_sat, alpha_VG, n_VG, m_VG, vgPressures
     # Calculates water content at user-input pressures
     wcValues = [name]
 
-    for pressure in vgPressures:
-
-        waterContent = calcVGfxn(pressure, WC_residual, WC_sat, alpha_VG, n_VG, m_VG)
-        wcValues.append(waterContent)
+    waterContents = calcVGArray(vgPressures, [WC_residual], [WC_sat], [alpha_VG], [n_VG], [m_VG])
+    wcValues.extend(waterContents[0].tolist())
 
     return wcValues
 
@@ -363,44 +589,25 @@ def writeWaterContent(outputFolder, record, headings, wcArrays):
 
 def calcMVG(K_sat, alpha_VG, n_VG, m_VG, l_MvG):
 
-    # Initialise empty arrays
-    Se_1kPaArray = []
-    Se_3kPaArray = []
-    Se_10kPaArray = []
-    Se_33kPaArray = []
-    Se_100kPaArray = []
-    Se_1500kPaArray = []
-
-    K_Se_1kPaArray = []
-    K_Se_3kPaArray = []
-    K_Se_10kPaArray = []
-    K_Se_33kPaArray = []
-    K_Se_100kPaArray = []
-    K_Se_1500kPaArray = []
-    
-    for x in range(0, len(alpha_VG)):
-
-        # Calculate Se and K_Se at different pressures
-        Se_1kPa, K_Se_1kPa = calcMVGfxn(1.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_3kPa, K_Se_3kPa = calcMVGfxn(3.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_10kPa, K_Se_10kPa = calcMVGfxn(10.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_33kPa, K_Se_33kPa = calcMVGfxn(33.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_100kPa, K_Se_100kPa = calcMVGfxn(100.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_1500kPa, K_Se_1500kPa = calcMVGfxn(1500.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-
-        Se_1kPaArray.append(Se_1kPa)
-        Se_3kPaArray.append(Se_3kPa)
-        Se_10kPaArray.append(Se_10kPa)
-        Se_33kPaArray.append(Se_33kPa)
-        Se_100kPaArray.append(Se_100kPa)
-        Se_1500kPaArray.append(Se_1500kPa)
-
-        K_Se_1kPaArray.append(K_Se_1kPa)
-        K_Se_3kPaArray.append(K_Se_3kPa)
-        K_Se_10kPaArray.append(K_Se_10kPa)
-        K_Se_33kPaArray.append(K_Se_33kPa)
-        K_Se_100kPaArray.append(K_Se_100kPa)
-        K_Se_1500kPaArray.append(K_Se_1500kPa)
+    # Calculate Se and K_Se at the default pressures for all records
+    mvgArray = calcMVGArray([1.0, 3.0, 10.0, 33.0, 100.0, 1500.0], K_sat, alpha_VG, n_VG, m_VG, l_MvG)
+
+    Se = mvgArray['Se']
+    K_Se = mvgArray['Ktheta']
+
+    Se_1kPaArray = Se[:, 0].tolist()
+    Se_3kPaArray = Se[:, 1].tolist()
+    Se_10kPaArray = Se[:, 2].tolist()
+    Se_33kPaArray = Se[:, 3].tolist()
+    Se_100kPaArray = Se[:, 4].tolist()
+    Se_1500kPaArray = Se[:, 5].tolist()
+
+    K_Se_1kPaArray = K_Se[:, 0].tolist()
+    K_Se_3kPaArray = K_Se[:, 1].tolist()
+    K_Se_10kPaArray = K_Se[:, 2].tolist()
+    K_Se_33kPaArray = K_Se[:, 3].tolist()
+    K_Se_100kPaArray = K_Se[:, 4].tolist()
+    K_Se_1500kPaArray = K_Se[:, 5].tolist()
 
     return Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray, K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray
 
@@ -408,40 +615,23 @@ def writeOutputMVG(outputShp, Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kP
     # Write the outputs to the output shapefile
 
     # Add fields
-    arcpy.AddField_management(outputShp, "Se1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se1500kPa", "DOUBLE", 10, 6)
-
-    arcpy.AddField_management(outputShp, "KSe1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe1500kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se1kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se3kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se10kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se33kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se100kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "Se1500kPa", "DOUBLE", 10, 6)
+
+    data_access.addField(outputShp, "KSe1kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "KSe3kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "KSe10kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "KSe33kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "KSe100kPa", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "KSe1500kPa", "DOUBLE", 10, 6)
 
     outputFields = ["Se1kPa", "Se3kPa", "Se10kPa", "Se33kPa", "Se100kPa", "Se1500kPa", "KSe1kPa", "KSe3kPa", "KSe10kPa", "KSe33kPa", "KSe100kPa", "KSe1500kPa"]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = Se_1kPaArray[recordNum]
-            row[1] = Se_3kPaArray[recordNum]
-            row[2] = Se_10kPaArray[recordNum]
-            row[3] = Se_33kPaArray[recordNum]
-            row[4] = Se_100kPaArray[recordNum]
-            row[5] = Se_1500kPaArray[recordNum]
-            row[6] = K_Se_1kPaArray[recordNum]
-            row[7] = K_Se_3kPaArray[recordNum]
-            row[8] = K_Se_10kPaArray[recordNum]
-            row[9] = K_Se_33kPaArray[recordNum]
-            row[10] = K_Se_100kPaArray[recordNum]
-            row[11] = K_Se_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, outputFields, [Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray, K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray])
 
 def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray):
     # Create Van Genuchten plots
@@ -451,10 +641,27 @@ def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvG
     # Check what axis was chosen
     AxisChoice = common.getInputValue(outputFolder, 'Plot_axis')
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'MVG')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    # Each distinct soil (name and MVG parameters) is plotted and written to the curve CSV once
+    mvgParams = [K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray, WC_satArray]
+    soils = dedup.uniqueSoils(nameArray, mvgParams)
+
+    nameArray = [nameArray[i] for i in soils]
+    mvgParams = [np.asarray(param, dtype=np.float64)[soils] for param in mvgParams]
+    K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray, WC_satArray = mvgParams
+
+    # Calculate the curves for all the soils at once
+
+    h = np.linspace(0.0, 1500.0, 1501)
+    curvesH = curve_cache.getCurves('MVG', calcMVGArray, h, mvgParams)
+
+    x = np.linspace(0.0, 1500.0, 1500)
+    curvesX = curve_cache.getCurves('MVG', calcMVGArray, x, mvgParams)
+
+    pressureVal = np.linspace(1.0, 1500.0, 1500)
+    curvesP = curve_cache.getCurves('MVG', calcMVGArray, pressureVal, mvgParams)
+
+    # Write K(h) of the soils to the curve CSV
+    common.writeCurveCSV(outputFolder, 'MVG', nameArray, h, curvesH['Kh'], 'Pressure_kPa', 'Ksat')
 
     ################################
     ### Plot 0: individual plots ###
@@ -466,13 +673,8 @@ def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvG
         outPath = os.path.join(outputFolder, outName)
         title = 'Mualem-Van Genuchten plot for ' + str(nameArray[i])
 
-        # h
-        h = np.linspace(0.0, 1500.0, 1501)
-
         # K(h)
-        k_h = calcKhfxn(h, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-        
-        common.writeWCCSV(outFolder, nameArray[i], h, k_h, 'Pressure_kPa', 'Ksat')
+        k_h = curvesH['Kh'][i]
 
         if AxisChoice == 'Y-axis':
             plt.plot(h, k_h, label=str(nameArray[i]))
@@ -510,11 +712,10 @@ def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvG
     outPath = os.path.join(outputFolder, 'plotMVG.png')
     title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
 
-    x = np.linspace(0.0, 1500.0, 1500)
     labels = []
     for i in range(0, len(nameArray)):
-        y = calcKhfxn(x, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-        
+        y = curvesX['Kh'][i]
+
         if AxisChoice == 'Y-axis':
             plt.plot(x, y, label=str(nameArray[i]))
 
@@ -561,10 +762,10 @@ def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvG
     outPath2 = os.path.join(outputFolder, 'plotMVG_Ktheta.png')
     title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
 
-    pressureVal = np.linspace(0.0, 1500.0, 1500)
     for i in range(0, len(nameArray)):
-        thetaH, Ktheta = calcthetaHKfxn(pressureVal, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], K_satArray[i], l_MvGArray[i])          
-        
+        thetaH = curvesX['theta'][i]
+        Ktheta = curvesX['Ktheta'][i]
+
         if AxisChoice == 'Y-axis':
             plt.plot(thetaH, Ktheta, label=str(nameArray[i]))
 
@@ -609,10 +810,9 @@ def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvG
     outPath3 = os.path.join(outputFolder, 'plotMVG_Ktheta_h.png')
     title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
 
-    pressureVal = np.linspace(1.0, 1500.0, 1500)
     for i in range(0, len(nameArray)):
-        thetaH, Ktheta = calcthetaHKfxn(pressureVal, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], K_satArray[i], l_MvGArray[i])
-        
+        Ktheta = curvesP['Ktheta'][i]
+
         if AxisChoice == 'Y-axis':
             plt.plot(pressureVal, Ktheta, label=str(nameArray[i]))
 
@@ -656,9 +856,7 @@ def calcPressuresMVG(name, K_sat, alpha_VG, n_VG, m_VG, l_MvG, vgPressures):
 
     # Calculates K at user-input pressures
     kValues = [name]
-
-    for pressure in vgPressures:
-        k_h = calcKhfxn(pressure, K_sat, alpha_VG, n_VG, m_VG, l_MvG)
-        kValues.append(k_h)
+    mvgArray = calcMVGArray(vgPressures, [K_sat], [alpha_VG], [n_VG], [m_VG], [l_MvG])
+    kValues.extend(mvgArray['Kh'][0].tolist())
 
     return kValues
\ No newline at end of file
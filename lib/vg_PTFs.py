@@ -6,27 +6,335 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
+from collections import namedtuple
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.data_access as data_access
+import LUCI_PTFs.lib.dedup as dedup
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs])
+refresh_modules([log, common, checks_PTFs, PTFdatabase, data_access, dedup])
+
+###################################################
+### Array versions of the VG PTFs (all records) ###
+###################################################
+
+# Each transformed input (carbon * carbonConFactor, logs, squares, reciprocals) is
+# calculated once for the whole batch. Branches are applied with masks.
+# The functions below call them once per distinct soil (see dedup).
+
+def _asArray(values):
+    return np.asarray(values, dtype=np.float64)
+
+def calcWosten_1999Array(VGOption, sand, silt, clay, carbon, BD, carbonConFactor=1.0):
+
+    '''
+    Wosten et al. (1999), topsoil or subsoil depending on VGOption.
+    Returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG, l_MvG and K_sat arrays.
+    '''
+
+    sand = _asArray(sand)
+    silt = _asArray(silt)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+    OM = _asArray(carbon) * float(carbonConFactor)
+
+    # Topsoil indicator
+    if VGOption == 'Wosten_1999_top':
+        topsoil = 1.0
+    else:
+        topsoil = 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logSilt = np.log(silt)
+        logOM = np.log(OM)
+        logBD = np.log(BD)
+        recipSilt = silt ** (-1.0)
+        recipClay = clay ** (-1.0)
+        recipOM = OM ** (-1.0)
+        recipBD = BD ** (-1.0)
+
+    siltSq = silt ** 2
+    claySq = clay ** 2
+    OMSq = OM ** 2
+    BDSq = BD ** 2
+    BDClay = BD * clay
+    BDSilt = BD * silt
+    BDOM = BD * OM
+
+    # Texture rule for the residual water content
+    WC_residual = np.where((clay < 18.0) & (sand > 65.0), 0.025, 0.01)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+
+        K_sat = (10.0 / 24.0) * np.exp(7.755 + (0.0352 * silt) + (0.93 * topsoil) - (0.976 * BDSq) - (0.000484 * claySq) - (0.000322 * siltSq) + (0.001 * recipSilt) - (0.0748 * recipOM) - (0.643 * logSilt) - (0.0139 * BDClay) - (0.167 * BDOM) + (0.0298 * topsoil * clay) - (0.03305 * topsoil * silt))
+
+        WC_sat = 0.7919 + (0.001691 * clay) - (0.29619 * BD) - (0.000001491 * siltSq) + (0.0000821 * OMSq) + (0.02427 * recipClay + (0.01113 * recipSilt) + (0.01472 * logSilt) - 0.0000733 * OM * clay) - (0.000619 * BDClay) - (0.001183 * BDOM) - (0.0001664 * topsoil * silt)
+
+        # Wosten originally has alpha in cm-1
+        alpha_cm = np.exp(- 14.96 + (0.03135 * clay) + (0.0351 * silt) + (0.646 * OM) + (15.29 * BD) - (0.192 * topsoil) - (4.671 * BDSq) - (0.000781 * claySq) - (0.00687 * OMSq) + (0.0449 * recipOM) + (0.0663 * logSilt) + (0.1482 * logOM) - (0.04546 * BDSilt) - (0.4852 * BDOM) + (0.00673 * topsoil * clay))
+        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
 
-def Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
+        n_VG = 1.0 + np.exp(-25.23 - (0.02195 * clay) + (0.0074 * silt) - (0.1940 * OM) + (45.5 * BD) - (7.24 * BDSq) + (0.0003658 * claySq) + (0.002885 * OMSq) - (12.81 * recipBD) - (0.1524 * recipSilt) - (0.01958 * recipOM) - (0.2876 * logSilt) - (0.0709 * logOM) - (44.6 * logBD) - (0.02264 * BDClay) + (0.0896 * BDOM) + (0.00718 * topsoil * clay))
+        m_VG = 1.0 - (1.0 / n_VG)
+
+        l_MvG_norm = 0.0202 + (0.0006193 * claySq) - (0.001136 * OMSq) - (0.2316 * logOM) - (0.03544 * BDClay) + (0.00283 * BDSilt) + (0.0488 * BDOM)
+        exp_l_MvG = np.exp(l_MvG_norm)
+        l_MvG = 10 * (exp_l_MvG - 1) / (exp_l_MvG + 1)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG, l_MvG, K_sat
+
+def calcVereecken_1989Array(sand, clay, carbon, BD, carbonConFactor=1.0):
+
+    # Vereecken et al. (1989), returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG arrays
+    sand = _asArray(sand)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+    OC = _asArray(carbon) * float(carbonConFactor)
+
+    WC_sat = 0.81 - (0.283 * BD) + (0.001 * clay)
+    WC_residual = 0.015 + (0.005 * clay) + (0.014 * OC)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+
+        # Vereecken et al. (1989) calculates alpha in cm-1
+        alpha_cm = np.exp(-2.486 + (0.025 * sand) - (0.351 * OC) - (2.617 * BD) - (0.023 * clay))
+        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1
+
+        n_VG = np.exp(0.053 - (0.009 * sand) - (0.013 * clay) + (0.00015 * sand ** 2))
+
+    m_VG = np.ones(len(sand))
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def calcZachariasWessolek_2007Array(sand, clay, BD):
+
+    # Zacharias and Wessolek (2007), separate equations for sand < 66.5% and sand >= 66.5%
+    # Returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG arrays
+    sand = _asArray(sand)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+
+    fine = sand < 66.5
+    coarse = ~fine
+
+    WC_residual = np.zeros(len(sand))
+    WC_sat = np.full(len(sand), np.nan)
+    alpha_VG = np.full(len(sand), np.nan)
+    n_VG = np.full(len(sand), np.nan)
+
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+
+        sandF = sand[fine]
+        clayF = clay[fine]
+        BDF = BD[fine]
+
+        WC_sat[fine] = 0.788 + (0.001 * clayF) - (0.263 * BDF)
+        alpha_VG[fine] = np.exp(-0.648 + (0.023 * sandF) + (0.044 * clayF) - (3.168 * BDF)) # Alpha in kPa-1
+        n_VG[fine] = 1.392 - (0.418 * sandF ** (-0.024)) + (1.212 * clayF ** (-0.704))
+
+        sandC = sand[coarse]
+        clayC = clay[coarse]
+        BDC = BD[coarse]
+
+        WC_sat[coarse] = 0.89 - (0.001 * clayC) - (0.322 * BDC)
+        alpha_VG[coarse] = np.exp(- 4.197 + (0.013 * sandC) + (0.076 * clayC) - (0.276 * BDC)) # Alpha in kPa-1
+        n_VG[coarse] = - 2.562 + (7 * 10**(-9) * sandC ** 4.004) + (3.75 * clayC ** (-0.016))
+
+        m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def calcWeynants_2009Array(sand, clay, carbon, BD, carbonConFactor=1.0):
+
+    '''
+    Weynants et al. (2009)
+    Returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG, l_MvG and K_sat arrays.
+    '''
+
+    sand = _asArray(sand)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+    OC = _asArray(carbon) * float(carbonConFactor)
+
+    WC_residual = np.zeros(len(sand))
+    WC_sat = 0.6355 + (0.0013 * clay) - (0.1631 * BD)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+
+        # Alpha in cm-1
+        alpha_cm = np.exp(- 4.3003 - (0.0097 * clay) + (0.0138 * sand) - (0.0992 * OC))
+        alpha_VG = 10.0 * alpha_cm # Convert to kPa-1
+
+        n_VG = np.exp(- 1.0846 - (0.0236 * clay) - (0.0085 * sand) + (0.0001 * sand ** 2)) + 1
+        m_VG = 1.0 - (1.0 / n_VG)
+
+        l_MvG = - 1.8642 - (0.1317 * clay) + (0.0067 * sand)
+
+        K_sat = np.exp(1.9582 + (0.0308 * sand) - (0.6142 * BD) - (0.1566 * OC)) * (10.0 / 24.0)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG, l_MvG, K_sat
+
+def calcDashtaki_2010Array(sand, clay, BD):
+
+    # Dashtaki et al. (2010), returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG arrays
+    sand = _asArray(sand)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+
+    WC_residual = 0.034 + (0.0032 * clay)
+    WC_sat = 0.85 - (0.00061 * sand) - (0.258 * BD)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # Alpha in cm-1
+        alpha_cm = np.abs(1 / (- 476 - (4.1 * sand) + (499 * BD)))
+        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
+
+        n_VG = 1.56 - (0.00228 * sand)
+        m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def calcHodnettTomasella_2002Array(sand, silt, clay, carbon, BD, CEC, pH, carbonConFactor=1.0):
+
+    # Hodnett and Tomasella (2002), returns WC_residual, WC_sat, alpha_VG (kPa-1), n_VG, m_VG arrays
+    sand = _asArray(sand)
+    silt = _asArray(silt)
+    clay = _asArray(clay)
+    BD = _asArray(BD)
+    CEC = _asArray(CEC)
+    pH = _asArray(pH)
+    OC = _asArray(carbon) * float(carbonConFactor)
+
+    sandClay = sand * clay
+    claySq = clay ** 2
+
+    WC_sat = 0.81799 + (9.9 * 10**(-4) * clay) - (0.3142 * BD) + (1.8 * 10**(-4) * CEC) + (0.00451 * pH) - (5 * 10**(-6) * sandClay)
+    WC_residual = 0.22733 - (0.00164 * sand) + (0.00235 * CEC) - (0.00831 * pH) + (1.8 * 10**(-5) * claySq) + (2.6 * 10**(-5) * sandClay)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+
+        # Original equation had values in kPa-1
+        # No internal conversion needed
+        alpha_VG = np.exp(- 0.02294 - (0.03526 * silt) + (0.024 * OC) - (0.00076 * CEC) - (0.11331 * pH) + (0.00019 * silt ** 2))
+
+        n_VG = np.exp(0.62986 - (0.00833 * clay) - (0.00529 * OC) + (0.00593 * pH) + (7 * 10**(-5) * claySq) - (1.4 * 10**(-4) * sand * silt))
+        m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def _Wosten_1999_top(sand, silt, clay, carbon, BD, carbonConFactor=1.0):
+    return calcWosten_1999Array('Wosten_1999_top', sand, silt, clay, carbon, BD, carbonConFactor)
+
+def _Wosten_1999_sub(sand, silt, clay, carbon, BD, carbonConFactor=1.0):
+    return calcWosten_1999Array('Wosten_1999_sub', sand, silt, clay, carbon, BD, carbonConFactor)
+
+# description: for the log, function: array function above, inputs: its input arguments (in order),
+# checks: inputs checked by checks_PTFs.validateInputs
+VGPTF = namedtuple('VGPTF', ['description', 'function', 'inputs', 'checks'])
+
+_vgPTFs = {
+    "Wosten_1999_top": VGPTF("Wosten et al. (1999)", _Wosten_1999_top,
+                             ["sand", "silt", "clay", "carbon", "BD"], ["SSC", "carbon", "BD"]),
+    "Wosten_1999_sub": VGPTF("Wosten et al. (1999)", _Wosten_1999_sub,
+                             ["sand", "silt", "clay", "carbon", "BD"], ["SSC", "carbon", "BD"]),
+    "Vereecken_1989": VGPTF("Vereecken et al. (1989)", calcVereecken_1989Array,
+                            ["sand", "clay", "carbon", "BD"], ["carbon", "sand", "clay", "BD"]),
+    "ZachariasWessolek_2007": VGPTF("Zacharias and Wessolek (2007)", calcZachariasWessolek_2007Array,
+                                    ["sand", "clay", "BD"], ["sand", "clay", "BD"]),
+    "Weynants_2009": VGPTF("Weynants et al. (2009)", calcWeynants_2009Array,
+                           ["sand", "clay", "carbon", "BD"], ["carbon", "sand", "clay", "BD"]),
+    "Dashtaki_2010_vg": VGPTF("Dashtaki et al. (2010)", calcDashtaki_2010Array,
+                              ["sand", "clay", "BD"], ["sand", "clay", "BD"]),
+    "HodnettTomasella_2002": VGPTF("Hodnett and Tomasella (2002)", calcHodnettTomasella_2002Array,
+                                   ["sand", "silt", "clay", "carbon", "BD", "CEC", "pH"], ["SSC", "carbon", "BD", "CEC", "pH"])
+}
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-    l_MvGArray = []
+# Shapefile field of each input (the carbon field is OC or OM)
+_inputNames = {"Sand": "sand", "Silt": "silt", "Clay": "clay", "BD": "BD", "CEC": "CEC", "pH": "pH"}
+
+def getLayerFields(VGOption, outputShp, carbContent=None):
+
+    # Fields read by calcVGLayer: the OID field and the inputs of the VG PTF (LUCIname and texture are not used)
+    inputFields = [field for field in PTFdatabase.getRequiredFields(VGOption, carbContent) if field not in ["LUCIname", "texture"]]
+
+    return [common.getOIDField(outputShp)] + inputFields
+
+def calcVGLayer(VGOption, outputShp, carbContent=None, carbonConFactor=1.0, inputTable=None):
+
+    '''
+    Reads the inputs of the VG PTF from the shapefile in one pass and calculates the
+    VG parameters for the whole layer. If inputTable (a chunk of data_access.streamTable)
+    is given, it is used instead of the shapefile.
+
+    Returns the warning and warnFlags of each record (see checks_PTFs.validateInputs) and the
+    arrays of the PTF: WC_residual, WC_sat, alpha_VG, n_VG and m_VG (and l_MvG and K_sat
+    for Wosten et al. (1999) and Weynants et al. (2009)).
+    '''
+
+    vgPTF = _vgPTFs[VGOption]
+
+    log.info("Calculating van Genuchten parameters using " + vgPTF.description)
+
+    reqFields = getLayerFields(VGOption, outputShp, carbContent)
+    OIDField = reqFields[0]
+    inputFields = reqFields[1:]
+
+    # Retrieve info from input (the fields of a chunk were checked before the stream)
+    # Missing values are NaN in the columns of inputTable
+    if inputTable is None:
+        checks_PTFs.checkInputFields(reqFields, outputShp)
+        inputTable = data_access.readTable(outputShp, reqFields)
+
+    record = inputTable[OIDField].tolist()
+
+    columns = {}
+    for field in inputFields:
+        if field == carbContent or (field in ["OC", "OM"] and "carbon" in vgPTF.inputs):
+            columns["carbon"] = inputTable[field]
+        else:
+            columns[_inputNames[field]] = inputTable[field]
+
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(vgPTF.checks, record, **columns)
+
+    if "carbon" in columns:
+        carbonConFactor = PTFdatabase.getCarbonFactor(VGOption, carbContent, carbonConFactor)
+
+    vgParams = calcVGParams(VGOption, carbonConFactor, **columns)
+
+    return warningArray, warnFlags, vgParams
+
+def calcVGParams(VGOption, carbonConFactor=1.0, **columns):
+
+    '''
+    Calculates the VG parameters of the VG PTF from the input columns (sand, silt, clay,
+    carbon, BD, CEC and pH, as used by the PTF), once per distinct soil (see dedup).
+    carbonConFactor converts the carbon column to the carbon type of the PTF.
+    '''
+
+    vgPTF = _vgPTFs[VGOption]
+    args = [columns[name] for name in vgPTF.inputs]
+
+    if "carbon" in vgPTF.inputs:
+        return dedup.calcUnique(vgPTF.function, args, carbonConFactor=carbonConFactor)
+
+    return dedup.calcUnique(vgPTF.function, args)
+
+def _toLists(arrays):
+    # The shapefile functions return lists, as before
+    return tuple(array.tolist() for array in arrays)
+
+#######################################
+### VG PTFs on the output shapefile ###
+#######################################
+
+def Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
 
     log.info("Calculating van Genuchten parameters using Wosten et al. (1999)")
 
@@ -45,197 +353,60 @@ def Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-            name = row[6]
-            texture = row[7]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkSSC(sandPerc[x], siltPerc[x], clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate VG parameters                    
-        if clayPerc[x] < 18.0 and sandPerc[x] > 65.0:
-            WC_residual = 0.025
-        else:
-            WC_residual = 0.01
-
-        if VGOption == 'Wosten_1999_top':
-
-            K_sat = (10.0 / 24.0) * math.exp(7.755 + (0.0352 * siltPerc[x]) + (0.93 * 1) - (0.976 * BDg_cm3[x]**2) - (0.000484 * clayPerc[x]**2) - (0.000322 * siltPerc[x]**2) + (0.001 * siltPerc[x]**(-1)) - (0.0748 * (carbPerc[x]*float(carbonConFactor))**(-1)) - (0.643 * math.log(siltPerc[x])) - (0.0139 * BDg_cm3[x] * clayPerc[x]) - (0.167 * BDg_cm3[x] * carbPerc[x]*float(carbonConFactor)) + (0.0298 * 1 * clayPerc[x]) - (0.03305 * 1 * siltPerc[x]))
-
-            WC_sat = 0.7919 + (0.001691 * clayPerc[x]) - (0.29619 * BDg_cm3[x]) - (0.000001491 * siltPerc[x]**2) + (0.0000821 * ((carbPerc[x] * float(carbonConFactor)))**2) + (0.02427 * clayPerc[x] **(-1.0) + (0.01113 * siltPerc[x]**(-1.0)) +  (0.01472 * math.log(siltPerc[x])) - 0.0000733 * ((carbPerc[x] * float(carbonConFactor))) * clayPerc[x]) - (0.000619 * BDg_cm3[x] * clayPerc[x]) - (0.001183 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) - (0.0001664 * 1.0 * siltPerc[x])
-                        
-            # Alpha with 10.0 multiplier (convert alpha in cm-1 to kPa-1)
-            alpha_cm = math.exp(- 14.96 + (0.03135 * clayPerc[x]) + (0.0351 * siltPerc[x]) + (0.646 * (carbPerc[x] * float(carbonConFactor))) + (15.29 * BDg_cm3[x]) - (0.192 * 1.0) - (4.671 * BDg_cm3[x] ** 2.0) - (0.000781 * clayPerc[x] ** 2) - (0.00687 * (carbPerc[x] * float(carbonConFactor)) ** 2.0) + (0.0449 * ((carbPerc[x] * float(carbonConFactor)))**(-1.0)) + (0.0663 * math.log(siltPerc[x])) + (0.1482 * math.log((carbPerc[x] * float(carbonConFactor)))) - (0.04546 * BDg_cm3[x] * siltPerc[x]) - (0.4852 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00673 * 1.0 * clayPerc[x]))
-            alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
 
-            n_VG = 1.0 + math.exp(-25.23 - (0.02195 * clayPerc[x]) + (0.0074 * siltPerc[x]) - (0.1940 * (carbPerc[x] * float(carbonConFactor))) + (45.5 * BDg_cm3[x]) - (7.24 * BDg_cm3[x] ** 2.0) +  (0.0003658 * clayPerc[x] **2.0) + (0.002885 * ((carbPerc[x] * float(carbonConFactor)))**2.0) - (12.81 * (BDg_cm3[x])**(-1.0)) - (0.1524 * (siltPerc[x])**(-1.0)) - (0.01958 * ((carbPerc[x] * float(carbonConFactor)))** (-1.0)) - (0.2876 * math.log(siltPerc[x])) - (0.0709 * math.log((carbPerc[x] * float(carbonConFactor)))) - (44.6 * math.log(BDg_cm3[x])) - (0.02264 * BDg_cm3[x] * clayPerc[x]) + (0.0896 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00718 * 1.0 * clayPerc[x]))
-            m_VG = 1.0 - (1.0 / float(n_VG))
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["SSC", "carbon", "BD"], record, sand=sandPerc, silt=siltPerc, clay=clayPerc, carbon=carbPerc, BD=BDg_cm3)
 
-            l_MvG_norm = 0.0202 + (0.0006193 * clayPerc[x]**2) - (0.001136 * (carbPerc[x]*float(carbonConFactor))**2) - (0.2316 * math.log(carbPerc[x]*float(carbonConFactor))) - (0.03544 * BDg_cm3[x] * clayPerc[x]) + (0.00283 * BDg_cm3[x] * siltPerc[x]) + (0.0488 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor)))
-            l_MvG =  10 * (math.exp(l_MvG_norm) - 1) / (math.exp(l_MvG_norm)+1)
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcWosten_1999Array, [sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3], VGOption, carbonConFactor=carbonConFactor)
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = _toLists(vgParams)
 
-        elif VGOption == 'Wosten_1999_sub':
-
-            K_sat = (10.0 / 24.0) * math.exp(7.755 + (0.0352 * siltPerc[x]) + (0.93 * 0) - (0.976 * BDg_cm3[x]**2) - (0.000484 * clayPerc[x]**2) - (0.000322 * siltPerc[x]**2) + (0.001 * siltPerc[x]**(-1)) - (0.0748 * (carbPerc[x]*float(carbonConFactor))**(-1)) - (0.643 * math.log(siltPerc[x])) - (0.0139 * BDg_cm3[x] * clayPerc[x]) - (0.167 * BDg_cm3[x] * carbPerc[x]*float(carbonConFactor)) + (0.0298 * 0* clayPerc[x]) - (0.03305 * 0 * siltPerc[x]))
-
-            WC_sat = 0.7919 + (0.001691 * clayPerc[x]) - (0.29619 * BDg_cm3[x]) - (0.000001491 * siltPerc[x]**2) + (0.0000821 * ((carbPerc[x] * float(carbonConFactor)))**2) + (0.02427 * clayPerc[x] **(-1.0) + (0.01113 * siltPerc[x]**(-1.0)) +  (0.01472 * math.log(siltPerc[x])) - 0.0000733 * ((carbPerc[x] * float(carbonConFactor))) * clayPerc[x]) - (0.000619 * BDg_cm3[x] * clayPerc[x]) - (0.001183 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) - (0.0001664 * 0.0 * siltPerc[x])
-            
-            # Wosten originally has alpha in cm-1
-            alpha_cm = math.exp(- 14.96 + (0.03135 * clayPerc[x]) + (0.0351 * siltPerc[x]) + (0.646 * (carbPerc[x] * float(carbonConFactor))) + (15.29 * BDg_cm3[x]) - (0.192 * 0.0) - (4.671 * BDg_cm3[x] ** 2.0) - (0.000781 * clayPerc[x] ** 2) - (0.00687 * (carbPerc[x] * float(carbonConFactor)) ** 2.0) + (0.0449 * ((carbPerc[x] * float(carbonConFactor)))**(-1.0)) + (0.0663 * math.log(siltPerc[x])) + (0.1482 * math.log((carbPerc[x] * float(carbonConFactor)))) - (0.04546 * BDg_cm3[x] * siltPerc[x]) - (0.4852 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00673 * 0.0 * clayPerc[x]))
-            alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
-            
-            n_VG = 1.0 + math.exp(-25.23 - (0.02195 * clayPerc[x]) + (0.0074 * siltPerc[x]) - (0.1940 * (carbPerc[x] * float(carbonConFactor))) + (45.5 * BDg_cm3[x]) - (7.24 * BDg_cm3[x] ** 2.0) +  (0.0003658 * clayPerc[x] **2.0) + (0.002885 * ((carbPerc[x] * float(carbonConFactor)))**2.0) - (12.81 * (BDg_cm3[x])**(-1.0)) - (0.1524 * (siltPerc[x])**(-1.0)) - (0.01958 * ((carbPerc[x] * float(carbonConFactor)))** (-1.0)) - (0.2876 * math.log(siltPerc[x])) - (0.0709 * math.log((carbPerc[x] * float(carbonConFactor)))) - (44.6 * math.log(BDg_cm3[x])) - (0.02264 * BDg_cm3[x] * clayPerc[x]) + (0.0896 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00718 * 0.0 * clayPerc[x]))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-            l_MvG_norm = 0.0202 + (0.0006193 * clayPerc[x]**2) - (0.001136 * (carbPerc[x]*float(carbonConFactor))**2) - (0.2316 * math.log(carbPerc[x]*float(carbonConFactor))) - (0.03544 * BDg_cm3[x] * clayPerc[x]) + (0.00283 * BDg_cm3[x] * siltPerc[x]) + (0.0488 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor)))
-            l_MvG =  10 * (math.exp(l_MvG_norm) - 1) / (math.exp(l_MvG_norm)+1)
-
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
-        l_MvGArray.append(l_MvG)
-        
-        K_satArray.append(K_sat)
-            
     # Write K_sat and warning results to output shapefile
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-    arcpy.AddField_management(outputShp, "K_sat", "DOUBLE", 10, 6)
+    data_access.addField(outputShp, "warning", "TEXT")
+    data_access.addField(outputShp, "K_sat", "DOUBLE", 10, 6)
 
     outputFields = ["warning", "K_sat"]
-    
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = K_satArray[recordNum]
 
-            cursor.updateRow(row)
-            recordNum += 1
+    data_access.writeColumns(outputShp, outputFields, [warningArray, K_satArray])
+
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray
 
 def Vereecken_1989(outputShp, VGOption, carbonConFactor, carbContent):
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-
     log.info("Calculating van Genuchten parameters using Vereecken et al. (1989)")
 
     # Get OID field
     OIDField = common.getOIDField(outputShp)
 
     if carbContent == 'OC':
-        reqFields = [OIDField, "Sand", "Clay", "OC", "BD", "LUCIname", "texture"]                    
+        reqFields = [OIDField, "Sand", "Clay", "OC", "BD", "LUCIname", "texture"]
         carbonConFactor = 1.0
 
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Clay", "OM", "BD", "LUCIname", "texture"]
-        
+
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-            name = row[5]
-            texture = row[6]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_sat = 0.81 - (0.283 * BDg_cm3[x]) + (0.001 * clayPerc[x])
-        WC_residual = 0.015 + (0.005 * clayPerc[x]) + (0.014 * carbPerc[x]*float(carbonConFactor))
-        
-        # Vereecken et al. (1989) calculates alpha in cm-1
-        alpha_cm = math.exp(-2.486 + (0.025 * sandPerc[x]) - (0.351 * carbPerc[x]*float(carbonConFactor)) - (2.617 * BDg_cm3[x]) - (0.023*clayPerc[x]))
-        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1
+    record, sandPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
 
-        n_VG = math.exp(0.053 - (0.009 * sandPerc[x]) - (0.013 * clayPerc[x]) + (0.00015 * sandPerc[x]**2))
-        m_VG = 1.0
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["carbon", "sand", "clay", "BD"], record, carbon=carbPerc, sand=sandPerc, clay=clayPerc, BD=BDg_cm3)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcVereecken_1989Array, [sandPerc, clayPerc, carbPerc, BDg_cm3], carbonConFactor=carbonConFactor)
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = _toLists(vgParams)
 
     common.writeWarning(outputShp, warningArray)
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
 
 def ZachariasWessolek_2007(outputShp, VGOption, carbonConFactor, carbContent):
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-
     log.info("Calculating van Genuchten parameters using Zacharias and Wessolek (2007)")
 
     # Get OID field
@@ -246,79 +417,22 @@ def ZachariasWessolek_2007(outputShp, VGOption, carbonConFactor, carbContent):
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]                        
-            BD = row[3]
-            name = row[4]
-            texture = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        if sandPerc[x] < 66.5:
-            WC_residual = 0
-            WC_sat = 0.788 + (0.001 * clayPerc[x]) - (0.263 * BDg_cm3[x])
-            
-            # Alpha in kPa-1
-            alpha_VG = math.exp(-0.648 + (0.023 * sandPerc[x]) + (0.044 * clayPerc[x]) - (3.168 * BDg_cm3[x]))
-            
-            n_VG = 1.392 - (0.418 * sandPerc[x]**(-0.024)) + (1.212 * clayPerc[x]**(-0.704))
-            m_VG = 1.0 - (1.0 / float(n_VG))
+    record, sandPerc, clayPerc, BDg_cm3, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
 
-        else:
-            WC_residual = 0 
-            WC_sat = 0.89 - (0.001 * clayPerc[x]) - (0.322 * BDg_cm3[x])
-            
-            # Alpha in kPa-1
-            alpha_VG = math.exp(- 4.197 + (0.013 * sandPerc[x]) + (0.076 * clayPerc[x]) - (0.276 * BDg_cm3[x]))
-            
-            n_VG = - 2.562 + (7 * 10**(-9) * sandPerc[x]**4.004) + (3.75 * clayPerc[x]**(-0.016))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["sand", "clay", "BD"], record, sand=sandPerc, clay=clayPerc, BD=BDg_cm3)
+
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcZachariasWessolek_2007Array, [sandPerc, clayPerc, BDg_cm3])
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = _toLists(vgParams)
 
     common.writeWarning(outputShp, warningArray)
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
 
 def Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-    l_MvGArray = []
-
     log.info("Calculating van Genuchten parameters using Weynants et al. (2009)")
 
     # Requirements: sand, clay, OC, and BD
@@ -332,82 +446,26 @@ def Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
 
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Clay", "OM", "BD", "LUCIname", "texture"]
-        
+
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-            name = row[5]
-            texture = row[6]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_residual = 0
-        WC_sat = 0.6355 + (0.0013 * clayPerc[x]) - (0.1631 * BDg_cm3[x])
-        
-        # Alpha in cm-1
-        alpha_cm = math.exp(- 4.3003 - (0.0097 * clayPerc[x]) + (0.0138 * sandPerc[x]) - (0.0992 * carbPerc[x]*float(carbonConFactor)))
-        alpha_VG = 10.0 * alpha_cm # Convert to kPa-1
-
-        n_VG = math.exp(- 1.0846 - (0.0236 * clayPerc[x]) - (0.0085 * sandPerc[x]) + (0.0001 * sandPerc[x]**2)) + 1 
-        m_VG = 1.0 - (1.0 / float(n_VG))
-
-        l_MvG = - 1.8642 - (0.1317 * clayPerc[x]) + (0.0067 * sandPerc[x])
+    record, sandPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
 
-        K_sat = math.exp(1.9582 + (0.0308 * sandPerc[x]) - (0.6142 * BDg_cm3[x]) - (0.1566 * (carbPerc[x] * float(carbonConFactor)))) * (10.0 / 24.0)
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["carbon", "sand", "clay", "BD"], record, carbon=carbPerc, sand=sandPerc, clay=clayPerc, BD=BDg_cm3)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
-        l_MvGArray.append(l_MvG)
-        K_satArray.append(K_sat)
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcWeynants_2009Array, [sandPerc, clayPerc, carbPerc, BDg_cm3], carbonConFactor=carbonConFactor)
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = _toLists(vgParams)
 
     common.writeWarning(outputShp, warningArray)
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray
 
 def Dashtaki_2010(outputShp, VGOption, carbonConFactor, carbContent):
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-
     log.info("Calculating van Genuchten parameters using Dashtaki et al. (2010)")
 
     # Requirements: Sand, clay, and BD
@@ -419,72 +477,26 @@ def Dashtaki_2010(outputShp, VGOption, carbonConFactor, carbContent):
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-            name = row[4]
-            texture = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate water content using Dashtaki et al. (2010) - Sand, Clay, BD
-        WC_residual = 0.034 + (0.0032 * clayPerc[x])
-        WC_sat = 0.85 - (0.00061 * sandPerc[x]) - (0.258 * BDg_cm3[x])
-        
-        # Alpha in cm-1
-        alpha_cm = abs(1/(- 476 - (4.1 * sandPerc[x]) + (499 * BDg_cm3[x])))
-        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
-        
-        n_VG = 1.56 - (0.00228 * sandPerc[x])
-        m_VG = 1.0 - (1.0 / float(n_VG))
+    record, sandPerc, clayPerc, BDg_cm3, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["sand", "clay", "BD"], record, sand=sandPerc, clay=clayPerc, BD=BDg_cm3)
+
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcDashtaki_2010Array, [sandPerc, clayPerc, BDg_cm3])
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = _toLists(vgParams)
 
     common.writeWarning(outputShp, warningArray)
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
 
 def HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent):
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-
     log.info("Calculating van Genuchten parameters using Hodnett and Tomasella (2002)")
 
     # Requirements: Sand, Silt, Clay, OC, BD, CEC, pH
-    
+
     # Get OID field
     OIDField = common.getOIDField(outputShp)
 
@@ -494,71 +506,20 @@ def HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent):
 
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OC", "BD", "CEC", "pH", "LUCIname", "texture"]
-        
+
     checks_PTFs.checkInputFields(reqFields, outputShp)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    CECcmol_kg = []
-    pH = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]  
-            carbon = row[4]                      
-            BD = row[5]
-            CEC = row[6]
-            pHValue = row[7]
-            name = row[8]
-            texture = row[9]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            CECcmol_kg.append(CEC)
-            pH.append(pHValue)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkSSC(sandPerc[x], siltPerc[x], clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningFlag = checks_PTFs.checkValue("CEC", CECcmol_kg[x], record[x])
-        warningFlag = checks_PTFs.checkValue("pH", pH[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_sat = 0.81799 + (9.9 * 10**(-4) * clayPerc[x]) - (0.3142 * BDg_cm3[x]) + (1.8 * 10**(-4) * CECcmol_kg[x]) + (0.00451 * pH[x]) - (5 * 10**(-6) * sandPerc[x] * clayPerc[x])
-        WC_residual = 0.22733 - (0.00164 * sandPerc[x]) + (0.00235 * CECcmol_kg[x]) - (0.00831 * pH[x]) + (1.8 * 10**(-5) * clayPerc[x]**2) + (2.6 * 10**(-5) * sandPerc[x] * clayPerc[x])
-        
-        # Original equation had values in kPa-1
-        # No internal conversion needed
-        alpha_VG = math.exp(- 0.02294 - (0.03526 * siltPerc[x]) + (0.024 * carbPerc[x]*float(carbonConFactor)) - (0.00076 * CECcmol_kg[x]) - (0.11331 * pH[x]) + (0.00019 * siltPerc[x]**2))                    
-        
-        n_VG = math.exp(0.62986 - (0.00833 * clayPerc[x]) - (0.00529 * carbPerc[x]*float(carbonConFactor)) + (0.00593 * pH[x]) + (7 * 10**(-5) * clayPerc[x]**2) - (1.4 * 10**(-4) * sandPerc[x] * siltPerc[x]))
-        m_VG = 1.0 - (1.0 / float(n_VG))
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, CECcmol_kg, pH, nameArray, textureArray = data_access.readColumns(outputShp, reqFields)
+
+    # Data checks on all records
+    warningArray, warnFlags = checks_PTFs.checkInputs(["SSC", "carbon", "BD", "CEC", "pH"], record, sand=sandPerc, silt=siltPerc, clay=clayPerc, carbon=carbPerc, BD=BDg_cm3, CEC=CECcmol_kg, pH=pH)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Calculate VG parameters for all records
+    vgParams = dedup.calcUnique(calcHodnettTomasella_2002Array, [sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, CECcmol_kg, pH], carbonConFactor=carbonConFactor)
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = _toLists(vgParams)
 
     common.writeWarning(outputShp, warningArray)
+    checks_PTFs.writeFlags(outputShp, warnFlags)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
@@ -1,5 +1,3 @@
-import configuration
-import arcpy
 import math
 import os
 import sys
@@ -12,220 +10,163 @@ import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
 import LUCI_PTFs.lib.brooksCorey as brooksCorey
 import LUCI_PTFs.lib.bc_PTFs as bc_PTFs
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
+import LUCI_PTFs.lib.curve_cache as curve_cache
+import LUCI_PTFs.lib.data_access as data_access
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, thresholds, PTFdatabase, brooksCorey, bc_PTFs, checks_PTFs])
+refresh_modules([log, common, thresholds, PTFdatabase, brooksCorey, bc_PTFs, checks_PTFs, curve_cache, data_access])
 
 def function(outputFolder, inputShp, PTFOption, BCPressArray, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
 
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "bc_")
-
-        tempSoils = prefix + "tempSoils"
+        # Curves and input tables are cached per run (large curve matrices can be stored in the output folder)
+        curve_cache.clearCache(outputFolder)
+        data_access.clearCache()
 
         # Set output filename
         outputShp = os.path.join(outputFolder, "BrooksCorey.shp")
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
+        # Copy the input shapefile to the output folder (or create the side table, see data_access.createOutput)
+        outputShp = data_access.createOutput(inputShp, outputShp)
 
-        # Get the nameArray
-        nameArray = []
-        with arcpy.da.SearchCursor(outputShp, "LUCIname") as searchCursor:
-            for row in searchCursor:
-                name = row[0]
-                nameArray.append(name)
+        # The output fields are also exported to a columnar file if it is set in user_settings.xml
+        data_access.startExport(outputShp)
 
         # PTFs should return: WC_res, WC_sat, lambda_BC, hb_BC
 
-        if PTFOption == "Cosby_1984_SandC_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Cosby_1984_SandC_BC(outputShp, PTFOption)
+        if PTFdatabase.getPTF(PTFOption).PTFType != "bcPTF":
+            log.error("Brooks-Corey option not recognised: " + str(PTFOption))
+            sys.exit()
 
-        elif PTFOption == "Cosby_1984_SSC_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Cosby_1984_SSC_BC(outputShp, PTFOption)
+        # Fields read by the BC PTF, including LUCIname
+        reqFields = bc_PTFs.getLayerFields(PTFOption, outputShp, carbContent)
+        checks_PTFs.checkInputFields(reqFields, outputShp)
 
-        elif PTFOption == "RawlsBrakensiek_1985_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.RawlsBrakensiek_1985_BC(outputShp, PTFOption)
+        # The plots show every soil of the layer, so they are only created if the layer fits in one chunk
+        plotSoils = data_access.countRecords(outputShp) <= data_access.getChunkSize()
 
-        elif PTFOption == "CampbellShiozawa_1992_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.CampbellShiozawa_1992_BC(outputShp, PTFOption)
+        if not plotSoils:
+            log.warning('The layer has more records than one chunk (chunkRecords in user_settings.xml), Brooks-Corey plots are not created')
 
-        elif PTFOption == "Saxton_1986_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Saxton_1986_BC(outputShp, PTFOption)
+        # Default pressures of the output shapefile
+        pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
 
-        elif PTFOption == "SaxtonRawls_2006_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.SaxtonRawls_2006_BC(outputShp, PTFOption, carbonConFactor, carbContent)
+        # Initialise the pressure head array
+        x = np.array(BCPressArray)
+        bcPressures = x.astype(np.float)
 
-        else:
-            log.error("Brooks-Corey option not recognised: " + str(PTFOption))
-            sys.exit()
+        # For the headings
+        headings = ['Name']
 
-        # Write to shapefile
-        brooksCorey.writeBCParams(outputShp, warning, WC_res, WC_sat, lambda_BC, hb_BC)
+        for pressure in bcPressures:
+            headName = 'WC_' + str(pressure) + "kPa"
+            headings.append(headName)
 
-        log.info("Brooks-Corey parameters written to output shapefile")
-            
-        # Create plots
-        brooksCorey.plotBrooksCorey(outputFolder, WC_res, WC_sat, hb_BC, lambda_BC, nameArray, fcVal, sicVal, pwpVal)
+        wcCriticalPressures = [0.0, float(fcVal), float(sicVal), float(pwpVal)]
 
-        ###############################################
-        ### Calculate water content using BC params ###
-        ###############################################
+        # Output CSV with water content at the user-input pressures, written chunk by chunk
+        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
 
-        # Check for any soils that we were not able to calculate BC parameters for
-        # lambda_BC[i] == -9999
-        
-        errors = []
-        for i in range(0, len(lambda_BC)):
-            if lambda_BC[i] == -9999:
-                log.warning('Invalid lambda found for ' + str(nameArray[i]))
-                errors.append(i)
+        csv_file = open(outCSV, 'wb')
+        writer = csv.writer(csv_file)
+        writer.writerow(headings)
 
-        # Calculate water content at default pressures
-        WC_1kPaArray = []
-        WC_3kPaArray = []
-        WC_10kPaArray = []
-        WC_33kPaArray = []
-        WC_100kPaArray = []
-        WC_200kPaArray = []
-        WC_1000kPaArray = []
-        WC_1500kPaArray = []
+        def calcChunk(inputTable):
 
-        for i in range(0, len(nameArray)):
+            nameArray = inputTable["LUCIname"].tolist()
 
-            pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+            # Calculate the BC parameters for the chunk
+            # validMask is False for soils whose parameters could not be calculated (lambda_BC and hb_BC are -9999)
+            warning, warnFlags, bcResults = bc_PTFs.calcBCLayer(PTFOption, outputShp, carbContent, carbonConFactor, inputTable)
 
-            if lambda_BC[i] != -9999:
-                bc_WC = brooksCorey.calcBrooksCoreyFXN(pressures, hb_BC[i], WC_res[i], WC_sat[i], lambda_BC[i])
+            WC_res = bcResults.WC_res
+            WC_sat = bcResults.WC_sat
+            lambda_BC = bcResults.lambda_BC
+            hb_BC = bcResults.hb_BC
+            validMask = bcResults.validMask
 
-            else:
-                bc_WC = [-9999] * len(pressures)
+            # Write to shapefile
+            brooksCorey.writeBCParams(outputShp, warning, WC_res.tolist(), WC_sat.tolist(), lambda_BC.tolist(), hb_BC.tolist(), validMask)
+            checks_PTFs.writeFlags(outputShp, warnFlags)
 
-            WC_1kPaArray.append(bc_WC[0])
-            WC_3kPaArray.append(bc_WC[1])
-            WC_10kPaArray.append(bc_WC[2])
-            WC_33kPaArray.append(bc_WC[3])
-            WC_100kPaArray.append(bc_WC[4])
-            WC_200kPaArray.append(bc_WC[5])
-            WC_1000kPaArray.append(bc_WC[6])
-            WC_1500kPaArray.append(bc_WC[7])
+            # Parameter set used to look up the cached BC curves
+            bcParams = [hb_BC, WC_res, WC_sat, lambda_BC]
 
-        common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
+            # Create plots
+            if plotSoils:
+                brooksCorey.plotBrooksCorey(outputFolder, WC_res, WC_sat, hb_BC, lambda_BC, nameArray, fcVal, sicVal, pwpVal, validMask)
 
-        # Write water content at user-input pressures
+            ###############################################
+            ### Calculate water content using BC params ###
+            ###############################################
 
-        # Initialise the pressure head array
-        x = np.array(BCPressArray)
-        bcPressures = x.astype(np.float)
+            # Invalid soils (lambda_BC == -9999) are carried through as a mask by calcBrooksCoreyArray
 
-        # For the headings
-        headings = ['Name']
+            # Calculate water content at default pressures
+            defaultWC = curve_cache.getCurveColumns('BC', brooksCorey.calcBrooksCoreyArray, pressures, bcParams)
 
-        for pressure in bcPressures:
-            headName = 'WC_' + str(pressure) + "kPa"
-            headings.append(headName)
+            WC_1kPaArray = defaultWC[:, 0]
+            WC_3kPaArray = defaultWC[:, 1]
+            WC_10kPaArray = defaultWC[:, 2]
+            WC_33kPaArray = defaultWC[:, 3]
+            WC_100kPaArray = defaultWC[:, 4]
+            WC_200kPaArray = defaultWC[:, 5]
+            WC_1000kPaArray = defaultWC[:, 6]
+            WC_1500kPaArray = defaultWC[:, 7]
 
-        wcHeadings = headings[1:]
+            common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
 
-        wcArrays = []
+            # Calculate soil moisture content at custom BC pressures and write them to the output CSV
+            customWC = curve_cache.getCurveColumns('BC', brooksCorey.calcBrooksCoreyArray, bcPressures, bcParams)
 
-        # Calculate soil moisture content at custom VG pressures
-        for i in range(0, len(nameArray)):
+            for i in range(0, len(nameArray)):
+                writer.writerow([nameArray[i]] + customWC[i].tolist())
 
-            if lambda_BC[i] != -9999:
-                wcValues = brooksCorey.calcBrooksCoreyFXN(bcPressures, hb_BC[i], WC_res[i], WC_sat[i], lambda_BC[i])
-            else:
-                wcValues = [-9999] * len(bcPressures)
+            ##################################################
+            ### Calculate water content at critical points ###
+            ##################################################
 
-            wcValues.insert(0, nameArray[i])
+            criticalWC = curve_cache.getCurveColumns('BC', brooksCorey.calcBrooksCoreyArray, wcCriticalPressures, bcParams)
 
-            wcArrays.append(wcValues)
+            wc_satCalc = criticalWC[:, 0]
+            wc_fcCalc = criticalWC[:, 1]
+            wc_sicCalc = criticalWC[:, 2]
+            wc_pwpCalc = criticalWC[:, 3]
 
-        # Write to output CSV
-        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
+            # Differences are only meaningful for valid soils, the rest keep the -9999 sentinel
+            wc_DW = np.where(validMask, wc_satCalc - wc_fcCalc, -9999.0)
+            wc_RAW = np.where(validMask, wc_fcCalc - wc_sicCalc, -9999.0)
+            wc_NRAW = np.where(validMask, wc_sicCalc - wc_pwpCalc, -9999.0)
+            wc_PAW = np.where(validMask, wc_fcCalc - wc_pwpCalc, -9999.0)
 
-        with open(outCSV, 'wb') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(headings)
+            for i in np.flatnonzero(validMask & (wc_DW < 0.0)):
+                checks_PTFs.checkNegValue("Drainable water", wc_DW[i], nameArray[i])
 
-            for i in range(0, len(nameArray)):
-                row = wcArrays[i]
-                writer.writerow(row)
-
-            msg = 'Output CSV with water content saved to: ' + str(outCSV)
-            log.info(msg)
-
-        csv_file.close()
-
-        ##################################################
-        ### Calculate water content at critical points ###
-        ##################################################
-
-        # Initialise water content arrays
-        wc_satCalc = []
-        wc_fcCalc = []
-        wc_sicCalc = []
-        wc_pwpCalc = []
-
-        wc_DW = []
-        wc_RAW = []
-        wc_NRAW = []
-        wc_PAW = []
-
-        wcCriticalPressures = [0.0, fcVal, sicVal, pwpVal]
-
-        for x in range(0, len(nameArray)):
-
-            if lambda_BC[x] != -9999:
-                wcCriticals = brooksCorey.calcBrooksCoreyFXN(wcCriticalPressures, hb_BC[x], WC_res[x], WC_sat[x], lambda_BC[x])
-
-                wc_sat = wcCriticals[0]
-                wc_fc = wcCriticals[1]
-                wc_sic = wcCriticals[2]
-                wc_pwp = wcCriticals[3]
-
-                drainWater = wc_sat - wc_fc
-                readilyAvailWater = wc_fc - wc_sic
-                notRAW = wc_sic - wc_pwp
-                PAW = wc_fc - wc_pwp
-
-                checks_PTFs.checkNegValue("Drainable water", drainWater, nameArray[i])
-                checks_PTFs.checkNegValue("Readily available water", readilyAvailWater, nameArray[i])
-                checks_PTFs.checkNegValue("Not readily available water", notRAW, nameArray[i])
-                checks_PTFs.checkNegValue("Not readily available water", PAW, nameArray[i])
-
-            else:
-                wc_sat = -9999
-                wc_fc = -9999
-                wc_sic = -9999
-                wc_pwp = -9999
-                drainWater = -9999
-                readilyAvailWater = -9999
-                notRAW = -9999
-                PAW = -9999
-
-            wc_satCalc.append(wc_sat)
-            wc_fcCalc.append(wc_fc)
-            wc_sicCalc.append(wc_sic)
-            wc_pwpCalc.append(wc_pwp)
-            wc_DW.append(drainWater)
-            wc_RAW.append(readilyAvailWater)
-            wc_NRAW.append(notRAW)
-            wc_PAW.append(PAW)
-
-        common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+            for i in np.flatnonzero(validMask & (wc_RAW < 0.0)):
+                checks_PTFs.checkNegValue("Readily available water", wc_RAW[i], nameArray[i])
 
-    except Exception:
-        arcpy.AddError("Brooks-Corey function failed")
-        raise
+            for i in np.flatnonzero(validMask & (wc_NRAW < 0.0)):
+                checks_PTFs.checkNegValue("Not readily available water", wc_NRAW[i], nameArray[i])
+
+            for i in np.flatnonzero(validMask & (wc_PAW < 0.0)):
+                checks_PTFs.checkNegValue("Not readily available water", wc_PAW[i], nameArray[i])
 
-    finally:
-        # Remove feature layers from memory
+            common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+
+        # The layer is processed in chunks of records, each chunk is written before the next one is read
+        # The failed checks of all chunks are logged in one summary
         try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
\ No newline at end of file
+            checks_PTFs.startSummary()
+            data_access.streamTable(outputShp, reqFields, calcChunk)
+            checks_PTFs.endSummary()
+
+        finally:
+            csv_file.close()
+
+        log.info("Brooks-Corey parameters and water contents written to output shapefile")
+        log.info('Output CSV with water content saved to: ' + str(outCSV))
+
+    except Exception:
+        log.error("Brooks-Corey function failed")
+        raise
@@ -1,5 +1,4 @@
 import configuration
-import arcpy
 import math
 import os
 import sys
@@ -8,16 +7,17 @@ import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
 import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
 import LUCI_PTFs.lib.ksat_PTFs as ksat_PTFs
+import LUCI_PTFs.lib.data_access as data_access
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs, PTFdatabase, ksat_PTFs])
+refresh_modules([log, common, checks_PTFs, PTFdatabase, ksat_PTFs, data_access])
 
 def function(outputFolder, inputFolder, KsatOption, carbContent, carbonConFactor):
 
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "moist_")
+        # Input tables are cached per run
+        data_access.clearCache()
 
         # Set output filename
         outputShp = os.path.join(outputFolder, "Ksat.shp")
@@ -33,80 +33,58 @@ def function(outputFolder, inputFolder, KsatOption, carbContent, carbonConFactor
             PTFType = common.readXML(PTFxml, 'PTFType')
 
         if PTFType == "pointPTF":
-            inputShp = os.path.join(inputFolder, "soil_point_ptf.shp")
+            inputShp = data_access.findOutput(os.path.join(inputFolder, "soil_point_ptf.shp"))
 
         elif PTFType == "vgPTF":
-            inputShp = os.path.join(inputFolder, "soil_vg.shp")
+            inputShp = data_access.findOutput(os.path.join(inputFolder, "soil_vg.shp"))
 
         else:
             log.error('Please run the point-PTF or vg-PTF tool first before running this tool')
             sys.exit()
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
+        # Copy the input shapefile to the output folder (or create the side table, see data_access.createOutput)
+        outputShp = data_access.createOutput(inputShp, outputShp)
+
+        # The output fields are also exported to a columnar file if it is set in user_settings.xml
+        data_access.startExport(outputShp)
 
         # Check if the K_sat field already exists in the shapefile
         if common.CheckField(outputShp, "K_sat"):
             log.error('K_sat field already present in the output shapefile')
             sys.exit()
 
-        if KsatOption == 'Cosby_1984':
-            warningArray, K_satArray = ksat_PTFs.Cosby_1984(outputFolder, outputShp)
-
-        elif KsatOption == 'Puckett_1985':
-            warningArray, K_satArray = ksat_PTFs.Puckett_1985(outputFolder, outputShp)
-
-        elif KsatOption == 'Jabro_1992':
-            warningArray, K_satArray = ksat_PTFs.Jabro_1992(outputFolder, outputShp)
-
-        elif KsatOption == 'CampbellShiozawa_1994':
-            warningArray, K_satArray = ksat_PTFs.CampbellShiozawa_1994(outputFolder, outputShp)
-
-        elif KsatOption == 'FerrerJulia_2004_1':
-            warningArray, K_satArray = ksat_PTFs.FerrerJulia_2004_1(outputFolder, outputShp)
+        if PTFdatabase.getPTF(KsatOption).PTFType != "ksatPTF":
+            log.error("Invalid KsatOption: " + str(KsatOption))
+            sys.exit()
 
-        elif KsatOption == 'FerrerJulia_2004_2':
-            warningArray, K_satArray = ksat_PTFs.FerrerJulia_2004_2(outputFolder, outputShp, carbonConFactor, carbContent)
+        # Fields read by the Ksat PTF
+        reqFields = ksat_PTFs.getLayerFields(KsatOption, outputShp, carbContent)
+        checks_PTFs.checkInputFields(reqFields, outputShp)
 
-        elif KsatOption == 'Ahuja_1989':
-            warningArray, K_satArray = ksat_PTFs.Ahuja_1989(outputFolder, outputShp)
+        def calcChunk(inputTable):
 
-        elif KsatOption == 'MinasnyMcBratney_2000':
-            warningArray, K_satArray = ksat_PTFs.MinasnyMcBratney_2000(outputFolder, outputShp)
+            # Calculate K_sat for a chunk of records from the input columns
+            K_satArray, warningArray, warnFlags = ksat_PTFs.calcKsatLayer(KsatOption, outputShp, carbContent, carbonConFactor, inputTable)
 
-        elif KsatOption == 'Brakensiek_1984':
-            warningArray, K_satArray = ksat_PTFs.Brakensiek_1984(outputFolder, outputShp)
+            # Write results to output shapefile
+            data_access.addField(outputShp, "warning", "TEXT")
+            data_access.addField(outputShp, "K_sat", "DOUBLE", 10, 6)
 
-        else:
-            log.error("Invalid KsatOption: " + str(KsatOption))
-            sys.exit()
+            outputFields = ["warning", "K_sat"]
 
-        # Write results to output shapefile
-        arcpy.AddField_management(outputShp, "warning", "TEXT")
-        arcpy.AddField_management(outputShp, "K_sat", "DOUBLE", 10, 6)
+            data_access.writeColumns(outputShp, outputFields, [warningArray, K_satArray])
 
-        outputFields = ["warning", "K_sat"]
-        
-        recordNum = 0
-        with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-            for row in cursor:
-                row[0] = warningArray[recordNum]
-                row[1] = K_satArray[recordNum]
+            # Write the warning bit flags (all failed checks) and their decode table
+            checks_PTFs.writeFlags(outputShp, warnFlags)
 
-                cursor.updateRow(row)
-                recordNum += 1
+        # The layer is processed in chunks of records, each chunk is written before the next one is read
+        # The failed checks of all chunks are logged in one summary
+        checks_PTFs.startSummary()
+        data_access.streamTable(outputShp, reqFields, calcChunk)
+        checks_PTFs.endSummary()
 
         log.info("Results written to the output shapefile inside the output folder")
 
     except Exception:
-        arcpy.AddError("Saturated hydraulic conductivity function failed")
+        log.error("Saturated hydraulic conductivity function failed")
         raise
-
-    finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
@@ -0,0 +1,185 @@
+'''
+Function to calculate WC using every applicable point-PTF and VG PTF (ensemble)
+
+The point-PTF tool runs the ensemble (EnsembleOutput) on the chunks of input columns it reads
+and adds the ensemble statistics to its own output. function runs the ensemble on its own.
+'''
+
+import sys
+import os
+import numpy as np
+import csv
+import LUCI_PTFs.lib.log as log
+import LUCI_PTFs.lib.common as common
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.ensemble as ensemble
+import LUCI_PTFs.lib.data_access as data_access
+from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, common, PTFdatabase, ensemble, data_access])
+
+def getInputFields(dataset, carbContent):
+
+    # Input fields of the point-PTFs and VG PTFs present in the dataset
+    datasetFields = data_access.listFields(dataset)
+
+    return [field for field in ["Sand", "Silt", "Clay", carbContent, "BD", "CEC", "pH"] if field in datasetFields]
+
+class EnsembleOutput(object):
+
+    '''
+    Ensemble of every point-PTF and VG PTF which can be calculated from the inputFields. The
+    VG PTFs are evaluated at the pressures of the ensemble (see ensemble). The CSVs of each
+    PTF and of the ensemble statistics are opened in the output folder, calcChunk evaluates the
+    PTFs on the columns of a chunk of records (read with LUCIname), writes its rows to the CSVs
+    and the statistics at the critical points to the output shapefile. close closes the CSVs
+    and report logs where they are saved.
+    '''
+
+    def __init__(self, outputFolder, inputFields, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
+
+        self.inputFields = inputFields
+        self.carbContent = carbContent
+        self.carbonConFactor = carbonConFactor
+
+        self.PTFOptions, missingPTFs = ensemble.applicablePTFs(inputFields, carbContent)
+
+        if len(self.PTFOptions) == 0:
+            log.error('The input shapefile does not have the fields required by any of the point-PTFs or VG PTFs')
+            sys.exit()
+
+        for PTFOption in missingPTFs:
+            log.warning('Fields required by ' + str(PTFOption) + ' are not present, it is not included in the ensemble')
+
+        log.info('Calculating water content using ' + str(len(self.PTFOptions)) + ' point-PTFs and VG PTFs')
+
+        self.criticalPressures = [float(fcVal), float(sicVal), float(pwpVal)]
+        self.pressures = ensemble.ensemblePressures(self.PTFOptions, self.criticalPressures)
+
+        # A CSV for each PTF and one for the ensemble statistics
+        self.ensembleFolder = os.path.join(outputFolder, "ensemble")
+        if not os.path.exists(self.ensembleFolder):
+            os.mkdir(self.ensembleFolder)
+
+        self.csv_files = []
+        self.writers = {}
+
+        for PTFOption in self.PTFOptions:
+            if ensemble.isCurve(PTFOption):
+                headings = ["LUCIname"] + ['WC_' + str(pressure) + "kPa" for pressure in self.pressures]
+            else:
+                headings = ["LUCIname"] + list(PTFdatabase.getPTF(PTFOption).PTFFields[1:])
+            self.writers[PTFOption] = self._openCSV(os.path.join(self.ensembleFolder, PTFOption + ".csv"), headings)
+
+        self.outCSV = os.path.join(outputFolder, "ensemble_stats.csv")
+        self.statsWriter = self._openCSV(self.outCSV, ["LUCIname", "pressure_kPa", "nPTFs", "WC_mean", "WC_sd", "WC_min", "WC_max"])
+
+    def _openCSV(self, outCSV, headings):
+
+        csv_file = open(outCSV, 'wb')
+        self.csv_files.append(csv_file)
+
+        writer = csv.writer(csv_file)
+        writer.writerow(headings)
+
+        return writer
+
+    def calcChunk(self, outputShp, inputTable):
+
+        nameArray = inputTable["LUCIname"].tolist()
+
+        inputs = {}
+        for field in self.inputFields:
+            if field == self.carbContent:
+                inputs["carbon"] = inputTable[field]
+            else:
+                inputs[field] = inputTable[field]
+
+        #############################
+        ### Evaluate all the PTFs ###
+        #############################
+
+        wcResults = ensemble.calcPointPTFs(self.PTFOptions, inputs, self.carbContent, self.carbonConFactor, self.pressures)
+
+        for PTFOption, WC in wcResults.items():
+            writer = self.writers[PTFOption]
+
+            for i in range(0, len(nameArray)):
+                writer.writerow([nameArray[i]] + WC[i].tolist())
+
+        ###########################
+        ### Ensemble statistics ###
+        ###########################
+
+        pressures = self.pressures
+        count, mean, sd, minimum, maximum = ensemble.ensembleStats(wcResults, pressures)
+
+        for i in range(0, len(nameArray)):
+            for j in range(0, len(pressures)):
+                self.statsWriter.writerow([nameArray[i], pressures[j], count[i, j], mean[i, j], sd[i, j], minimum[i, j], maximum[i, j]])
+
+        # Write the statistics at the critical points to the output shapefile
+        # Pressures which no PTF covers are written as -9999
+        outputFields = []
+        outputArrays = []
+
+        for label, pressure in zip(["fc", "sic", "pwp"], self.criticalPressures):
+
+            j = int(np.searchsorted(pressures, pressure))
+
+            data_access.addField(outputShp, label + "_n", "LONG")
+            outputFields.append(label + "_n")
+            outputArrays.append(count[:, j])
+
+            for stat, values in [("mean", mean), ("sd", sd), ("min", minimum), ("max", maximum)]:
+                data_access.addField(outputShp, label + "_" + stat, "DOUBLE", 10, 6)
+                outputFields.append(label + "_" + stat)
+                outputArrays.append(np.where(np.isfinite(values[:, j]), values[:, j], -9999.0))
+
+        data_access.writeColumns(outputShp, outputFields, outputArrays)
+
+    def close(self):
+
+        for csv_file in self.csv_files:
+            csv_file.close()
+
+    def report(self, outputShp):
+
+        log.info('Water contents of each PTF saved to: ' + str(self.ensembleFolder))
+        log.info('Ensemble mean, SD, min and max at each pressure saved to: ' + str(self.outCSV))
+        log.info('Ensemble statistics at critical thresholds written to: ' + str(outputShp))
+
+def function(outputFolder, inputShp, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
+
+    try:
+        # Input tables are cached per run
+        data_access.clearCache()
+
+        # Set output filename
+        outputShp = os.path.join(outputFolder, "soil_point_ensemble.shp")
+
+        # Copy the input shapefile to the output folder (or create the side table, see data_access.createOutput)
+        outputShp = data_access.createOutput(inputShp, outputShp)
+
+        # The output fields are also exported to a columnar file if it is set in user_settings.xml
+        data_access.startExport(outputShp)
+
+        inputFields = getInputFields(outputShp, carbContent)
+        ensembleOutput = EnsembleOutput(outputFolder, inputFields, fcVal, sicVal, pwpVal, carbContent, carbonConFactor)
+
+        def calcChunk(inputTable):
+            ensembleOutput.calcChunk(outputShp, inputTable)
+
+        # The layer is processed in chunks of records, each chunk is written before the next one is read
+        try:
+            data_access.streamTable(outputShp, ["LUCIname"] + inputFields, calcChunk)
+
+        finally:
+            ensembleOutput.close()
+
+        ensembleOutput.report(outputShp)
+
+    except Exception:
+        log.error("Point-PTF ensemble function failed")
+        raise
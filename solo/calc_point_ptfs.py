@@ -6,396 +6,230 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.point_PTFs as point_PTFs
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
 import LUCI_PTFs.lib.plots as plots
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.interpolation as interpolation
+import LUCI_PTFs.lib.data_access as data_access
+import LUCI_PTFs.solo.calc_point_ensemble as calc_point_ensemble
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, point_PTFs, checks_PTFs, plots])
+refresh_modules([log, common, point_PTFs, checks_PTFs, plots, PTFdatabase, interpolation, data_access, calc_point_ensemble])
 
-def function(outputFolder, inputShp, PTFOption, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
+def function(outputFolder, inputShp, PTFOption, fcVal, sicVal, pwpVal, carbContent, carbonConFactor, ensembleChoice=False):
+
+    # If ensembleChoice is set, every applicable point-PTF and VG PTF is also evaluated (see calc_point_ensemble)
+    # on the same chunks of inputs and the ensemble statistics are added to the output
 
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "soil_")
+        # Input tables are cached per run
+        data_access.clearCache()
 
         # Set output filename
         outputShp = os.path.join(outputFolder, "soil_point_ptf.shp")
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
-
-        ####################################
-        ### Calculate the water contents ###
-        ####################################
+        # Copy the input shapefile to the output folder (or create the side table, see data_access.createOutput)
+        outputShp = data_access.createOutput(inputShp, outputShp)
 
-        # Get the nameArray
-        nameArray = []
-        with arcpy.da.SearchCursor(outputShp, "LUCIname") as searchCursor:
-            for row in searchCursor:
-                name = row[0]
+        # The output fields are also exported to a columnar file if it is set in user_settings.xml
+        data_access.startExport(outputShp)
 
-                nameArray.append(name)
-
-        # Get PTF fields
+        # Get PTF unit
         PTFxml = os.path.join(outputFolder, "ptfinfo.xml")
-        PTFFields = common.readXML(PTFxml, 'PTFFields')
-        PTFPressures = common.readXML(PTFxml, 'PTFPressures')
         PTFUnit = common.readXML(PTFxml, 'PTFUnit')
 
         # Call point-PTF here depending on PTFOption
-        if PTFOption == "Nguyen_2014":
-            results = point_PTFs.Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Adhikary_2008":
-            results = point_PTFs.Adhikary_2008(outputFolder, outputShp)
-        
-        elif PTFOption == "Rawls_1982":
-            results = point_PTFs.Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Hall_1977_top":
-            results = point_PTFs.Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Hall_1977_sub":
-            results = point_PTFs.Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "GuptaLarson_1979":
-            results = point_PTFs.GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Batjes_1996":
-            results = point_PTFs.Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "SaxtonRawls_2006":
-            results = point_PTFs.SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Pidgeon_1972":
-            results = point_PTFs.Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif str(PTFOption[0:8]) == "Lal_1978":            
-            results = point_PTFs.Lal_1978(outputFolder, outputShp, PTFOption)
-
-        elif PTFOption == "AinaPeriaswamy_1985":
-            results = point_PTFs.AinaPeriaswamy_1985(outputFolder, outputShp)
-
-        elif PTFOption == "ManriqueJones_1991":
-            results = point_PTFs.ManriqueJones_1991(outputFolder, outputShp)
-
-        elif PTFOption == "vanDenBerg_1997":
-            results = point_PTFs.vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "TomasellaHodnett_1998":
-            results = point_PTFs.TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Reichert_2009_OM":
-            results = point_PTFs.Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent)
-
-        elif PTFOption == "Reichert_2009":
-            results = point_PTFs.Reichert_2009(outputFolder, outputShp)
-
-        elif PTFOption == "Botula_2013":
-            results = point_PTFs.Botula_2013(outputFolder, outputShp)
+        if PTFdatabase.getPTF(PTFOption).PTFType != "pointPTF":
+            log.error("PTF option not recognised")
+            sys.exit()
 
-        elif PTFOption == "ShwethaVarija_2013":
-            results = point_PTFs.ShwethaVarija_2013(outputFolder, outputShp)
+        # Fields read by the point-PTF and LUCIname
+        reqFields = point_PTFs.getLayerFields(PTFOption, outputShp, carbContent) + ["LUCIname"]
+        checks_PTFs.checkInputFields(reqFields, outputShp)
 
-        elif PTFOption == "Dashtaki_2010_point":
-            results = point_PTFs.Dashtaki_2010(outputFolder, outputShp)
+        # The ensemble uses the same read of the inputs, its CSVs are written chunk by chunk
+        if ensembleChoice:
+            ensembleFields = calc_point_ensemble.getInputFields(outputShp, carbContent)
+            ensembleOutput = calc_point_ensemble.EnsembleOutput(outputFolder, ensembleFields, fcVal, sicVal, pwpVal, carbContent, carbonConFactor)
 
-        elif PTFOption == "Santra_2018_OC":
-            results = point_PTFs.Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent)
+            reqFields += [field for field in ensembleFields if field not in reqFields]
 
-        elif PTFOption == "Santra_2018":
-            results = point_PTFs.Santra_2018(outputFolder, outputShp)
+        # The plots show every soil of the layer, so they are only created if the layer fits in one chunk
+        plotSoils = data_access.countRecords(outputShp) <= data_access.getChunkSize()
 
-        else:
-            log.error("PTF option not recognised")
-            sys.exit()
+        if not plotSoils:
+            log.warning('The layer has more records than one chunk (chunkRecords in user_settings.xml), point-PTF plots are not created')
 
-        # Plots
-        plots.plotPTF(outputFolder, outputShp, PTFOption, nameArray, results)
-                
         ######################################################
         ### Calculate water content at critical thresholds ###
         ######################################################
-        
-        satStatus = False
-        fcStatus = False
-        sicStatus = False
-        pwpStatus = False
-
-        wc_satCalc = []
-        wc_fcCalc = []
-        wc_sicCalc = []
-        wc_pwpCalc = []
-
-        if PTFOption == "Reichert_2009_OM":
-            log.info('For Reichert et al. (2009) - Sand, silt, clay, OM, BD saturation is at 6kPa')
-            satField = "WC_6kPa"
-
-        else:
-            satField = "WC_0" + str(PTFUnit)
-        
-        fcField = "WC_" + str(int(fcVal)) + str(PTFUnit)
-        sicField = "WC_" + str(int(sicVal)) + str(PTFUnit)
-        pwpField = "WC_" + str(int(pwpVal)) + str(PTFUnit)
 
-        wcFields = []
-        wcArrays = []
+        satPressure = point_PTFs.getSatPressure(PTFOption)
 
-        if satField in PTFFields:
-            # Saturation set to 0kPa
-            # PTFs with 0kPa:
-            ## Saxton_1986, Batjes_1996, SaxtonRawls_2006
-            ## Lal_1978_Group1, Lal_1978_Group2
-            ## TomasellaHodnett_1998
+        # Water contents at pressures between the PTF pressures are interpolated (PCHIP in log-pressure)
+        PTFPressures = PTFdatabase.getPTF(PTFOption).PTFPressures
+        nodePressures = [float(pressure) for pressure in PTFPressures]
 
-            log.info('Field with WC at saturation found!')
+        criticalPoints = []
 
-            with arcpy.da.SearchCursor(outputShp, satField) as searchCursor:
-                for row in searchCursor:
-                    wc_sat = row[0]
+        for fieldName, pressure, description in [("wc_satCalc", satPressure, 'saturation'),
+                                                 ("wc_fcCalc", float(fcVal), 'field capacity'),
+                                                 ("wc_sicCalc", float(sicVal), 'water stress-induced stomatal closure'),
+                                                 ("wc_pwpCalc", float(pwpVal), 'permanent wilting point')]:
 
-                    if wc_sat > 1.0:
-                        log.warning('Water content at saturation over 1.0')
+            if pressure in nodePressures:
+                log.info('Field with WC at ' + description + ' found!')
 
-                    wc_satCalc.append(wc_sat)
+            elif min(nodePressures) <= pressure <= max(nodePressures):
+                log.info('Field with WC at ' + description + ' not found, interpolating WC at ' + str(pressure) + ' ' + str(PTFUnit) + ' from the PTF pressures')
 
-            satStatus = True
+            else:
+                log.warning('Field with WC at ' + description + ' not found')
+                continue
 
-            wcFields.append("wc_satCalc")
-            wcArrays.append(wc_satCalc)
+            criticalPoints.append((fieldName, pressure))
 
-            # Add sat field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_satCalc", "DOUBLE", 10, 6)
+        criticalFields = [fieldName for fieldName, pressure in criticalPoints]
 
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_satCalc") as cursor:
-                for row in cursor:
-                    row[0] = wc_satCalc[recordNum]
+        satStatus = "wc_satCalc" in criticalFields
+        fcStatus = "wc_fcCalc" in criticalFields
+        sicStatus = "wc_sicCalc" in criticalFields
+        pwpStatus = "wc_pwpCalc" in criticalFields
+        pawStatus = fcStatus and pwpStatus
 
-                    cursor.updateRow(row)
-                    recordNum += 1
+        if not (fcStatus and sicStatus) and not pawStatus:
+            log.info('Readily available water not calculated')
 
-        else:
-            log.warning('Field with WC at saturation not found')
-            satStatus = False
+        def calcChunk(inputTable):
 
-        if fcField in PTFFields:
-            log.info('Field with WC at field capacity found!')
+            nameArray = inputTable["LUCIname"].tolist()
 
-            with arcpy.da.SearchCursor(outputShp, fcField) as searchCursor:
-                for row in searchCursor:
-                    wc_fc = row[0]
-                    wc_fcCalc.append(wc_fc)
+            ####################################
+            ### Calculate the water contents ###
+            ####################################
 
-            fcStatus = True
+            # Water contents (N x P) at the PTF pressures
+            warningArray, warnFlags, wcMatrix = point_PTFs.calcPointLayer(PTFOption, outputShp, carbContent, carbonConFactor, inputTable)
+            point_PTFs.writePointLayer(outputShp, PTFOption, warningArray, warnFlags, wcMatrix)
 
-            wcFields.append("wc_fcCalc")
-            wcArrays.append(wc_fcCalc)
+            # Plots
+            if plotSoils:
+                plots.plotPTF(outputFolder, outputShp, PTFOption, nameArray, [warningArray] + list(wcMatrix.T))
 
-            # Add FC field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_fcCalc", "DOUBLE", 10, 6)
+            wcCurves = interpolation.buildPCHIP(PTFPressures, wcMatrix)
 
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_fcCalc") as cursor:
-                for row in cursor:
-                    row[0] = wc_fcCalc[recordNum]
+            criticalWC = {}
 
-                    cursor.updateRow(row)
-                    recordNum += 1
+            for fieldName, pressure in criticalPoints:
 
-        else:
-            log.warning('Field with WC at field capacity not found')
-            fcStatus = False
+                if pressure in nodePressures:
+                    values = wcMatrix[:, nodePressures.index(pressure)]
+                else:
+                    values = interpolation.evalPCHIP(wcCurves, [pressure])[:, 0]
 
-        if sicField in PTFFields:
-            log.info('Field with WC at water stress-induced stomatal closure found!')
+                criticalWC[fieldName] = values.tolist()
 
-            with arcpy.da.SearchCursor(outputShp, sicField) as searchCursor:
-                for row in searchCursor:
-                    wc_sic = row[0]
-                    wc_sicCalc.append(wc_sic)
+                # Add field to output shapefile
+                data_access.addField(outputShp, fieldName, "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, fieldName, criticalWC[fieldName])
 
-            sicStatus = True
+            wc_satCalc = criticalWC.get("wc_satCalc", [])
+            wc_fcCalc = criticalWC.get("wc_fcCalc", [])
+            wc_sicCalc = criticalWC.get("wc_sicCalc", [])
+            wc_pwpCalc = criticalWC.get("wc_pwpCalc", [])
 
-            wcFields.append("wc_sicCalc")
-            wcArrays.append(wc_sicCalc)
+            if any(wc_sat > 1.0 for wc_sat in wc_satCalc):
+                log.warning('Water content at saturation over 1.0')
 
-            # Add sic field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_sicCalc", "DOUBLE", 10, 6)
+            for wc_pwp in wc_pwpCalc:
+                if wc_pwp < 0.01:
+                    log.warning('WARNING: Water content at PWP is below 0.01')
 
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_sicCalc") as cursor:
-                for row in cursor:
-                    row[0] = wc_sicCalc[recordNum]
+                elif wc_pwp < 0.05:
+                    log.warning('Water content at PWP is below 0.05')
 
-                    cursor.updateRow(row)
-                    recordNum += 1
+            if satStatus == True and fcStatus == True:
+                # drainWater = wc_sat - wc_fc
+                drainWater = point_PTFs.calcWaterContent(wc_satCalc, wc_fcCalc, 'drainable water', nameArray)
 
-        else:
-            log.warning('Field with WC at water stress-induced stomatal closure not found')
-            
-            sicStatus = False          
+                # Add DW field to output shapefile
+                data_access.addField(outputShp, "wc_DW", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "wc_DW", drainWater)
 
-        if pwpField in PTFFields:
-            log.info('Field with WC at permanent wilting point found!')
+            if pawStatus == True:
+                # PAW = wc_fc - wc_pwp
+                PAW = point_PTFs.calcWaterContent(wc_fcCalc, wc_pwpCalc, 'plant available water', nameArray)
 
-            with arcpy.da.SearchCursor(outputShp, pwpField) as searchCursor:
-                for row in searchCursor:
-                    wc_pwp = row[0]
+                # Add PAW field to output shapefile
+                data_access.addField(outputShp, "wc_PAW", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "wc_PAW", PAW)
 
-                    if wc_pwp < 0.01:
-                        log.warning('WARNING: Water content at PWP is below 0.01')
-                    
-                    elif wc_pwp < 0.05:
-                        log.warning('Water content at PWP is below 0.05')
+            if fcStatus == True and sicStatus == True:
+                # readilyAvailWater = wc_fc - wc_sic
+                RAW = point_PTFs.calcWaterContent(wc_fcCalc, wc_sicCalc, 'readily available water', nameArray)
 
-                    wc_pwpCalc.append(wc_pwp)
+                # Add wc_RAW field to output shapefile
+                data_access.addField(outputShp, "wc_RAW", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "wc_RAW", RAW)
 
-            pwpStatus = True
+            elif pawStatus == True:
+                # If PAW exists, get RAW = 0.5 * RAW
+                RAW = [(float(i) * 0.5) for i in PAW]
 
-            wcFields.append("wc_pwpCalc")
-            wcArrays.append(wc_pwpCalc)
+                # Add wc_RAW field to output shapefile
+                data_access.addField(outputShp, "wc_RAW", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "wc_RAW", RAW)
 
-            # Add pwp field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_pwpCalc", "DOUBLE", 10, 6)
+            if sicStatus == True and pwpStatus == True:
+                # notRAW = wc_sic - wc_pwp
+                NRAW = point_PTFs.calcWaterContent(wc_sicCalc, wc_pwpCalc, 'not readily available water', nameArray)
 
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_pwpCalc") as cursor:
-                for row in cursor:
-                    row[0] = wc_pwpCalc[recordNum]
+                # Add sat field to output shapefile
+                data_access.addField(outputShp, "wc_NRAW", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "wc_NRAW", NRAW)
 
-                    cursor.updateRow(row)
-                    recordNum += 1
+            # Every applicable point-PTF on the same input columns
+            if ensembleChoice:
+                ensembleOutput.calcChunk(outputShp, inputTable)
 
-        else:
-            log.warning('Field with WC at permanent wilting point not found')
-            
-            pwpStatus = False        
+        # The layer is processed in chunks of records, each chunk is written before the next one is read
+        # The failed checks of all chunks are logged in one summary
+        try:
+            checks_PTFs.startSummary()
+            data_access.streamTable(outputShp, reqFields, calcChunk)
+            checks_PTFs.endSummary()
 
-        drainWater = []
-        PAW = []
-        RAW = []
-        NRAW = []
+        finally:
+            if ensembleChoice:
+                ensembleOutput.close()
 
-        if satStatus == True and fcStatus == True:
-            # drainWater = wc_sat - wc_fc
+        log.info("Results written to the output shapefile inside the output folder")
 
-            drainWater = point_PTFs.calcWaterContent(wc_satCalc, wc_fcCalc, 'drainable water', nameArray)
+        if satStatus and fcStatus:
             log.info('Drainable water calculated')
 
-            wcFields.append("wc_DW")
-            wcArrays.append(drainWater)
-
-            # Add DW field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_DW", "DOUBLE", 10, 6)
-
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_DW") as cursor:
-                for row in cursor:
-                    row[0] = drainWater[recordNum]
-
-                    cursor.updateRow(row)
-                    recordNum += 1
-
-        if fcStatus == True and pwpStatus == True:
-            # PAW = wc_fc - wc_pwp
-            PAW = point_PTFs.calcWaterContent(wc_fcCalc, wc_pwpCalc, 'plant available water', nameArray)
+        if pawStatus:
             log.info('Plant available water calculated')
 
-            wcFields.append("wc_PAW")
-            wcArrays.append(PAW)
-
-            # Add PAW field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_PAW", "DOUBLE", 10, 6)
-
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_PAW") as cursor:
-                for row in cursor:
-                    row[0] = PAW[recordNum]
-
-                    cursor.updateRow(row)
-                    recordNum += 1
-
-            pawStatus = True
-
-        if fcStatus == True and sicStatus == True:
-            # readilyAvailWater = wc_fc - wc_sic
-            RAW = point_PTFs.calcWaterContent(wc_fcCalc, wc_sicCalc, 'readily available water', nameArray)
+        if fcStatus and sicStatus:
             log.info('Readily available water calculated')
 
-            wcFields.append("wc_RAW")
-            wcArrays.append(RAW)
-
-            # Add wc_RAW field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_RAW", "DOUBLE", 10, 6)
-
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_RAW") as cursor:
-                for row in cursor:
-                    row[0] = RAW[recordNum]
-
-                    cursor.updateRow(row)
-                    recordNum += 1
-
-        elif pawStatus == True:
-            # If PAW exists, get RAW = 0.5 * RAW
-            PAW = point_PTFs.calcWaterContent(wc_fcCalc, wc_pwpCalc, 'plant available water', nameArray)
-            
-            RAW = [(float(i) * 0.5) for i in PAW]
+        elif pawStatus:
             log.info('Readily available water calculated based on PAW')
 
-            wcFields.append("wc_RAW")
-            wcArrays.append(RAW)
-
-            # Add wc_RAW field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_RAW", "DOUBLE", 10, 6)
-
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_RAW") as cursor:
-                for row in cursor:
-                    row[0] = RAW[recordNum]
-
-                    cursor.updateRow(row)
-                    recordNum += 1
-        else:
-            log.info('Readily available water not calculated')
-
-        if sicStatus == True and pwpStatus == True:
-            # notRAW = wc_sic - wc_pwp
-            NRAW = point_PTFs.calcWaterContent(wc_sicCalc, wc_pwpCalc, 'not readily available water', nameArray)
+        if sicStatus and pwpStatus:
             log.info('Not readily available water calculated')
 
-            wcFields.append("wc_NRAW")
-            wcArrays.append(NRAW)
-
-            # Add sat field to output shapefile
-            arcpy.AddField_management(outputShp, "wc_NRAW", "DOUBLE", 10, 6)
-
-            recordNum = 0
-            with arcpy.da.UpdateCursor(outputShp, "wc_NRAW") as cursor:
-                for row in cursor:
-                    row[0] = NRAW[recordNum]
-
-                    cursor.updateRow(row)
-                    recordNum += 1
+        if ensembleChoice:
+            ensembleOutput.report(outputShp)
 
         log.info('Water contents at critical thresholds written to output shapefile')
 
     except Exception:
-        arcpy.AddError("Point-PTFs function failed")
+        log.error("Point-PTFs function failed")
         raise
-
-    finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
\ No newline at end of file
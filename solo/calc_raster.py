@@ -0,0 +1,186 @@
+'''
+Function to run the PTFs on a raster stack (gridded soil properties)
+
+The input stack is a folder of aligned float grids (.flt and .hdr), one per input field
+(e.g. Sand.flt, Silt.flt, Clay.flt, OC.flt, BD.flt), see data_access. Grids can be
+exported from ArcGIS with RasterToFloat and the output grids imported with FloatToRaster.
+
+The cells are processed in strips of rows of about chunkRecords cells (user_settings.xml)
+and each strip is written to the output grids before the next one is read, so that memory
+is bounded by the strip and not by the size of the rasters. One output grid is written per
+parameter or pressure to the rasters folder of the output folder. Only the cells with a
+value in every input grid are calculated and checked, NODATA cells of the inputs are NODATA
+in every output grid (including warnFlags).
+
+This function does not use arcpy.
+'''
+
+import sys
+import os
+import numpy as np
+import LUCI_PTFs.lib.log as log
+import LUCI_PTFs.lib.common as common
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
+import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
+import LUCI_PTFs.lib.ensemble as ensemble
+import LUCI_PTFs.lib.point_PTFs as point_PTFs
+import LUCI_PTFs.lib.interpolation as interpolation
+import LUCI_PTFs.lib.vg_PTFs as vg_PTFs
+import LUCI_PTFs.lib.vanGenuchten as vanGenuchten
+import LUCI_PTFs.lib.ksat_PTFs as ksat_PTFs
+import LUCI_PTFs.lib.bc_PTFs as bc_PTFs
+import LUCI_PTFs.lib.brooksCorey as brooksCorey
+import LUCI_PTFs.lib.data_access as data_access
+from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
+
+from LUCI_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, common, PTFdatabase, checks_PTFs, ensemble, point_PTFs, interpolation, vg_PTFs, vanGenuchten,
+                 ksat_PTFs, bc_PTFs, brooksCorey, data_access])
+
+# Default pressures of the VG and BC output grids
+defaultPressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+
+def writeCriticalWC(outputStack, curveFxn, params, fcVal, sicVal, pwpVal, validMask=None):
+
+    # Water contents at the critical points from the VG or BC curves, and the differences between them
+    criticalPressures = [0.0, float(fcVal), float(sicVal), float(pwpVal)]
+    criticalWC = curveFxn(criticalPressures, *params)
+
+    wc_satCalc = criticalWC[:, 0]
+    wc_fcCalc = criticalWC[:, 1]
+    wc_sicCalc = criticalWC[:, 2]
+    wc_pwpCalc = criticalWC[:, 3]
+
+    if validMask is None:
+        validMask = np.ones(len(wc_satCalc), dtype=bool)
+
+    wc_DW = np.where(validMask, wc_satCalc - wc_fcCalc, -9999.0)
+    wc_RAW = np.where(validMask, wc_fcCalc - wc_sicCalc, -9999.0)
+    wc_NRAW = np.where(validMask, wc_sicCalc - wc_pwpCalc, -9999.0)
+    wc_PAW = np.where(validMask, wc_fcCalc - wc_pwpCalc, -9999.0)
+
+    common.writeOutputCriticalWC(outputStack, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+
+def function(outputFolder, inputStack, PTFOption, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
+
+    try:
+        # Input tables are cached per run
+        data_access.clearCache()
+
+        PTFType = PTFdatabase.getPTF(PTFOption).PTFType
+
+        if PTFType == "pointPTF" and not ensemble.isVectorised(PTFOption):
+            log.error("Point-PTF not available for rasters (only the PTFs evaluated on arrays by the ensemble): " + str(PTFOption))
+            sys.exit()
+
+        # The output grids are written to the rasters folder, aligned with the input grids
+        outputStack = data_access.createRasterOutput(inputStack, os.path.join(outputFolder, "rasters"))
+
+        # Fields read from the input grids
+        if PTFType == "pointPTF":
+            reqFields = point_PTFs.getLayerFields(PTFOption, outputStack, carbContent)
+
+        elif PTFType == "vgPTF":
+            reqFields = vg_PTFs.getLayerFields(PTFOption, outputStack, carbContent)
+
+        elif PTFType == "ksatPTF":
+            reqFields = ksat_PTFs.getLayerFields(PTFOption, outputStack, carbContent)
+
+        elif PTFType == "bcPTF":
+            reqFields = bc_PTFs.getLayerFields(PTFOption, outputStack, carbContent)
+
+        else:
+            log.error("PTF option not recognised: " + str(PTFOption))
+            sys.exit()
+
+        checks_PTFs.checkInputFields(reqFields, outputStack)
+
+        # Critical points of the point-PTFs: at the PTF pressures or interpolated between them
+        PTFPressures = [float(pressure) for pressure in PTFdatabase.getPTF(PTFOption).PTFPressures] if PTFType == "pointPTF" else []
+
+        criticalPoints = [("wc_satCalc", point_PTFs.getSatPressure(PTFOption)), ("wc_fcCalc", float(fcVal)),
+                          ("wc_sicCalc", float(sicVal)), ("wc_pwpCalc", float(pwpVal))]
+
+        def calcPointChunk(inputTable):
+
+            # One grid per PTF pressure
+            warningArray, warnFlags, wcMatrix = point_PTFs.calcPointLayer(PTFOption, outputStack, carbContent, carbonConFactor, inputTable)
+            point_PTFs.writePointLayer(outputStack, PTFOption, warningArray, warnFlags, wcMatrix)
+
+            # Water contents at the critical points
+            wcCurves = interpolation.buildPCHIP(PTFPressures, wcMatrix)
+
+            for fieldName, pressure in criticalPoints:
+
+                if pressure in PTFPressures:
+                    values = wcMatrix[:, PTFPressures.index(pressure)]
+
+                elif interpolation.inRange(wcCurves, pressure):
+                    values = interpolation.evalPCHIP(wcCurves, [pressure])[:, 0]
+
+                else:
+                    continue
+
+                data_access.addField(outputStack, fieldName, "DOUBLE", 10, 6)
+                data_access.writeColumns(outputStack, fieldName, values)
+
+        def calcVGChunk(inputTable):
+
+            warningArray, warnFlags, vgResults = vg_PTFs.calcVGLayer(PTFOption, outputStack, carbContent, carbonConFactor, inputTable)
+            vgParams = vgResults[:5]
+
+            vanGenuchten.writeVGParams(outputStack, *vgParams)
+
+            # Wosten et al. (1999) and Weynants et al. (2009) also return l and K_sat
+            if len(vgResults) == 7:
+                data_access.addField(outputStack, "l_MvG", "DOUBLE", 10, 6)
+                data_access.addField(outputStack, "K_sat", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputStack, ["l_MvG", "K_sat"], vgResults[5:])
+
+            defaultWC = vanGenuchten.calcVGArray(defaultPressures, *vgParams)
+            common.writeOutputWC(outputStack, *[defaultWC[:, i] for i in range(0, len(defaultPressures))])
+
+            writeCriticalWC(outputStack, vanGenuchten.calcVGArray, vgParams, fcVal, sicVal, pwpVal)
+
+            common.writeWarning(outputStack, warningArray)
+            checks_PTFs.writeFlags(outputStack, warnFlags)
+
+        def calcKsatChunk(inputTable):
+
+            K_satArray, warningArray, warnFlags = ksat_PTFs.calcKsatLayer(PTFOption, outputStack, carbContent, carbonConFactor, inputTable)
+
+            data_access.addField(outputStack, "K_sat", "DOUBLE", 10, 6)
+            data_access.writeColumns(outputStack, "K_sat", K_satArray)
+
+            common.writeWarning(outputStack, warningArray)
+            checks_PTFs.writeFlags(outputStack, warnFlags)
+
+        def calcBCChunk(inputTable):
+
+            # Invalid cells (lambda_BC and hb_BC of -9999) are written as NODATA
+            warning, warnFlags, bcResults = bc_PTFs.calcBCLayer(PTFOption, outputStack, carbContent, carbonConFactor, inputTable)
+            bcParams = [bcResults.hb_BC, bcResults.WC_res, bcResults.WC_sat, bcResults.lambda_BC]
+
+            brooksCorey.writeBCParams(outputStack, warning, bcResults.WC_res, bcResults.WC_sat, bcResults.lambda_BC, bcResults.hb_BC, bcResults.validMask)
+            checks_PTFs.writeFlags(outputStack, warnFlags)
+
+            defaultWC = brooksCorey.calcBrooksCoreyArray(defaultPressures, *bcParams)
+            common.writeOutputWC(outputStack, *[defaultWC[:, i] for i in range(0, len(defaultPressures))])
+
+            writeCriticalWC(outputStack, brooksCorey.calcBrooksCoreyArray, bcParams, fcVal, sicVal, pwpVal, bcResults.validMask)
+
+        calcChunk = {"pointPTF": calcPointChunk, "vgPTF": calcVGChunk,
+                     "ksatPTF": calcKsatChunk, "bcPTF": calcBCChunk}[PTFType]
+
+        # The grids are processed in strips of rows, each strip is written before the next one is read
+        # Only the cells with a value in every input grid are calculated, the others are NODATA in every output grid
+        # The failed checks of all strips are logged in one summary
+        checks_PTFs.startSummary()
+        data_access.streamTable(outputStack, reqFields, calcChunk, skipMissing=True)
+        checks_PTFs.endSummary()
+
+        log.info("Output grids written to: " + str(outputStack))
+
+    except Exception:
+        log.exception("Raster PTF function failed")
+        raise
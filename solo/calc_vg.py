@@ -4,24 +4,27 @@ Function to calculate van Genuchten parameters and SMRC
 
 import sys
 import os
-import arcpy
 import csv
 import numpy as np
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.vanGenuchten as vanGenuchten
 import LUCI_PTFs.lib.vg_PTFs as vg_PTFs
+import LUCI_PTFs.lib.PTFdatabase as PTFdatabase
 import LUCI_PTFs.lib.checks_PTFs as checks_PTFs
+import LUCI_PTFs.lib.curve_cache as curve_cache
+import LUCI_PTFs.lib.data_access as data_access
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, vanGenuchten, vg_PTFs, checks_PTFs])
+refresh_modules([log, common, vanGenuchten, vg_PTFs, PTFdatabase, checks_PTFs, curve_cache, data_access])
 
 def function(outputFolder, inputShp, VGOption, VGPressArray, MVGChoice, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
 
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "soil_")
+        # Curves and input tables are cached per run (large curve matrices can be stored in the output folder)
+        curve_cache.clearCache(outputFolder)
+        data_access.clearCache()
 
         # Set output filename
         if MVGChoice == True:
@@ -29,309 +32,213 @@ def function(outputFolder, inputShp, VGOption, VGPressArray, MVGChoice, fcVal, s
         else:
             outputShp = os.path.join(outputFolder, "soil_vg.shp")
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
+        # Copy the input shapefile to the output folder (or create the side table, see data_access.createOutput)
+        outputShp = data_access.createOutput(inputShp, outputShp)
 
-        ##############################################
-        ### Calculate the van Genuchten parameters ###
-        ##############################################
-
-        # Get the nameArray
-        nameArray = []
-        with arcpy.da.SearchCursor(outputShp, "LUCIname") as searchCursor:
-            for row in searchCursor:
-                name = row[0]
-
-                nameArray.append(name)
-
-        # Initialise the van Genuchten parameter arrays
-        # All VG PTFs should return these arrays        
-        WC_residualArray = []
-        WC_satArray = []
-        alpha_VGArray = []
-        n_VGArray = []
-        m_VGArray = []
+        # The output fields are also exported to a columnar file if it is set in user_settings.xml
+        data_access.startExport(outputShp)
 
         # Call VG PTF here depending on VGOption
-        if str(VGOption[0:11]) == "Wosten_1999":
-            # Has option to calculate Mualem-van Genuchten
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = vg_PTFs.Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice)
+        if PTFdatabase.getPTF(VGOption).PTFType != "vgPTF":
+            log.error("Van Genuchten option not recognised: " + str(VGOption))
+            sys.exit()
 
-        elif VGOption == "Vereecken_1989":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.Vereecken_1989(outputShp, VGOption, carbonConFactor, carbContent)
+        # Wosten et al. (1999) and Weynants et al. (2009) also return l and K_sat for Mualem-van Genuchten
+        if MVGChoice == True and VGOption not in ["Wosten_1999_top", "Wosten_1999_sub", "Weynants_2009"]:
+            log.error("Selected PTF does not calculate Mualem-van Genuchten parameters")
+            log.error("Please select a different PTF")
+            sys.exit()
 
-        elif VGOption == "ZachariasWessolek_2007":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.ZachariasWessolek_2007(outputShp, VGOption, carbonConFactor, carbContent)
-        
-        elif VGOption == "Weynants_2009":
-            # Has option to calculate Mualem-van Genuchten
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = vg_PTFs.Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice)
+        # Fields read by the VG PTF and LUCIname
+        reqFields = vg_PTFs.getLayerFields(VGOption, outputShp, carbContent) + ["LUCIname"]
+        checks_PTFs.checkInputFields(reqFields, outputShp)
 
-        elif VGOption == "Dashtaki_2010_vg":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.Dashtaki_2010(outputShp, VGOption, carbonConFactor, carbContent)
+        # The plots show every soil of the layer, so they are only created if the layer fits in one chunk
+        plotSoils = data_access.countRecords(outputShp) <= data_access.getChunkSize()
 
-        elif VGOption == "HodnettTomasella_2002":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent)
+        if not plotSoils:
+            log.warning('The layer has more records than one chunk (chunkRecords in user_settings.xml), van Genuchten plots are not created')
 
-        else:
-            log.error("Van Genuchten option not recognised: " + str(VGOption))
-            sys.exit()
- 
-        # Write VG parameter results to output shapefile
-        vanGenuchten.writeVGParams(outputShp, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
-
-        # Plot VG parameters
-        vanGenuchten.plotVG(outputFolder, WC_residualArray,
-                            WC_satArray, alpha_VGArray, n_VGArray,
-                            m_VGArray, nameArray, fcVal, sicVal, pwpVal)
-
-        ###############################################
-        ### Calculate water content using VG params ###
-        ###############################################
-
-        # Calculate water content at default pressures
-        WC_1kPaArray = []
-        WC_3kPaArray = []
-        WC_10kPaArray = []
-        WC_33kPaArray = []
-        WC_100kPaArray = []
-        WC_200kPaArray = []
-        WC_1000kPaArray = []
-        WC_1500kPaArray = []
-
-        for x in range(0, len(nameArray)):
-            WC_1kPa = vanGenuchten.calcVGfxn(1.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_3kPa = vanGenuchten.calcVGfxn(3.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_10kPa = vanGenuchten.calcVGfxn(10.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_33kPa = vanGenuchten.calcVGfxn(33.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_100kPa = vanGenuchten.calcVGfxn(100.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_200kPa = vanGenuchten.calcVGfxn(200.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_1000kPa = vanGenuchten.calcVGfxn(1000.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_1500kPa = vanGenuchten.calcVGfxn(1500.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-
-            WC_1kPaArray.append(WC_1kPa)
-            WC_3kPaArray.append(WC_3kPa)
-            WC_10kPaArray.append(WC_10kPa)
-            WC_33kPaArray.append(WC_33kPa)
-            WC_100kPaArray.append(WC_100kPa)
-            WC_200kPaArray.append(WC_200kPa)
-            WC_1000kPaArray.append(WC_1000kPa)
-            WC_1500kPaArray.append(WC_1500kPa)
-
-        common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
-
-        # Write water content at user-input pressures
+        if MVGChoice == True:
+            log.info("Calculating and plotting MVG")
+
+        # Default pressures of the output shapefile
+        defaultPressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
 
         # Initialise the pressure head array
         x = np.array(VGPressArray)
         vgPressures = x.astype(np.float)
 
-        # For the headings
-        headings = ['Name']
+        criticalPressures = [0.0, float(fcVal), float(sicVal), float(pwpVal)]
 
-        for pressure in vgPressures:
-            headName = 'WC_' + str(pressure) + "kPa"
-            headings.append(headName)
+        # Output CSVs with water content (and K for MVG) at the user-input pressures, written chunk by chunk
+        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
+        outKCSV = os.path.join(outputFolder, 'K_MVG.csv')
 
-        wcHeadings = headings[1:]
+        csv_files = []
 
-        # Initialise water content arrays
-        wcArrays = []
+        wcFile = open(outCSV, 'wb')
+        csv_files.append(wcFile)
+        wcWriter = csv.writer(wcFile)
+        wcWriter.writerow(['Name'] + ['WC_' + str(pressure) + "kPa" for pressure in vgPressures])
 
-        # Calculate soil moisture content at custom VG pressures
-        for x in range(0, len(nameArray)):
-            wcValues = vanGenuchten.calcPressuresVG(nameArray[x], WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x], vgPressures)
-            wcArrays.append(wcValues)
+        if MVGChoice == True:
+            kFile = open(outKCSV, 'wb')
+            csv_files.append(kFile)
+            kWriter = csv.writer(kFile)
+            kWriter.writerow(['Name'] + ['K_' + str(pressure) + "kPa" for pressure in vgPressures])
 
-        # Write to output CSV
-        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
+        def calcChunk(inputTable):
+
+            nameArray = inputTable["LUCIname"].tolist()
+
+            ##############################################
+            ### Calculate the van Genuchten parameters ###
+            ##############################################
+
+            # All VG PTFs return WC_residual, WC_sat, alpha_VG, n_VG and m_VG
+            # Wosten et al. (1999) and Weynants et al. (2009) also return l and K_sat
+            warningArray, warnFlags, vgResults = vg_PTFs.calcVGLayer(VGOption, outputShp, carbContent, carbonConFactor, inputTable)
+            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vgResults[:5]
+
+            common.writeWarning(outputShp, warningArray)
+
+            # Wosten et al. (1999) writes its K_sat to the output shapefile
+            if VGOption in ["Wosten_1999_top", "Wosten_1999_sub"]:
+                data_access.addField(outputShp, "K_sat", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "K_sat", vgResults[6])
+
+            checks_PTFs.writeFlags(outputShp, warnFlags)
+
+            # Write VG parameter results to output shapefile
+            vanGenuchten.writeVGParams(outputShp, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+
+            # Parameter set used to look up the cached VG curves
+            vgParams = [WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray]
+
+            # Plot VG parameters
+            if plotSoils:
+                vanGenuchten.plotVG(outputFolder, WC_residualArray,
+                                    WC_satArray, alpha_VGArray, n_VGArray,
+                                    m_VGArray, nameArray, fcVal, sicVal, pwpVal)
+
+            ###############################################
+            ### Calculate water content using VG params ###
+            ###############################################
+
+            # Calculate water content at default pressures
+            defaultWC = curve_cache.getCurveColumns('VG', vanGenuchten.calcVGArray, defaultPressures, vgParams)
 
-        with open(outCSV, 'wb') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(headings)
+            WC_1kPaArray = defaultWC[:, 0]
+            WC_3kPaArray = defaultWC[:, 1]
+            WC_10kPaArray = defaultWC[:, 2]
+            WC_33kPaArray = defaultWC[:, 3]
+            WC_100kPaArray = defaultWC[:, 4]
+            WC_200kPaArray = defaultWC[:, 5]
+            WC_1000kPaArray = defaultWC[:, 6]
+            WC_1500kPaArray = defaultWC[:, 7]
+
+            common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
+
+            # Calculate soil moisture content at custom VG pressures and write them to the output CSV
+            customWC = curve_cache.getCurveColumns('VG', vanGenuchten.calcVGArray, vgPressures, vgParams)
 
             for i in range(0, len(nameArray)):
-                row = wcArrays[i]
-                writer.writerow(row)
-
-            msg = 'Output CSV with water content saved to: ' + str(outCSV)
-            log.info(msg)
-
-        csv_file.close()
-
-        ##################################################
-        ### Calculate water content at critical points ###
-        ##################################################
-
-        # Initialise water content arrays
-        wc_satCalc = []
-        wc_fcCalc = []
-        wc_sicCalc = []
-        wc_pwpCalc = []
-
-        wc_DW = []
-        wc_RAW = []
-        wc_NRAW = []
-        wc_PAW = []
-
-        for i in range(0, len(nameArray)):
-            wc_sat = vanGenuchten.calcVGfxn(0, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_fc = vanGenuchten.calcVGfxn(float(fcVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_sic = vanGenuchten.calcVGfxn(float(sicVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_pwp = vanGenuchten.calcVGfxn(float(pwpVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-
-            drainWater = wc_sat - wc_fc
-            readilyAvailWater = wc_fc - wc_sic
-            notRAW = wc_sic - wc_pwp
-            PAW = wc_fc - wc_pwp
-
-            checks_PTFs.checkNegValue("Drainable water", drainWater, nameArray[i])
-            checks_PTFs.checkNegValue("Readily available water", readilyAvailWater, nameArray[i])
-            checks_PTFs.checkNegValue("Not readily available water", notRAW, nameArray[i])
-            checks_PTFs.checkNegValue("Not readily available water", PAW, nameArray[i])
-
-            wc_satCalc.append(wc_sat)
-            wc_fcCalc.append(wc_fc)
-            wc_sicCalc.append(wc_sic)
-            wc_pwpCalc.append(wc_pwp)
-            wc_DW.append(drainWater)
-            wc_RAW.append(readilyAvailWater)
-            wc_NRAW.append(notRAW)
-            wc_PAW.append(PAW)
-
-        common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
-
-        ############################################
-        ### Calculate using Mualem-van Genuchten ###
-        ############################################
+                wcWriter.writerow([nameArray[i]] + customWC[i].tolist())
 
-        if MVGChoice == True:
-            if VGOption in ["Wosten_1999_top", "Wosten_1999_sub", "Weynants_2009"]:
-                # Allow for calculation of MVG
-                log.info("Calculating and plotting MVG")
+            ##################################################
+            ### Calculate water content at critical points ###
+            ##################################################
 
-                # Write l_MvGArray to outputShp
-                arcpy.AddField_management(outputShp, "l_MvG", "DOUBLE", 10, 6)
+            criticalWC = curve_cache.getCurveColumns('VG', vanGenuchten.calcVGArray, criticalPressures, vgParams)
 
-                recordNum = 0
-                with arcpy.da.UpdateCursor(outputShp, "l_MvG") as cursor:
-                    for row in cursor:
-                        row[0] = l_MvGArray[recordNum]
+            wc_satCalc = criticalWC[:, 0]
+            wc_fcCalc = criticalWC[:, 1]
+            wc_sicCalc = criticalWC[:, 2]
+            wc_pwpCalc = criticalWC[:, 3]
 
-                        cursor.updateRow(row)
-                        recordNum += 1
+            wc_DW = wc_satCalc - wc_fcCalc
+            wc_RAW = wc_fcCalc - wc_sicCalc
+            wc_NRAW = wc_sicCalc - wc_pwpCalc
+            wc_PAW = wc_fcCalc - wc_pwpCalc
 
-                # Plot MVG
-                vanGenuchten.plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray)
-
-                # Calculate K at default pressures
-                
-                # Calculate at the pressures using the function
-                K_1kPaArray = []
-                K_3kPaArray = []
-                K_10kPaArray = []
-                K_33kPaArray = []
-                K_100kPaArray = []
-                K_200kPaArray = []
-                K_1000kPaArray = []
-                K_1500kPaArray = []
+            # Only visit the records with a negative value
+            for i in np.flatnonzero(wc_DW < 0.0):
+                checks_PTFs.checkNegValue("Drainable water", wc_DW[i], nameArray[i])
 
-                for i in range(0, len(nameArray)):
-                    K_1kPa = vanGenuchten.calcKhfxn(1.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_3kPa = vanGenuchten.calcKhfxn(3.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_10kPa = vanGenuchten.calcKhfxn(10.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_33kPa = vanGenuchten.calcKhfxn(33.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_100kPa = vanGenuchten.calcKhfxn(100.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_200kPa = vanGenuchten.calcKhfxn(200.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_1000kPa = vanGenuchten.calcKhfxn(1000.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_1500kPa = vanGenuchten.calcKhfxn(1500.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-
-                    K_1kPaArray.append(K_1kPa)
-                    K_3kPaArray.append(K_3kPa)
-                    K_10kPaArray.append(K_10kPa)
-                    K_33kPaArray.append(K_33kPa)
-                    K_100kPaArray.append(K_100kPa)
-                    K_200kPaArray.append(K_200kPa)
-                    K_1000kPaArray.append(K_1000kPa)
-                    K_1500kPaArray.append(K_1500kPa)
+            for i in np.flatnonzero(wc_RAW < 0.0):
+                checks_PTFs.checkNegValue("Readily available water", wc_RAW[i], nameArray[i])
 
-                # Write to the shapefile
-                MVGFields = ["K_1kPa", "K_3kPa", "K_10kPa", "K_33kPa", "K_100kPa", "K_200kPa", "K_1000kPa", "K_1500kPa"]
-                
-                # Add fields
-                for field in MVGFields:
-                    arcpy.AddField_management(outputShp, field, "DOUBLE", 10, 6)
+            for i in np.flatnonzero(wc_NRAW < 0.0):
+                checks_PTFs.checkNegValue("Not readily available water", wc_NRAW[i], nameArray[i])
+
+            for i in np.flatnonzero(wc_PAW < 0.0):
+                checks_PTFs.checkNegValue("Not readily available water", wc_PAW[i], nameArray[i])
+
+            common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
 
-                recordNum = 0
-                with arcpy.da.UpdateCursor(outputShp, MVGFields) as cursor:
-                    for row in cursor:
-                        row[0] = K_1kPaArray[recordNum]
-                        row[1] = K_3kPaArray[recordNum]
-                        row[2] = K_10kPaArray[recordNum]
-                        row[3] = K_33kPaArray[recordNum]
-                        row[4] = K_100kPaArray[recordNum]
-                        row[5] = K_200kPaArray[recordNum]
-                        row[6] = K_1000kPaArray[recordNum]
-                        row[7] = K_1500kPaArray[recordNum]
+            ############################################
+            ### Calculate using Mualem-van Genuchten ###
+            ############################################
 
-                        cursor.updateRow(row)
-                        recordNum += 1
+            if MVGChoice == True:
+                l_MvGArray, K_satArray = vgResults[5:]
 
-                log.info("Unsaturated hydraulic conductivity at default pressures written to output shapefile")
+                # Write l_MvGArray to outputShp
+                data_access.addField(outputShp, "l_MvG", "DOUBLE", 10, 6)
+                data_access.writeColumns(outputShp, "l_MvG", l_MvGArray)
 
-                # Calculate K at custom pressures
+                # Parameter set used to look up the cached MVG curves
+                mvgParams = [K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_residualArray, WC_satArray]
 
-                # Initialise the pressure head array
-                x = np.array(VGPressArray)
-                vgPressures = x.astype(np.float)
+                # Plot MVG
+                if plotSoils:
+                    vanGenuchten.plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray)
 
-                # For the headings
-                headings = ['Name']
+                # Calculate K at default pressures using the fused MVG kernel
+                defaultK = curve_cache.getCurveColumns('MVG', vanGenuchten.calcMVGArray, defaultPressures, mvgParams)['Kh']
 
-                for pressure in vgPressures:
-                    headName = 'K_' + str(pressure) + "kPa"
-                    headings.append(headName)
+                K_1kPaArray = defaultK[:, 0]
+                K_3kPaArray = defaultK[:, 1]
+                K_10kPaArray = defaultK[:, 2]
+                K_33kPaArray = defaultK[:, 3]
+                K_100kPaArray = defaultK[:, 4]
+                K_200kPaArray = defaultK[:, 5]
+                K_1000kPaArray = defaultK[:, 6]
+                K_1500kPaArray = defaultK[:, 7]
 
-                kHeadings = headings[1:]
+                # Write to the shapefile
+                MVGFields = ["K_1kPa", "K_3kPa", "K_10kPa", "K_33kPa", "K_100kPa", "K_200kPa", "K_1000kPa", "K_1500kPa"]
 
-                # Initialise K arrays
-                kArrays = []
+                # Add fields
+                for field in MVGFields:
+                    data_access.addField(outputShp, field, "DOUBLE", 10, 6)
 
-                # Calculate K content at custom VG pressures
-                for x in range(0, len(nameArray)):
-                    kValues = vanGenuchten.calcPressuresMVG(nameArray[x], K_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x], l_MvGArray[x], vgPressures)
-                    kArrays.append(kValues)
-                
-                # Write to output CSV
-                outCSV = os.path.join(outputFolder, 'K_MVG.csv')
+                data_access.writeColumns(outputShp, MVGFields, [K_1kPaArray, K_3kPaArray, K_10kPaArray, K_33kPaArray, K_100kPaArray, K_200kPaArray, K_1000kPaArray, K_1500kPaArray])
 
-                with open(outCSV, 'wb') as csv_file:
-                    writer = csv.writer(csv_file)
-                    writer.writerow(headings)
+                # Calculate K at custom VG pressures and write them to the output CSV
+                customK = curve_cache.getCurveColumns('MVG', vanGenuchten.calcMVGArray, vgPressures, mvgParams)['Kh']
 
-                    for i in range(0, len(nameArray)):
-                        row = kArrays[i]
-                        writer.writerow(row)
+                for i in range(0, len(nameArray)):
+                    kWriter.writerow([nameArray[i]] + customK[i].tolist())
 
-                    msg = 'Output CSV with unsaturated hydraulic conductivity saved to: ' + str(outCSV)
-                    log.info(msg)
+        # The layer is processed in chunks of records, each chunk is written before the next one is read
+        # The failed checks of all chunks are logged in one summary
+        try:
+            checks_PTFs.startSummary()
+            data_access.streamTable(outputShp, reqFields, calcChunk)
+            checks_PTFs.endSummary()
 
+        finally:
+            for csv_file in csv_files:
                 csv_file.close()
 
-            else:
-                log.error("Selected PTF does not calculate Mualem-van Genuchten parameters")
-                log.error("Please select a different PTF")
-                sys.exit()
+        log.info('Output CSV with water content saved to: ' + str(outCSV))
+
+        if MVGChoice == True:
+            log.info("Unsaturated hydraulic conductivity at default pressures written to output shapefile")
+            log.info('Output CSV with unsaturated hydraulic conductivity saved to: ' + str(outKCSV))
 
     except Exception:
-        arcpy.AddError("van Genuchten function failed")
+        log.error("van Genuchten function failed")
         raise
-
-    finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
\ No newline at end of file
@@ -1,14 +1,14 @@
 import configuration
-import arcpy
 import math
 import os
 import LUCI_PTFs.lib.log as log
 import LUCI_PTFs.lib.common as common
 import LUCI_PTFs.lib.thresholds as thresholds
+import LUCI_PTFs.lib.data_access as data_access
 from LUCI_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from LUCI_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, data_access])
 
 def checkInputFields(inputFields, inputShp):
 
@@ -30,10 +30,8 @@ def checkInputFields(inputFields, inputShp):
 def function(outputFolder, inputShp, fieldFC, fieldPWP, fieldSat, RAWoption, RAWfrac, fieldCrit, RDchoice, rootingDepth):
 
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "moist_")
-
-        tempSoils = prefix + "tempSoils"
+        # Input tables are cached per run
+        data_access.clearCache()
 
         # Set output filename
         outputShp = os.path.join(outputFolder, "soilMoisture.shp")
@@ -46,31 +44,20 @@ def function(outputFolder, inputShp, fieldFC, fieldPWP, fieldSat, RAWoption, RAW
 
         checkInputFields(reqFields, inputShp)
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, tempSoils)
+        # In table mode only the output fields are written, to a side table keyed by the input OID
+        outputShp = data_access.createOutput(inputShp, outputShp)
+
+        # The output fields are created and written in one pass
+        data_access.startOutput(outputShp)
 
         # Retrieve information from input shapefile
-        record = []
-        volFC = []
-        volPWP = []
-        volSat = []
-        volCrit = []
-
-        with arcpy.da.SearchCursor(tempSoils, reqFields) as searchCursor:
-            for row in searchCursor:
-                objectID = row[0]
-                WC_FC = row[1]
-                WC_PWP = row[2]
-                WC_Sat = row[3]
-
-                record.append(objectID)
-                volFC.append(WC_FC)
-                volPWP.append(WC_PWP)
-                volSat.append(WC_Sat)
-
-                if RAWoption == 'CriticalPoint':
-                    WC_Crit = row[4]
-                    volCrit.append(WC_Crit)
+        inputColumns = data_access.readColumns(outputShp, reqFields)
+        record, volFC, volPWP, volSat = inputColumns[:4]
+
+        if RAWoption == 'CriticalPoint':
+            volCrit = inputColumns[4]
+        else:
+            volCrit = []
 
         volPAW = []
         volDW = []
@@ -137,54 +124,35 @@ def function(outputFolder, inputShp, fieldFC, fieldPWP, fieldSat, RAWoption, RAW
         outFields = ['volPAW', 'volDW' , 'volTWC', 'volRAW']
 
         # Write outputs to shapefile
-        arcpy.AddField_management(tempSoils, "volPAW", "DOUBLE", 10, 6)
-        arcpy.AddField_management(tempSoils, "volDW", "DOUBLE", 10, 6)
-        arcpy.AddField_management(tempSoils, "volTWC", "DOUBLE", 10, 6)
-        arcpy.AddField_management(tempSoils, "volRAW", "DOUBLE", 10, 6)
+        data_access.addField(outputShp, "volPAW", "DOUBLE", 10, 6)
+        data_access.addField(outputShp, "volDW", "DOUBLE", 10, 6)
+        data_access.addField(outputShp, "volTWC", "DOUBLE", 10, 6)
+        data_access.addField(outputShp, "volRAW", "DOUBLE", 10, 6)
 
         if RDchoice == True:
-            arcpy.AddField_management(tempSoils, "mmPAW", "DOUBLE", 10, 6)
-            arcpy.AddField_management(tempSoils, "mmDW", "DOUBLE", 10, 6)
-            arcpy.AddField_management(tempSoils, "mmTWC", "DOUBLE", 10, 6)
-            arcpy.AddField_management(tempSoils, "mmRAW", "DOUBLE", 10, 6)
+            data_access.addField(outputShp, "mmPAW", "DOUBLE", 10, 6)
+            data_access.addField(outputShp, "mmDW", "DOUBLE", 10, 6)
+            data_access.addField(outputShp, "mmTWC", "DOUBLE", 10, 6)
+            data_access.addField(outputShp, "mmRAW", "DOUBLE", 10, 6)
 
             outFields.append('mmPAW')
             outFields.append('mmDW')
             outFields.append('mmTWC')
             outFields.append('mmRAW')
 
-        recordNum = 0
-        with arcpy.da.UpdateCursor(tempSoils, outFields) as cursor:
-            for row in cursor:
-                row[0] = volPAW[recordNum]
-                row[1] = volDW[recordNum]
-                row[2] = volTWC[recordNum]
-                row[3] = volRAW[recordNum]
-
-                if RDchoice == True:
-                    row[4] = mmPAW[recordNum]
-                    row[5] = mmDW[recordNum]
-                    row[6] = mmTWC[recordNum]
-                    row[7] = mmRAW[recordNum]
+        outColumns = [volPAW, volDW, volTWC, volRAW]
 
-                cursor.updateRow(row)
-                recordNum += 1
+        if RDchoice == True:
+            outColumns += [mmPAW, mmDW, mmTWC, mmRAW]
 
-        # Clean fields
-        outFields.append('OBJECTID')
-        common.CleanFields(tempSoils, outFields)
+        data_access.writeColumns(outputShp, outFields, outColumns)
+        data_access.writeOutput(outputShp)
 
-        arcpy.CopyFeatures_management(tempSoils, outputShp)
+        # Clean fields (the side table only holds the output fields)
+        if data_access.getOutputMode() == 'copy':
+            outFields.append('OBJECTID')
+            common.CleanFields(outputShp, outFields)
 
     except Exception:
-        arcpy.AddError("Soil moisture function failed")
+        log.error("Soil moisture function failed")
         raise
-
-    finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
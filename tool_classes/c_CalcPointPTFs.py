@@ -195,6 +195,16 @@ class calcPoint_PTFs(object):
         param.datatype = u'Feature Layer'
         params.append(param)
 
+        # 12 Ensemble
+        param = arcpy.Parameter()
+        param.name = u'Ensemble'
+        param.displayName = u'Also calculate water content using every point PTF that the input shapefile has the fields for (ensemble)'
+        param.parameterType = 'Optional'
+        param.direction = 'Input'
+        param.datatype = u'Boolean'
+        param.value = u'False'
+        params.append(param)
+
         return params
 
     def isLicensed(self):
@@ -105,9 +105,10 @@ def function(params):
                               BCPressArray, fcVal, sicVal, pwpVal,
                               carbContent, carbonConFactor)
 
-        # Set output filename for display
+        # Set output filename for display (there is no output shapefile in table mode)
         BCOut = os.path.join(outputFolder, "BrooksCorey.shp")
-        arcpy.SetParameter(13, BCOut)
+        if os.path.exists(BCOut):
+            arcpy.SetParameter(13, BCOut)
 
         log.info("Brooks-Corey operations completed successfully")
 
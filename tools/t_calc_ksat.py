@@ -108,9 +108,10 @@ def function(params):
         CalcKsat.function(outputFolder, inputFolder, KsatOption,
                           carbContent, carbonConFactor)
 
-        # Set output filename for display
+        # Set output filename for display (there is no output shapefile in table mode)
         KsatOut = os.path.join(outputFolder, "Ksat.shp")
-        arcpy.SetParameter(7, KsatOut)
+        if os.path.exists(KsatOut):
+            arcpy.SetParameter(7, KsatOut)
 
         log.info("Saturated hydraulic conductivity operations completed successfully")
 
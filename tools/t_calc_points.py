@@ -27,6 +27,7 @@ def function(params):
         carbonContent = pText[8]
         carbonConFactor = pText[9]
         unitsPlot = pText[10]
+        ensembleChoice = common.strToBool(pText[12])
 
         # Create output folder
         if not os.path.exists(outputFolder):
@@ -143,11 +144,13 @@ def function(params):
         common.writeXML(PTFXML, PTFOut)
 
         # Call calc_point_ptfs
-        calc_point_ptfs.function(outputFolder, inputShapefile, PTFOption, fcVal, sicVal, pwpVal, carbContent, carbonConFactor)
+        # With the ensemble option every applicable point-PTF and VG PTF is evaluated from the same read of the input
+        calc_point_ptfs.function(outputFolder, inputShapefile, PTFOption, fcVal, sicVal, pwpVal, carbContent, carbonConFactor, ensembleChoice)
 
-        # Loading shapefile automatically
+        # Loading shapefile automatically (there is no output shapefile in table mode)
         soilParamOut = os.path.join(outputFolder, "soil_point_ptf.shp")
-        arcpy.SetParameter(11, soilParamOut)
+        if os.path.exists(soilParamOut):
+            arcpy.SetParameter(11, soilParamOut)
 
         log.info("Point-PTF operations completed successfully")
 
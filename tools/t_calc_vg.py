@@ -105,14 +105,15 @@ def function(params):
                          MVGChoice, fcVal, sicVal, pwpVal,
                          carbContent, carbonConFactor)
 
-        # Loading shapefile automatically
+        # Loading shapefile automatically (there is no output shapefile in table mode)
         if MVGChoice == True:
             soilParamOut = os.path.join(outputFolder, "soil_mvg.shp")
         else:
             soilParamOut = os.path.join(outputFolder, "soil_vg.shp")
         
 
-        arcpy.SetParameter(14, soilParamOut)
+        if os.path.exists(soilParamOut):
+            arcpy.SetParameter(14, soilParamOut)
 
         log.info("van Genuchten operations completed successfully")
 
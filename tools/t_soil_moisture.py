@@ -62,9 +62,10 @@ def function(params):
                               RAWoption, RAWfrac, fieldCrit,
                               RDchoice, rootingDepth)
 
-        # Set output filename for display
+        # Set output filename for display (there is no output shapefile in table mode)
         soilMoistureOut = os.path.join(outputFolder, "soilMoisture.shp")
-        arcpy.SetParameter(12, soilMoistureOut)
+        if os.path.exists(soilMoistureOut):
+            arcpy.SetParameter(12, soilMoistureOut)
 
         log.info("Soil moisture operations completed successfully")
 